@@ -0,0 +1,15 @@
+"""ASGI entry point for load tests: the real app, optionally with a hashed embedder.
+
+    BENCH_FAKE_EMBEDDINGS=true uvicorn benchmarks.bench_app:app
+"""
+import os
+
+from services.model_registry import registry
+
+if os.getenv("BENCH_FAKE_EMBEDDINGS", "true").lower() == "true":
+    from benchmarks.common import HashEmbedder
+
+    # Registered before services are constructed so nothing loads the real model
+    registry.register("embedding_model", HashEmbedder)
+
+from main import app  # noqa: E402
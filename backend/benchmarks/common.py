@@ -0,0 +1,138 @@
+"""Helpers shared by the benchmark scripts."""
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SKILLS = ["Python", "React", "AWS", "Docker", "Kubernetes", "SQL", "TypeScript", "Kafka"]
+
+
+def fixture_names() -> List[str]:
+    return sorted(name for name in os.listdir(FIXTURES_DIR) if name.endswith(".html"))
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def make_job(index: int) -> dict:
+    rng = random.Random(index)
+    return {
+        "id": f"bench-job-{index}",
+        "title": rng.choice(["Backend Engineer", "Data Scientist", "DevOps Engineer", "Frontend Developer"]),
+        "skills": rng.sample(SKILLS, 3),
+        "experience": f"{rng.randint(1, 8)}+ years",
+        # Unique text per request so the response cache does not hide the LLM path
+        "description": f"Role {index}: build and operate services with {' and '.join(rng.sample(SKILLS, 2))}.",
+        "company": rng.choice(["Acme", "Globex", "Initech", "Umbrella"])
+    }
+
+
+def make_email(index: int, when: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "subject": f"Engineers for your open role #{index}",
+        "content": "Hello,\n\n" + "We provide dedicated engineers. " * 30,
+        "jobListing": make_job(index),
+        "portfolioLinks": ["https://atliq.com/portfolio/ml-dashboard"],
+        "timestamp": when.isoformat()
+    }
+
+
+def rss_mb(pid: str = "self") -> float:
+    """Current resident set size of a process in MB"""
+    with open(f"/proc/{pid}/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def tree_rss_mb(pid: int) -> float:
+    """RSS of a process plus all its descendants (e.g. uvicorn workers) in MB"""
+    total = rss_mb(str(pid))
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        try:
+            total += tree_rss_mb(child)
+        except OSError:
+            pass
+    return total
+
+
+def peak_rss_mb(pid: str = "self") -> float:
+    """High-water mark of resident memory (VmHWM) in MB"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def summarize(latencies_s: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds"""
+    if not latencies_s:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    latencies_ms = np.array(latencies_s) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3)
+    }
+
+
+def run_metadata(args) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "args": vars(args)
+    }
+
+
+def write_results(path: str, meta: Dict, results: List[Dict]) -> None:
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+class HashEmbedder:
+    """Deterministic stand-in for SentenceTransformer.encode
+
+    Hashes word tokens into a fixed-size vector, so similar texts still land
+    near each other and no model download is needed.
+    """
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False):
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "big")
+                vectors[row, value % EMBEDDING_DIM] += 1.0 if value >> 63 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1, norms)
+        return vectors
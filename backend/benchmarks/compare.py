@@ -0,0 +1,67 @@
+"""Compare two benchmark result files and flag regressions.
+
+Rows are matched on suite, name and concurrency. Latency going up, or
+throughput going down, by more than the threshold counts as a regression;
+the exit status is 1 when any is found so the script can gate CI.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# Metric -> True when higher is better
+METRICS = {
+    "throughput_rps": True,
+    "ops_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    return {(row["suite"], row["name"], row.get("concurrency")): row for row in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change counted as a regression")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    regressions = 0
+
+    for key in sorted(set(baseline) & set(candidate), key=str):
+        suite, name, concurrency = key
+        label = f"{suite}:{name}" + (f" c={concurrency}" if concurrency is not None else "")
+        cells = []
+        for metric, higher_is_better in METRICS.items():
+            before, after = baseline[key].get(metric), candidate[key].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            marker = ""
+            if worse > args.threshold:
+                marker = " !"
+                regressions += 1
+            cells.append(f"{metric}={before}->{after} ({change:+.1f}%){marker}")
+        print(f"{label:<55} " + "  ".join(cells))
+
+    for key in sorted(set(baseline) ^ set(candidate), key=str):
+        print(f"{key[0]}:{key[1]} only in {'baseline' if key in baseline else 'candidate'}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
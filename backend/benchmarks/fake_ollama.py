@@ -0,0 +1,111 @@
+"""Deterministic stand-in for the Ollama /api/generate endpoint.
+
+Completions are derived from a hash of the prompt, so the same prompt always
+yields the same text. Extraction prompts get a jobs JSON document and email
+prompts get a SUBJECT/EMAIL completion. Latency to the first token and the
+token rate are configurable, as is a deterministic error rate.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11500 --latency 0.2 --tokens-per-second 80
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TITLES = [
+    "Senior Backend Engineer", "Frontend Developer", "Data Scientist", "DevOps Engineer",
+    "Machine Learning Engineer", "Mobile Developer", "Site Reliability Engineer", "QA Engineer",
+]
+SKILLS = ["Python", "React", "AWS", "Docker", "Kubernetes", "SQL", "TypeScript", "Go", "Kafka", "Terraform"]
+FILLER = (
+    "Our dedicated engineers integrate with your team from day one and bring proven delivery "
+    "experience across cloud platforms, data pipelines and modern web stacks while keeping "
+    "costs predictable and quality high"
+).split()
+
+
+def _seed(prompt: str) -> int:
+    return int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+
+
+def completion_for(prompt: str) -> str:
+    seed = _seed(prompt)
+    if "extracting job information" in prompt:
+        jobs = []
+        for i in range(2 + seed % 4):
+            value = seed >> (i * 5)
+            jobs.append({
+                "title": TITLES[value % len(TITLES)],
+                "skills": [SKILLS[(value + j) % len(SKILLS)] for j in range(3)],
+                "experience": f"{1 + value % 6}+ years",
+                "description": " ".join(FILLER[(value + j) % len(FILLER)] for j in range(30)),
+            })
+        return json.dumps({"jobs": jobs})
+
+    words = [FILLER[(seed + i) % len(FILLER)] for i in range(180)]
+    return f"SUBJECT: Engineers for your open role ({seed % 1000})\n\nEMAIL:\nHello,\n\n" + " ".join(words)
+
+
+def tokenize(text: str):
+    # Roughly one token per word, keeping whitespace attached
+    tokens = []
+    current = ""
+    for char in text:
+        current += char
+        if char in " \n":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def create_app(latency: float, tokens_per_second: float, error_rate: float) -> FastAPI:
+    app = FastAPI()
+    token_delay = 1 / tokens_per_second if tokens_per_second > 0 else 0
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        if error_rate and (_seed(prompt) % 10_000) / 10_000 < error_rate:
+            return JSONResponse(status_code=500, content={"error": "injected failure"})
+
+        tokens = tokenize(completion_for(prompt))
+        if not body.get("stream", True):
+            await asyncio.sleep(latency + token_delay * len(tokens))
+            return {"model": body.get("model"), "response": "".join(tokens), "done": True}
+
+        async def stream():
+            await asyncio.sleep(latency)
+            for token in tokens:
+                yield json.dumps({"response": token, "done": False}) + "\n"
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            yield json.dumps({"response": "", "done": True, "eval_count": len(tokens)}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of prompts answered with HTTP 500")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.tokens_per_second, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Offline load test of the API against a fake LLM and fixture career pages.
+
+Starts the fake Ollama server, a static server for benchmarks/fixtures and the
+app itself (in a throwaway data directory), seeds users and history, then
+drives each scenario at fixed concurrency levels. Reports throughput,
+p50/p95/p99 latency, error count and the app's peak RSS per run (summed
+over all workers when --app-workers is above 1; real embeddings are then
+served by one embedding sidecar).
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 200 --output results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks.common import (
+    FIXTURES_DIR, fixture_names, make_email, make_job, peak_rss_mb, run_metadata, summarize, tree_rss_mb,
+    write_results
+)
+
+SCENARIOS = ("extract", "generate", "history")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), partial(QuietHandler, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def wait_for(url: str, timeout: float, expect_status: int = 200) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == expect_status:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+class RSSSampler:
+    """Polls a process's RSS in the background and keeps the maximum"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak, tree_rss_mb(self.pid))
+            except OSError:
+                return
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def seed(client: httpx.AsyncClient, users: int, history_rows: int) -> list:
+    """Create users and give each a history; returns their bearer tokens"""
+    async def signup(i: int) -> str:
+        response = await client.post("/api/auth/signup", json={
+            "email": f"bench{i}-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password", "name": f"Bench {i}"
+        })
+        response.raise_for_status()
+        return response.json()["token"]
+
+    tokens = await asyncio.gather(*(signup(i) for i in range(users)))
+
+    started = datetime.now() - timedelta(days=30)
+    per_user = max(1, history_rows // max(1, users))
+
+    async def fill(token: str):
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(per_user):
+            response = await client.post(
+                "/api/history", json=make_email(i, started + timedelta(minutes=i)), headers=headers
+            )
+            response.raise_for_status()
+
+    await asyncio.gather(*(fill(token) for token in tokens))
+    return list(tokens)
+
+
+def build_request(scenario: str, index: int, level: int, tokens: list, fixture_base: str):
+    headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+    if scenario == "extract":
+        names = fixture_names()
+        # Distinct URL per request and level; the page text repeats, as on real sites
+        url = f"{fixture_base}/{names[index % len(names)]}?run={level}-{index}"
+        return "POST", "/api/jobs/extract", {"url": url}, headers
+    if scenario == "generate":
+        return "POST", "/api/emails/generate", {"job": make_job(level * 1_000_000 + index)}, headers
+    return "GET", "/api/history?limit=50", None, headers
+
+
+async def drive(client: httpx.AsyncClient, scenario: str, level: int, requests: int,
+                tokens: list, fixture_base: str) -> dict:
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            method, path, body, headers = build_request(scenario, index, level, tokens, fixture_base)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(level)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        **summarize(latencies)
+    }
+
+
+def app_environment(workdir: str, llm_url: str, fake_embeddings: bool, embedding_url: str = "") -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "PAGE_CACHE_PATH": f"{workdir}/page_cache.db",
+        "LLM_CACHE_PATH": f"{workdir}/llm_cache.db",
+        "JOB_INDEX_PATH": f"{workdir}/job_index.db",
+        "TASK_QUEUE_PATH": f"{workdir}/task_queue.db",
+        "PORTFOLIO_INDEX_BACKEND": "numpy",
+        "PORTFOLIO_INDEX_DIR": f"{workdir}/portfolio_index",
+        "OLLAMA_ENDPOINTS": llm_url,
+        "SECRET_KEY": "bench-secret",
+        "WARMUP_ON_STARTUP": "true",
+        "BENCH_FAKE_EMBEDDINGS": "true" if fake_embeddings else "false",
+        "EMBEDDING_SERVICE_URL": embedding_url,
+    })
+    return env
+
+
+async def run_scenarios(args, base_url: str, fixture_base: str, app_pid: int) -> list:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        tokens = await seed(client, args.users, args.history_rows)
+        for scenario in args.scenarios:
+            for level in args.concurrency:
+                with RSSSampler(app_pid) as sampler:
+                    result = await drive(client, scenario, level, args.requests, tokens, fixture_base)
+                result = {
+                    "suite": "load", "name": scenario, "concurrency": level,
+                    **result, "peak_rss_mb": round(sampler.peak, 1)
+                }
+                results.append(result)
+                print(
+                    f"{scenario:>8} c={level:<3} {result['throughput_rps']:>8} req/s "
+                    f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                    f"errors={result['errors']} rss={result['peak_rss_mb']}MB"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history-rows", type=int, default=2000, help="History rows seeded across all users")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--real-embeddings", action="store_true", help="Load the real SentenceTransformer model")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn worker processes for the app")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    processes = []
+    fixture_server = start_fixture_server()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            llm_port = free_port()
+            processes.append(subprocess.Popen([
+                sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(llm_port),
+                "--latency", str(args.llm_latency), "--tokens-per-second", str(args.tokens_per_second),
+                "--error-rate", str(args.llm_error_rate)
+            ]))
+
+            embedding_url = ""
+            if args.real_embeddings and args.app_workers > 1:
+                # One shared model instead of one per worker
+                embedding_port = free_port()
+                processes.append(subprocess.Popen([
+                    sys.executable, "-m", "services.embedding_service", "--port", str(embedding_port)
+                ]))
+                embedding_url = f"http://127.0.0.1:{embedding_port}"
+                wait_for(f"{embedding_url}/health", 300)
+
+            app_port = free_port()
+            app = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "benchmarks.bench_app:app", "--workers", str(args.app_workers),
+                 "--port", str(app_port), "--log-level", "warning", "--no-access-log"],
+                env=app_environment(workdir, f"http://127.0.0.1:{llm_port}", not args.real_embeddings, embedding_url)
+            )
+            processes.append(app)
+
+            base_url = f"http://127.0.0.1:{app_port}"
+            wait_for(f"http://127.0.0.1:{llm_port}/docs", 30)
+            wait_for(f"{base_url}/ready", 300)
+
+            fixture_base = f"http://127.0.0.1:{fixture_server.server_port}"
+            results = asyncio.run(run_scenarios(args, base_url, fixture_base, app.pid))
+            print(f"app peak RSS (VmHWM): {peak_rss_mb(str(app.pid)):.1f}MB")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+        fixture_server.shutdown()
+
+    if args.output:
+        write_results(args.output, run_metadata(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""In-process micro-benchmarks for hot functions.
+
+Covers HTML cleaning/chunking and structured extraction over the fixture
+pages, portfolio matching (cold and cached embeddings) and history reads
+(first page, deep keyset page, full history, the cached/ETag response path
+and full-text search) on a seeded SQLite database.
+Everything runs against a throwaway data directory.
+
+Usage:
+    python -m benchmarks.micro --iterations 200 --output micro.json
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+WORKDIR = tempfile.mkdtemp(prefix="outreach-micro-")
+
+# Services read their configuration at import time
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORKDIR}/micro.db")
+os.environ.setdefault("PORTFOLIO_INDEX_BACKEND", "numpy")
+os.environ.setdefault("PORTFOLIO_INDEX_DIR", f"{WORKDIR}/portfolio_index")
+
+from benchmarks.common import (  # noqa: E402
+    HashEmbedder, fixture_names, make_email, read_fixture, run_metadata, summarize, write_results
+)
+
+
+def bench(name: str, func: Callable[[], object], iterations: int) -> Dict:
+    func()  # warm up
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    return {
+        "suite": "micro", "name": name, "iterations": iterations,
+        "ops_per_s": round(iterations / total, 2) if total else None,
+        **summarize(latencies)
+    }
+
+
+def bench_async(name: str, make_call: Callable[[int], object], iterations: int) -> Dict:
+    loop = asyncio.new_event_loop()
+    counter = iter(range(iterations + 1))
+    try:
+        return bench(name, lambda: loop.run_until_complete(make_call(next(counter))), iterations)
+    finally:
+        loop.close()
+
+
+def html_benchmarks(iterations: int) -> List[Dict]:
+    from services.html_chunker import prepare_chunks
+    from services.structured_extractor import extract_structured_jobs
+
+    results = []
+    for name in fixture_names():
+        content = read_fixture(name)
+        results.append(bench(f"prepare_chunks[{name}]", lambda: prepare_chunks(content, 6000), iterations))
+        results.append(bench(
+            f"extract_structured_jobs[{name}]", lambda: extract_structured_jobs(content, "Acme"), iterations
+        ))
+    return results
+
+
+def portfolio_benchmarks(iterations: int, real_embeddings: bool) -> List[Dict]:
+    from services.model_registry import registry
+
+    if not real_embeddings:
+        registry.register("embedding_model", HashEmbedder)
+    from services.portfolio_service import PortfolioService
+
+    service = PortfolioService()
+    registry.get("portfolio_index")
+    skills = ["Python", "AWS", "Docker"]
+
+    cold = bench_async(
+        "get_matching_portfolio[cold]",
+        # A new description each call misses the embedding cache
+        lambda i: service.get_matching_portfolio(f"Build data pipelines, variant {i} {time.perf_counter()}", skills),
+        iterations
+    )
+    warm = bench_async(
+        "get_matching_portfolio[cached]",
+        lambda i: service.get_matching_portfolio("Build data pipelines on AWS", skills),
+        iterations
+    )
+    jobs = [(f"Role {i} building APIs", skills) for i in range(50)]
+    batch = bench_async(
+        "get_matching_portfolio_batch[50]",
+        lambda i: service.get_matching_portfolio_batch([(f"{d} {i}", s) for d, s in jobs]),
+        max(1, iterations // 10)
+    )
+    return [cold, warm, batch]
+
+
+def history_benchmarks(iterations: int, rows: int) -> List[Dict]:
+    from services.history_service import HistoryService
+
+    service = HistoryService()
+    user_id = "micro-user"
+    started = datetime.now() - timedelta(days=30)
+    emails = [make_email(i, started + timedelta(minutes=i)) for i in range(rows)]
+    asyncio.run(service.save_emails(user_id, emails))
+
+    # Cursor pointing half way down the history
+    loop = asyncio.new_event_loop()
+    cursor = None
+    for _ in range(max(1, rows // 100)):
+        page = loop.run_until_complete(service.get_history_page(user_id, 50, cursor))
+        cursor = page.nextCursor
+    loop.close()
+
+    async def uncached_response(i: int):
+        service._responses.clear()
+        return await service.get_history_response(user_id)
+
+    etag, _ = asyncio.run(service.get_history_response(user_id))
+    return [
+        bench_async("history_page[first]", lambda i: service.get_history_page(user_id, 50), iterations),
+        bench_async("history_page[deep]", lambda i: service.get_history_page(user_id, 50, cursor), iterations),
+        bench_async(f"history_full[{rows}]", lambda i: service.get_user_history(user_id), max(1, iterations // 10)),
+        bench_async(f"history_response[uncached,{rows}]", uncached_response, max(1, iterations // 10)),
+        bench_async(f"history_response[cached,{rows}]", lambda i: service.get_history_response(user_id), iterations),
+        bench_async(
+            f"history_response[not_modified,{rows}]",
+            lambda i: service.get_history_response(user_id, if_none_match=etag), iterations
+        ),
+        # Every seeded email matches the first query; the phrase matches a few
+        bench_async(f"history_search[broad,{rows}]", lambda i: service.search(user_id, "engineers"), iterations),
+        bench_async(
+            f"history_search[phrase,{rows}]", lambda i: service.search(user_id, '"open role #42"'), iterations
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", nargs="+", choices=["html", "portfolio", "history"],
+                        default=["html", "portfolio", "history"])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--history-rows", type=int, default=5000)
+    parser.add_argument("--real-embeddings", action="store_true", help="Load the real SentenceTransformer model")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    if "html" in args.groups:
+        results += html_benchmarks(args.iterations)
+    if "portfolio" in args.groups:
+        results += portfolio_benchmarks(args.iterations, args.real_embeddings)
+    if "history" in args.groups:
+        results += history_benchmarks(args.iterations, args.history_rows)
+
+    for result in results:
+        print(
+            f"{result['name']:<50} p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms "
+            f"p99={result['p99_ms']:.3f}ms {result['ops_per_s']} ops/s"
+        )
+
+    if args.output:
+        write_results(args.output, run_metadata(args), results)
+
+
+if __name__ == "__main__":
+    main()
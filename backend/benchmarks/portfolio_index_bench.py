@@ -0,0 +1,125 @@
+"""Compare the Chroma and NumPy portfolio index backends.
+
+Each backend runs in its own subprocess so RSS numbers are not polluted by the
+other. Embeddings are random unit vectors of the MiniLM dimension, so the
+embedding model itself is not part of the measurement.
+
+Usage:
+    python -m benchmarks.portfolio_index_bench --sizes 100 1000 5000 --queries 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def make_index(backend: str, directory: str):
+    from services.vector_index import ChromaIndex, NumpyIndex
+
+    if backend == "numpy":
+        return NumpyIndex(directory)
+    return ChromaIndex(name=f"bench_{os.getpid()}")
+
+
+def run_backend(backend: str, size: int, queries: int, directory: str) -> dict:
+    rng = np.random.default_rng(42)
+    embeddings = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+    ids = [str(i) for i in range(size)]
+    metadatas = [{"url": f"https://atliq.com/portfolio/{i}"} for i in range(size)]
+    query_vectors = rng.standard_normal((queries, EMBEDDING_DIM)).astype(np.float32).tolist()
+
+    baseline_rss = rss_mb()
+
+    # Build: what the first start pays
+    started = time.perf_counter()
+    index = make_index(backend, directory)
+    index.add(ids, embeddings.tolist(), metadatas)
+    build_s = time.perf_counter() - started
+
+    # Startup: what later starts pay (Chroma is in-memory, so it rebuilds)
+    started = time.perf_counter()
+    if backend == "numpy":
+        index = make_index(backend, directory)
+    else:
+        index = make_index(backend, directory)
+        index.add(ids, embeddings.tolist(), metadatas)
+    startup_s = time.perf_counter() - started
+
+    latencies = []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        index.query([vector], 3)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    index.query(query_vectors, 3)
+    batch_s = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "backend": backend,
+        "size": size,
+        "queries": queries,
+        "build_s": round(build_s, 4),
+        "startup_s": round(startup_s, 4),
+        "query_p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "query_p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "query_p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "batch_query_ms": round(batch_s * 1000, 3),
+        "rss_delta_mb": round(rss_mb() - baseline_rss, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--worker", nargs=3, metavar=("BACKEND", "SIZE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, size, directory = args.worker
+        print(json.dumps(run_backend(backend, int(size), args.queries, directory)))
+        return
+
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            with tempfile.TemporaryDirectory() as directory:
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.portfolio_index_bench",
+                     "--queries", str(args.queries), "--worker", backend, str(size), directory],
+                    check=True, capture_output=True, text=True
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(
+                f"{backend:>6} n={size:<6} build={result['build_s']:.3f}s "
+                f"startup={result['startup_s']:.3f}s p50={result['query_p50_ms']:.3f}ms "
+                f"p95={result['query_p95_ms']:.3f}ms batch={result['batch_query_ms']:.1f}ms "
+                f"rss=+{result['rss_delta_mb']}MB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,67 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import (
+    create_engine, event, exc, false, inspect, Column, Integer, String, Text, DateTime, Boolean, Index
+)
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
 from datetime import datetime
 import os
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./outreach_pro.db")
 
-engine = create_engine(DATABASE_URL)
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# How long a SQLite connection waits on another process's write lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+def _async_url(url: str) -> str:
+    """Map a sync driver URL to its async driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+def _pool_options(url: str) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # In-memory SQLite and aiosqlite (NullPool) take no pool sizing
+    if ":memory:" not in url and not url.startswith("sqlite+aiosqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    return options
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL))
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets server workers read while one of them writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _configure_sqlite)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
 
 class User(Base):
@@ -32,10 +84,168 @@ class EmailHistory(Base):
     content = Column(Text)
     job_data = Column(Text)  # JSON string
     portfolio_links = Column(Text)  # JSON string
+    cached = Column(Boolean, default=False, server_default=false())
+    fallback = Column(Boolean, default=False, server_default=false())
     created_at = Column(DateTime, default=datetime.utcnow)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+    # Serves per-user history pages newest first without sorting
+    __table_args__ = (
+        Index("ix_email_history_user_created", "user_id", "created_at", "id"),
+    )
+
+class FailedEmailHistory(Base):
+    __tablename__ = "email_history_failed"
+    
+    # History rows the write-behind queue could not insert, kept for replay
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    email_id = Column(String)
+    user_id = Column(String, index=True)
+    payload = Column(Text)  # JSON of the email_history row
+    error = Column(Text)
+    failed_at = Column(DateTime, default=datetime.utcnow)
+
+class HistoryVersion(Base):
+    __tablename__ = "history_versions"
+    
+    # Bumped with every history write, so any worker can validate cached responses
+    user_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Columns added after a table first shipped. create_all never alters
+# existing tables, so databases created by older releases are upgraded here
+# at startup. Each needs a server_default, so existing rows get a value.
+_ADDED_COLUMNS = {
+    "email_history": ["cached", "fallback"],
+}
+_ADDED_INDEXES = [
+    index for table in Base.metadata.sorted_tables for index in table.indexes
+]
+
+def _add_column_ddl(table: str, name: str, dialect) -> str:
+    """ALTER TABLE for one model column, compiled for the dialect (DEFAULT 0 is not a Postgres boolean)"""
+    column = CreateColumn(Base.metadata.tables[table].c[name]).compile(dialect=dialect)
+    return f"ALTER TABLE {table} ADD COLUMN {column}"
+
+def _upgrade_schema(bind) -> None:
+    """Add missing columns and indexes to tables created by older releases; safe to repeat"""
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspect(bind).get_columns(table)}
+        for name in columns:
+            if name in existing:
+                continue
+            try:
+                with bind.begin() as connection:
+                    connection.exec_driver_sql(_add_column_ddl(table, name, bind.dialect))
+            except exc.DBAPIError:
+                # Another worker added it between the inspect and the ALTER
+                if name not in {column["name"] for column in inspect(bind).get_columns(table)}:
+                    raise
+    for index in _ADDED_INDEXES:
+        try:
+            index.create(bind=bind, checkfirst=True)
+        except exc.DBAPIError:
+            # Created concurrently by another worker
+            pass
+
+def _create_tables(bind) -> None:
+    try:
+        Base.metadata.create_all(bind=bind)
+    except exc.DBAPIError:
+        # Another worker created them first; a second pass finds every table
+        Base.metadata.create_all(bind=bind)
+    _upgrade_schema(bind)
+
+_create_tables(engine)
+
+# Full-text index over history for /api/history/search. Contentless FTS5
+# keyed by email_history_search_keys, whose INTEGER PRIMARY KEY is stable
+# across VACUUM (email_history's implicit rowid is not, as its key is the
+# TEXT id). Triggers keep both in step with every insert and delete,
+# including ones made by other workers.
+_HISTORY_FTS_COLUMNS = (
+    "json_extract({row}.job_data, '$.title'), json_extract({row}.job_data, '$.company'), "
+    "json_extract({row}.job_data, '$.skills')"
+)
+_HISTORY_SEARCH_KEY = "(SELECT search_id FROM email_history_search_keys WHERE email_id = {row}.id)"
+_HISTORY_FTS_DDL = [
+    # AUTOINCREMENT keeps keys increasing, so the newest rows have the highest keys
+    """
+    CREATE TABLE IF NOT EXISTS email_history_search_keys (
+        search_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email_id TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS email_history_fts USING fts5(
+        owner, subject, body, title, company, skills,
+        content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS email_history_fts_insert AFTER INSERT ON email_history BEGIN
+        INSERT INTO email_history_search_keys (email_id) VALUES (new.id);
+        INSERT INTO email_history_fts (rowid, owner, subject, body, title, company, skills)
+        VALUES ({_HISTORY_SEARCH_KEY.format(row="new")}, new.user_id, new.subject, new.content,
+                {_HISTORY_FTS_COLUMNS.format(row="new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS email_history_fts_delete AFTER DELETE ON email_history BEGIN
+        INSERT INTO email_history_fts (email_history_fts, rowid, owner, subject, body, title, company, skills)
+        VALUES ('delete', {_HISTORY_SEARCH_KEY.format(row="old")}, old.user_id, old.subject, old.content,
+                {_HISTORY_FTS_COLUMNS.format(row="old")});
+        DELETE FROM email_history_search_keys WHERE email_id = old.id;
+    END
+    """,
+]
+# Earlier releases keyed email_history_fts on email_history's rowid
+_HISTORY_FTS_LEGACY_DROP = [
+    "DROP TRIGGER IF EXISTS email_history_fts_insert",
+    "DROP TRIGGER IF EXISTS email_history_fts_delete",
+    "DROP TABLE IF EXISTS email_history_fts",
+]
+
+def _create_history_search_index(bind) -> bool:
+    """Create the FTS5 history index on SQLite, backfilling existing rows; False if unavailable"""
+    if bind.dialect.name != "sqlite":
+        return False
+    try:
+        with bind.begin() as connection:
+            # Take the write lock first, so only one worker builds or migrates the index
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            existing = {
+                name for (name,) in connection.exec_driver_sql(
+                    "SELECT name FROM sqlite_master "
+                    "WHERE name IN ('email_history_fts', 'email_history_search_keys')"
+                )
+            }
+            if existing == {"email_history_fts"}:
+                for statement in _HISTORY_FTS_LEGACY_DROP:
+                    connection.exec_driver_sql(statement)
+            for statement in _HISTORY_FTS_DDL:
+                connection.exec_driver_sql(statement)
+            if "email_history_search_keys" not in existing:
+                connection.exec_driver_sql(
+                    "INSERT INTO email_history_search_keys (email_id) "
+                    "SELECT id FROM email_history ORDER BY created_at, id"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO email_history_fts (rowid, owner, subject, body, title, company, skills) "
+                    "SELECT k.search_id, h.user_id, h.subject, h.content, "
+                    f"{_HISTORY_FTS_COLUMNS.format(row='h')} "
+                    "FROM email_history AS h JOIN email_history_search_keys AS k ON k.email_id = h.id"
+                )
+    except exc.DBAPIError:
+        # Either another worker held the lock past the busy timeout while
+        # building it, or SQLite lacks FTS5/JSON1 and search falls back to LIKE
+        with bind.connect() as connection:
+            return connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE name = 'email_history_fts_delete' "
+                "AND sql LIKE '%email_history_search_keys%'"
+            ).first() is not None
+    return True
+
+HISTORY_FTS_ENABLED = _create_history_search_index(engine)
 
 def get_db():
     db = SessionLocal()
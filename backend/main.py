@@ -1,24 +1,113 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, UploadFile, File, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import json
+from contextlib import asynccontextmanager
 import uvicorn
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from jose import JWTError
 from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
 
+# Load environment before services read their configuration
+load_dotenv()
+
 from services.job_extractor import JobExtractorService
-from services.email_generator import EmailGeneratorService
+from services.email_generator import EmailGeneratorService, EMAIL_BATCH_CONCURRENCY
 from services.auth_service import AuthService
 from services.history_service import HistoryService
+from services.model_registry import registry
+from services.crawler import CareerSiteCrawler, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES
+from services.task_queue import ExtractionQueue
+from services.embedding_service import EmbeddingClient
+from services.portfolio_ingest import read_upload
+from services.metrics import metrics, MetricsMiddleware
 from models.schemas import *
 
-load_dotenv()
+# Services (models are loaded lazily through the shared registry). They are
+# built in the lifespan, not at import: spawned HTML parse workers re-run this
+# module as __mp_main__ under `python main.py`, and must not open the stores.
+job_extractor: Optional[JobExtractorService] = None
+email_generator: Optional[EmailGeneratorService] = None
+auth_service: Optional[AuthService] = None
+history_service: Optional[HistoryService] = None
+crawler: Optional[CareerSiteCrawler] = None
+extraction_queue: Optional[ExtractionQueue] = None
+
+def build_services() -> None:
+    global job_extractor, email_generator, auth_service, history_service, crawler, extraction_queue
+    job_extractor = registry.construct("job_extractor", JobExtractorService)
+    email_generator = registry.construct("email_generator", EmailGeneratorService)
+    auth_service = registry.construct("auth_service", AuthService)
+    history_service = registry.construct("history_service", HistoryService)
+    crawler = CareerSiteCrawler(job_extractor, job_extractor.fetcher)
+    extraction_queue = ExtractionQueue(job_extractor)
+
+# Gauges read from service state at scrape time
+HISTORY_QUEUE_DEPTH = metrics.gauge("history_queue_depth", "Emails waiting for the history writer")
+PASSWORD_HASH_WAITING = metrics.gauge("password_hash_waiting", "Password hash calls queued or running")
+CACHE_ENTRIES = metrics.gauge("cache_entries", "Entries held per cache", ["cache"])
+LLM_OUTSTANDING = metrics.gauge("llm_outstanding_requests", "In-flight LLM calls per backend", ["backend"])
+LLM_BACKEND_UP = metrics.gauge("llm_backend_up", "1 when the backend circuit breaker is closed", ["backend"])
+MODEL_LOADED = metrics.gauge("model_loaded", "1 once a lazily loaded component is ready", ["component"])
+EXTRACTION_TASKS = metrics.gauge("extraction_tasks", "Background extraction tasks by status", ["status"])
+
+def collect_service_metrics():
+    if history_service is None:
+        return
+    HISTORY_QUEUE_DEPTH.set(history_service.queue_depth())
+    task_counts = extraction_queue.store.counts()
+    for task_status in ("queued", "running", "done", "failed"):
+        EXTRACTION_TASKS.set(task_counts.get(task_status, 0), status=task_status)
+    auth_stats = auth_service.stats()
+    PASSWORD_HASH_WAITING.set(auth_stats["password_hasher"]["waiting"])
+    CACHE_ENTRIES.set(auth_stats["token_cache"]["entries"], cache="token")
+    CACHE_ENTRIES.set(auth_stats["profile_cache"]["entries"], cache="profile")
+    for name, component in registry.status()["components"].items():
+        MODEL_LOADED.set(1 if component["loaded"] else 0, component=name)
+    if registry.is_loaded("llm"):
+        for backend in registry.get("llm").stats()["backends"]:
+            LLM_OUTSTANDING.set(backend["outstanding"], backend=backend["url"])
+            LLM_BACKEND_UP.set(1 if backend["state"] == "closed" else 0, backend=backend["url"])
+
+metrics.add_collector(collect_service_metrics)
 
-app = FastAPI(title="Outreach Pro API", version="1.0.0")
+# Load models in the background after the port is bound; /ready waits for it
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build services, start background workers and flush them on shutdown"""
+    build_services()
+    job_extractor.start()
+    history_service.start()
+    extraction_queue.start()
+    app.state.warmup_task = None
+    if WARMUP_ON_STARTUP:
+        # Warm models without delaying startup
+        app.state.warmup_task = asyncio.create_task(asyncio.to_thread(registry.warmup))
+    yield
+    # Persist queued history before releasing connections and cache handles
+    await history_service.stop()
+    # Unfinished extraction tasks stay in the store and resume on restart
+    await extraction_queue.stop()
+    await job_extractor.close()
+    email_generator.close()
+    if registry.is_loaded("llm"):
+        await registry.get("llm").close()
+    if registry.is_loaded("embedding_model") and isinstance(registry.get("embedding_model"), EmbeddingClient):
+        registry.get("embedding_model").close()
+    await auth_service.close()
+
+app = FastAPI(title="Outreach Pro API", version="1.0.0", lifespan=lifespan)
+
+# Per-route request latency
+app.add_middleware(MetricsMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -33,35 +122,36 @@ app.add_middleware(
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Services
-job_extractor = JobExtractorService()
-email_generator = EmailGeneratorService()
-auth_service = AuthService()
-history_service = HistoryService()
+# Comma-separated emails allowed to call admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
 
-# JWT Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Batch limits
+MAX_BATCH_URLS = int(os.getenv("MAX_BATCH_URLS", "200"))
+MAX_BATCH_JOBS = int(os.getenv("MAX_BATCH_JOBS", "500"))
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from JWT token"""
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Get current user from JWT token (verified tokens are cached)"""
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials"
-            )
-        return user_id
+        return auth_service.verify_token(credentials.credentials)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
 
+async def get_admin_user(user_id: str = Depends(get_current_user)):
+    """Require the current user to be listed in ADMIN_EMAILS"""
+    try:
+        user = await auth_service.get_user_by_id(user_id)
+    except Exception:
+        user = None
+    if user is None or user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user_id
+
 @app.post("/api/auth/login")
 async def login(request: LoginRequest):
     """User login endpoint"""
@@ -93,16 +183,96 @@ async def verify_token(user_id: str = Depends(get_current_user)):
 async def extract_jobs(request: ExtractJobsRequest, user_id: str = Depends(get_current_user)):
     """Extract job listings from career page URL"""
     try:
-        jobs = await job_extractor.extract_jobs(request.url)
-        return {"jobs": jobs}
+        result = await job_extractor.extract_page(request.url)
+        return {"jobs": result.jobs, "source": result.source}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to extract jobs: {str(e)}")
+
+@app.post("/api/jobs/extract/stream")
+async def extract_jobs_stream(request: ExtractJobsRequest, user_id: str = Depends(get_current_user)):
+    """Extract job listings and stream each one over SSE as soon as it is parsed"""
+    async def stream_events():
+        async for event, data in job_extractor.stream_page(request.url):
+            yield sse_event(event, data)
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+@app.post("/api/jobs/tasks", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_extraction(request: ExtractJobsRequest, user_id: str = Depends(get_current_user)):
+    """Queue a background extraction; a URL this user already has in flight returns that task"""
+    try:
+        task, created = await extraction_queue.enqueue(request.url, user_id)
+        return {"task": ExtractionTask(**task), "created": created}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to queue extraction: {str(e)}")
+
+@app.get("/api/jobs/tasks/{task_id}")
+async def get_extraction_task(task_id: str, user_id: str = Depends(get_current_user)):
+    """Status of a background extraction, with the jobs found so far"""
+    # Someone else's task is reported as missing, not forbidden
+    task = await extraction_queue.get(task_id, user_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return ExtractionTask(**task)
+
+@app.get("/api/jobs/tasks/{task_id}/events")
+async def extraction_task_events(task_id: str, user_id: str = Depends(get_current_user)):
+    """Stream a background extraction's status changes and jobs over SSE"""
+    if await extraction_queue.get(task_id, user_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def stream_events():
+        async for event, data in extraction_queue.events(task_id, user_id):
+            yield sse_event(event, data)
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+@app.post("/api/jobs/extract/batch")
+async def extract_jobs_batch(request: ExtractJobsBatchRequest, user_id: str = Depends(get_current_user)):
+    """Extract job listings from many career page URLs in parallel"""
+    if len(request.urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_URLS} URLs per batch")
+    try:
+        results = await job_extractor.extract_jobs_batch(request.urls)
+        return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to extract jobs: {str(e)}")
 
+@app.post("/api/jobs/crawl")
+async def crawl_jobs(request: CrawlRequest, user_id: str = Depends(get_current_user)):
+    """Crawl a career site and stream each page's jobs as NDJSON or SSE"""
+    # Requested budgets can only narrow the configured ones
+    max_depth = max(0, min(request.maxDepth if request.maxDepth is not None else CRAWL_MAX_DEPTH, CRAWL_MAX_DEPTH))
+    max_pages = max(1, min(request.maxPages or CRAWL_MAX_PAGES, CRAWL_MAX_PAGES))
+    
+    async def stream_pages():
+        pages = 0
+        jobs = 0
+        async for page in crawler.crawl(request.url, max_depth, max_pages):
+            pages += 1
+            jobs += len(page.jobs)
+            if request.format == "sse":
+                yield f"data: {page.json()}\n\n"
+            else:
+                yield page.json() + "\n"
+        summary = {"done": True, "pages": pages, "jobs": jobs}
+        yield sse_event("done", summary) if request.format == "sse" else json.dumps(summary) + "\n"
+    
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_pages(), media_type=media_type)
+
+@app.get("/api/jobs/cache/stats")
+async def job_cache_stats(user_id: str = Depends(get_current_user)):
+    """Page and extraction cache hit/miss counters"""
+    return job_extractor.cache_stats()
+
 @app.post("/api/emails/generate")
 async def generate_email(request: GenerateEmailRequest, user_id: str = Depends(get_current_user)):
     """Generate personalized cold email for a job"""
     try:
-        email_data = await email_generator.generate_email(request.job, user_id)
+        email_data = await email_generator.generate_email(
+            request.job, user_id, bypass_cache=request.bypassCache
+        )
         
         # Save to history
         await history_service.save_email(user_id, email_data)
@@ -111,14 +281,88 @@ async def generate_email(request: GenerateEmailRequest, user_id: str = Depends(g
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to generate email: {str(e)}")
 
+def sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/emails/generate/stream")
+async def generate_email_stream(request: GenerateEmailRequest, user_id: str = Depends(get_current_user)):
+    """Generate a cold email and stream tokens over SSE as the model produces them"""
+    async def stream_events():
+        async for event, data in email_generator.stream_email(
+            request.job, user_id, bypass_cache=request.bypassCache
+        ):
+            if event == "done":
+                await history_service.save_email(user_id, data["email"])
+            yield sse_event(event, data)
+    
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+@app.post("/api/emails/generate/batch")
+async def generate_emails_batch(request: GenerateEmailsBatchRequest, user_id: str = Depends(get_current_user)):
+    """Generate emails for many jobs and stream each result as NDJSON or SSE"""
+    if len(request.jobs) > MAX_BATCH_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_JOBS} jobs per batch")
+    
+    concurrency = min(request.concurrency or EMAIL_BATCH_CONCURRENCY, EMAIL_BATCH_CONCURRENCY)
+    
+    async def stream_results():
+        emails = []
+        try:
+            async for result in email_generator.generate_emails(
+                request.jobs, user_id, concurrency, bypass_cache=request.bypassCache
+            ):
+                if result.email is not None:
+                    emails.append(result.email)
+                if request.format == "sse":
+                    yield f"data: {result.json()}\n\n"
+                else:
+                    yield result.json() + "\n"
+            if request.format == "sse":
+                yield "event: done\ndata: {}\n\n"
+        finally:
+            # Save everything generated so far in a single history write
+            await asyncio.shield(history_service.save_emails(user_id, emails))
+    
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_results(), media_type=media_type)
+
 @app.get("/api/history")
-async def get_history(user_id: str = Depends(get_current_user)):
-    """Get user's email generation history"""
+async def get_history(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      user_id: str = Depends(get_current_user)):
+    """Get user's email generation history
+
+    Without limit or cursor the full history is returned; otherwise one keyset page
+    with a nextCursor for the following page. Responses carry a strong ETag and
+    If-None-Match is answered with 304 while the history is unchanged.
+    """
     try:
-        emails = await history_service.get_user_history(user_id)
-        return {"emails": emails}
+        etag, body = await history_service.get_history_response(
+            user_id, limit, cursor, request.headers.get("if-none-match")
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get history: {str(e)}")
+    
+    # Clients may keep the body but must revalidate before reusing it
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/history/search")
+async def search_history(q: str, limit: Optional[int] = None, offset: int = 0,
+                         user_id: str = Depends(get_current_user)):
+    """Ranked full-text search over the user's history
+
+    Matches subject, body and the job's title, company and skills; the last word
+    matches as a prefix and "quoted text" as a phrase. Pages with offset/nextOffset.
+    """
+    try:
+        if limit is None:
+            return await history_service.search(user_id, q, offset=offset)
+        return await history_service.search(user_id, q, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to search history: {str(e)}")
 
 @app.post("/api/history")
 async def save_email_to_history(request: SaveEmailRequest, user_id: str = Depends(get_current_user)):
@@ -129,10 +373,88 @@ async def save_email_to_history(request: SaveEmailRequest, user_id: str = Depend
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to save email: {str(e)}")
 
+@app.delete("/api/history/{email_id}")
+async def delete_email_from_history(email_id: str, user_id: str = Depends(get_current_user)):
+    """Delete an email from user's history"""
+    try:
+        deleted = await history_service.delete_email(user_id, email_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to delete email: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Email not found")
+    return {"message": "Email deleted successfully"}
+
+@app.get("/api/admin/cache/llm")
+async def llm_cache_stats(user_id: str = Depends(get_admin_user)):
+    """LLM response cache hit/miss counters"""
+    return email_generator.cache_stats()
+
+@app.delete("/api/admin/cache/llm")
+async def purge_llm_cache(user_id: str = Depends(get_admin_user)):
+    """Drop every cached LLM completion"""
+    purged = await asyncio.to_thread(email_generator.purge_cache)
+    return {"purged": purged}
+
+@app.get("/api/admin/llm/stats")
+async def llm_stats(user_id: str = Depends(get_admin_user)):
+    """LLM backend health, load, coalescing and fallback counters"""
+    return registry.get("llm").stats()
+
+@app.get("/api/admin/auth/stats")
+async def auth_stats(user_id: str = Depends(get_admin_user)):
+    """Password hashing queue times and token cache counters"""
+    return auth_service.stats()
+
+@app.post("/api/admin/warmup")
+async def warmup(user_id: str = Depends(get_admin_user)):
+    """Load all lazily-initialized models now"""
+    report = await asyncio.to_thread(registry.warmup)
+    return {"loaded": report}
+
+@app.post("/api/admin/portfolio/ingest")
+async def ingest_portfolio(file: UploadFile = File(...), format: Optional[str] = None,
+                           user_id: str = Depends(get_admin_user)):
+    """Upsert portfolio projects from a JSONL or CSV upload
+
+    Only new or changed projects are embedded; the report includes docs/s.
+    """
+    if format not in (None, "jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+    data = await file.read()
+    try:
+        records = read_upload(data, file.filename or "", format)
+        return await asyncio.to_thread(email_generator.portfolio_service.ingest, records)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to ingest portfolio: {str(e)}")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text exposition of pipeline metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 503 while startup warmup is loading models
+
+    Without warmup models load on first use, so the server is ready at once.
+    A component that failed to warm up is reported and retried on first use.
+    """
+    report = registry.status()
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is None:
+        report["warmup"] = "disabled"
+    else:
+        report["warmup"] = "finished" if warmup_task.done() else "running"
+    report["ready"] = report["warmup"] != "running"
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Several workers need EMBEDDING_SERVICE_URL, or each loads its own model,
+    # and the numpy portfolio index (the default then), since Chroma is per process
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app" if workers > 1 else app, host="0.0.0.0", port=8000, workers=workers)
\ No newline at end of file
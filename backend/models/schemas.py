@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 from datetime import datetime
 
 class LoginRequest(BaseModel):
@@ -14,6 +14,9 @@ class SignupRequest(BaseModel):
 class ExtractJobsRequest(BaseModel):
     url: str
 
+class ExtractJobsBatchRequest(BaseModel):
+    urls: List[str]
+
 class JobListing(BaseModel):
     id: str
     title: str
@@ -21,9 +24,56 @@ class JobListing(BaseModel):
     experience: str
     description: str
     company: str
+    # Id of an earlier listing this one is a near-duplicate of
+    duplicateOf: Optional[str] = None
+
+class ExtractionResult(BaseModel):
+    url: str
+    jobs: List[JobListing]
+    source: Literal["cache", "structured", "llm", "fallback"] = "llm"
+    error: Optional[str] = None
+
+class ExtractionTask(BaseModel):
+    id: str
+    url: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    jobsFound: int = 0
+    jobs: List[JobListing] = []
+    source: Optional[str] = None
+    error: Optional[str] = None
+    createdAt: float
+    updatedAt: float
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    normalize: bool = False
+    batchSize: int = 32
+
+class PortfolioProject(BaseModel):
+    # Defaults to the url, so re-ingesting the same project replaces it
+    id: Optional[str] = None
+    title: str
+    description: str = ""
+    technologies: List[str] = []
+    url: str
+
+class CrawlRequest(BaseModel):
+    url: str
+    maxDepth: Optional[int] = None
+    maxPages: Optional[int] = None
+    format: Literal["ndjson", "sse"] = "ndjson"
+
+class CrawlPageResult(BaseModel):
+    url: str
+    depth: int
+    jobs: List[JobListing]
+    source: Optional[str] = None
+    error: Optional[str] = None
 
 class GenerateEmailRequest(BaseModel):
     job: JobListing
+    bypassCache: bool = False
 
 class GeneratedEmailData(BaseModel):
     id: str
@@ -32,6 +82,21 @@ class GeneratedEmailData(BaseModel):
     jobListing: JobListing
     portfolioLinks: List[str]
     timestamp: str
+    cached: bool = False
+    # Templated email served because the LLM call failed
+    fallback: bool = False
+
+class GenerateEmailsBatchRequest(BaseModel):
+    jobs: List[JobListing]
+    concurrency: Optional[int] = None
+    format: Literal["ndjson", "sse"] = "ndjson"
+    bypassCache: bool = False
+
+class BatchEmailResult(BaseModel):
+    index: int
+    jobId: str
+    email: Optional[GeneratedEmailData] = None
+    error: Optional[str] = None
 
 class SaveEmailRequest(BaseModel):
     id: str
@@ -40,6 +105,12 @@ class SaveEmailRequest(BaseModel):
     jobListing: JobListing
     portfolioLinks: List[str]
     timestamp: str
+    cached: bool = False
+    fallback: bool = False
+
+class HistoryPage(BaseModel):
+    emails: List[GeneratedEmailData]
+    nextCursor: Optional[str] = None
 
 class UserPreferences(BaseModel):
     tone: str = "professional"
@@ -1,26 +1,85 @@
 import uuid
 import hashlib
+import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from config.database import AsyncSessionLocal, async_engine, User as UserRecord
 from models.schemas import User, UserPreferences, AuthResponse
+from services.password_hasher import PasswordHasher
+from services.metrics import stage, CACHE_EVENTS
+import json
+
+# Verified token cache
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Read-through cache of user profiles
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+
+class TTLCache:
+    """Small bounded LRU cache whose entries expire individually"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, name: str = "ttl"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            CACHE_EVENTS.inc(cache=self.name, result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        CACHE_EVENTS.inc(cache=self.name, result="hit")
+        return entry[0]
+
+    def put(self, key, value, expires_at: Optional[float] = None) -> None:
+        # Entries never outlive their own expiry, such as a token's exp
+        ttl_expiry = time.time() + self.ttl_seconds
+        self._entries[key] = (value, min(ttl_expiry, expires_at) if expires_at else ttl_expiry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
 
 class AuthService:
     def __init__(self):
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        self.secret_key = "your-secret-key-here"
-        self.algorithm = "HS256"
+        self.secret_key = os.getenv("SECRET_KEY", "your-secret-key-here")
+        self.algorithm = os.getenv("ALGORITHM", "HS256")
         
-        # In-memory user storage (replace with database in production)
-        self.users = {}
-        self.user_emails = {}
+        # bcrypt runs in a bounded pool instead of on the event loop
+        self.password_hasher = PasswordHasher(self.pwd_context)
+        self.token_cache = TTLCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS, "token")
+        
+        # Users are stored in the users table
+        self.session_factory = AsyncSessionLocal
+        self.profile_cache = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS, "profile")
 
-    def _hash_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def _hash_password(self, password: str) -> str:
+        return await self.password_hasher.hash(password)
 
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
     def _create_access_token(self, user_id: str) -> str:
         expire = datetime.utcnow() + timedelta(days=7)
@@ -28,15 +87,39 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
 
+    def verify_token(self, token: str) -> str:
+        """Return the user id for a valid token, raising JWTError otherwise"""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        user_id = self.token_cache.get(digest)
+        if user_id is not None:
+            return user_id
+        
+        payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        user_id = payload.get("sub")
+        if user_id is None:
+            raise JWTError("Token has no subject")
+        
+        self.token_cache.put(digest, user_id, payload.get("exp"))
+        return user_id
+
+    def stats(self) -> Dict:
+        return {
+            "password_hasher": self.password_hasher.stats(),
+            "token_cache": self.token_cache.stats(),
+            "profile_cache": self.profile_cache.stats()
+        }
+
+    async def close(self) -> None:
+        self.password_hasher.shutdown()
+        await async_engine.dispose()
+
     async def signup(self, email: str, password: str, name: str) -> AuthResponse:
-        # Check if user exists
-        if email in self.user_emails:
-            raise Exception("User already exists")
+        # Hash before opening a session, so no pooled connection is held
+        # while bcrypt runs in the thread pool
+        hashed_password = await self._hash_password(password)
         
         # Create new user
         user_id = str(uuid.uuid4())
-        hashed_password = self._hash_password(password)
-        
         user = User(
             id=user_id,
             email=email,
@@ -44,12 +127,26 @@ class AuthService:
             preferences=UserPreferences()
         )
         
-        # Store user
-        self.users[user_id] = {
-            "user": user,
-            "password": hashed_password
-        }
-        self.user_emails[email] = user_id
+        async with self.session_factory() as db:
+            # Check if user exists (served by the unique email index)
+            if await self._find_by_email(db, email) is not None:
+                raise Exception("User already exists")
+            
+            # Store user
+            db.add(UserRecord(
+                id=user_id,
+                email=email,
+                name=name,
+                hashed_password=hashed_password,
+                preferences=user.preferences.json()
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent signup for the same email
+                raise Exception("User already exists")
+        
+        self.profile_cache.put(user_id, user)
         
         # Create token
         token = self._create_access_token(user_id)
@@ -57,24 +154,51 @@ class AuthService:
         return AuthResponse(token=token, user=user)
 
     async def login(self, email: str, password: str) -> AuthResponse:
+        async with self.session_factory() as db:
+            record = await self._find_by_email(db, email)
+        
         # Check if user exists
-        if email not in self.user_emails:
+        if record is None or not record.is_active:
             raise Exception("Invalid credentials")
         
-        user_id = self.user_emails[email]
-        stored_data = self.users[user_id]
-        
         # Verify password
-        if not self._verify_password(password, stored_data["password"]):
+        if not await self._verify_password(password, record.hashed_password):
             raise Exception("Invalid credentials")
         
+        user = self._to_user(record)
+        self.profile_cache.put(user.id, user)
+        
         # Create token
-        token = self._create_access_token(user_id)
+        token = self._create_access_token(user.id)
         
-        return AuthResponse(token=token, user=stored_data["user"])
+        return AuthResponse(token=token, user=user)
 
     async def get_user_by_id(self, user_id: str) -> User:
-        if user_id not in self.users:
+        user = self.profile_cache.get(user_id)
+        if user is not None:
+            return user
+        
+        async with self.session_factory() as db:
+            with stage("auth", "user_lookup"):
+                record = await db.get(UserRecord, user_id)
+        
+        if record is None:
             raise Exception("User not found")
         
-        return self.users[user_id]["user"]
\ No newline at end of file
+        user = self._to_user(record)
+        self.profile_cache.put(user_id, user)
+        return user
+
+    async def _find_by_email(self, db, email: str) -> Optional[UserRecord]:
+        with stage("auth", "user_lookup"):
+            result = await db.execute(select(UserRecord).where(UserRecord.email == email))
+        return result.scalar_one_or_none()
+
+    def _to_user(self, record: UserRecord) -> User:
+        preferences = json.loads(record.preferences) if record.preferences else {}
+        return User(
+            id=record.id,
+            email=record.email,
+            name=record.name,
+            preferences=UserPreferences(**preferences)
+        )
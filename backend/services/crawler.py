@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import httpx
+from bs4 import BeautifulSoup
+from models.schemas import CrawlPageResult
+from services.html_chunker import HTML_PARSER
+
+# Crawl budgets and politeness
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "30"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "0.5"))
+CRAWLER_USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "OutreachProBot")
+# Sent with robots.txt and page requests, so the rules checked are the ones obeyed
+CRAWLER_HEADERS = {"User-Agent": CRAWLER_USER_AGENT}
+
+# Links worth following from a career page
+JOB_PATH_HINTS = ("job", "career", "position", "opening", "vacanc", "department", "team", "role", "hiring")
+PAGINATION_QUERY_KEYS = {"page", "p", "pg", "offset", "start", "from"}
+PAGINATION_TEXT_HINTS = ("next", "load more", "more jobs", "show more", "older", "»", "›")
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".doc", ".docx", ".css", ".js")
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid")
+# Matched exactly; prefixes like "ref" would also drop keys such as "reference" or "refine"
+TRACKING_KEYS = {"ref", "referrer"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to deduplicate the frontier"""
+    parsed = urlparse(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS) and key.lower() not in TRACKING_KEYS
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", urlencode(query), ""))
+
+
+def _site(netloc: str) -> str:
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def discover_links(content: bytes, base_url: str) -> List[str]:
+    """Same-site links that look like job, department or pagination pages"""
+    soup = BeautifulSoup(content, HTML_PARSER)
+    site = _site(urlparse(base_url).netloc)
+    links = []
+    for anchor in soup.find_all("a", href=True):
+        href = anchor["href"].strip()
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+            continue
+        url = urljoin(base_url, href)
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or _site(parsed.netloc) != site:
+            continue
+        if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+
+        path = parsed.path.lower()
+        query_keys = {key.lower() for key, _ in parse_qsl(parsed.query)}
+        text = anchor.get_text(" ").strip().lower()
+        if (any(hint in path for hint in JOB_PATH_HINTS)
+                or query_keys & PAGINATION_QUERY_KEYS
+                or "/page/" in path
+                or any(hint in text for hint in PAGINATION_TEXT_HINTS)
+                or "next" in (anchor.get("rel") or [])):
+            links.append(url)
+    return links
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host by at least a minimum delay"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last: Dict[str, float] = {}
+
+    async def wait(self, host: str, delay: Optional[float] = None) -> None:
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            gap = max(self.delay, delay or 0)
+            remaining = self._last.get(host, 0) + gap - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            self._last[host] = time.monotonic()
+
+
+class CareerSiteCrawler:
+    """Follows same-site job and pagination links from a career page"""
+
+    def __init__(self, job_extractor, fetcher):
+        self.job_extractor = job_extractor
+        self.fetcher = fetcher
+        self.rate_limiter = HostRateLimiter(CRAWL_HOST_DELAY)
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+
+    async def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self._robots:
+            parser = None
+            try:
+                await self.rate_limiter.wait(parsed.netloc)
+                response = await self.fetcher.fetch(f"{origin}/robots.txt", headers=CRAWLER_HEADERS)
+                parser = RobotFileParser()
+                parser.parse(response.content.decode("utf-8", errors="ignore").splitlines())
+            except httpx.HTTPStatusError as e:
+                # An access-controlled robots.txt disallows the whole host;
+                # other error statuses (such as 404) allow everything
+                parser = None
+                if e.response.status_code in (401, 403):
+                    parser = RobotFileParser()
+                    parser.disallow_all = True
+            except Exception:
+                # Missing or unreadable robots.txt allows everything
+                parser = None
+            self._robots[origin] = parser
+        return self._robots[origin]
+
+    async def _allowed(self, url: str) -> Tuple[bool, Optional[float]]:
+        robots = await self._robots_for(url)
+        if robots is None:
+            return True, None
+        return robots.can_fetch(CRAWLER_USER_AGENT, url), robots.crawl_delay(CRAWLER_USER_AGENT)
+
+    async def crawl(self, start_url: str, max_depth: int = CRAWL_MAX_DEPTH,
+                    max_pages: int = CRAWL_MAX_PAGES,
+                    concurrency: int = CRAWL_CONCURRENCY) -> AsyncIterator[CrawlPageResult]:
+        """Crawl breadth-first, yielding each page's new jobs as soon as it finishes"""
+        frontier: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        seen: Set[str] = {normalize_url(start_url)}
+        seen_jobs: Set[str] = set()
+        frontier.put_nowait((start_url, 0))
+
+        async def process(url: str, depth: int) -> CrawlPageResult:
+            allowed, crawl_delay = await self._allowed(url)
+            if not allowed:
+                return CrawlPageResult(url=url, depth=depth, jobs=[], error="Disallowed by robots.txt")
+
+            await self.rate_limiter.wait(urlparse(url).netloc, crawl_delay)
+            page = await self.fetcher.fetch(url, headers=CRAWLER_HEADERS)
+
+            # Schedule children before extraction so fetching overlaps the LLM
+            if depth < max_depth:
+                for link in await asyncio.to_thread(discover_links, page.content, page.url):
+                    key = normalize_url(link)
+                    if key in seen or len(seen) >= max_pages:
+                        continue
+                    seen.add(key)
+                    frontier.put_nowait((link, depth + 1))
+
+            result = await self.job_extractor.extract_content(url, page.content)
+            if result.source == "fallback":
+                return CrawlPageResult(url=url, depth=depth, jobs=[], source=result.source, error=result.error)
+
+            # Department and listing pages repeat the same postings
+            new_jobs = []
+            for job in result.jobs:
+                if job.id not in seen_jobs and job.duplicateOf not in seen_jobs:
+                    seen_jobs.add(job.id)
+                    new_jobs.append(job)
+            return CrawlPageResult(url=url, depth=depth, jobs=new_jobs, source=result.source)
+
+        async def worker():
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    result = await process(url, depth)
+                except Exception as e:
+                    result = CrawlPageResult(url=url, depth=depth, jobs=[], error=str(e))
+                # Publish before task_done so the finisher cannot overtake it
+                await results.put(result)
+                frontier.task_done()
+
+        async def finish():
+            await frontier.join()
+            await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        finisher = asyncio.create_task(finish())
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield result
+        finally:
+            for task in workers + [finisher]:
+                task.cancel()
@@ -1,16 +1,78 @@
+import asyncio
+import os
+import time
 import uuid
 from datetime import datetime
-from typing import List
-from langchain.chains import LLMChain
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from langchain.prompts import PromptTemplate
-from langchain_community.llms import Ollama
-from models.schemas import JobListing, GeneratedEmailData
+from models.schemas import JobListing, GeneratedEmailData, BatchEmailResult
 from services.portfolio_service import PortfolioService
+from services.llm_cache import LLMResponseCache
+from services.model_registry import registry, LLM_MODEL
+from services.metrics import (
+    metrics, stage, BATCH_SIZE, STAGE_SECONDS, LLM_PROMPT_CHARS, LLM_COMPLETION_CHARS
+)
+
+# Upper bound on concurrent LLM calls for a batch request
+EMAIL_BATCH_CONCURRENCY = int(os.getenv("EMAIL_BATCH_CONCURRENCY", "4"))
+
+EMAIL_TTFT_SECONDS = metrics.histogram("email_stream_ttft_seconds", "Time to first streamed token")
+EMAIL_STREAM_TOKENS = metrics.histogram(
+    "email_stream_tokens", "Tokens per streamed email", buckets=(50, 100, 200, 300, 500, 800, 1200, 2000)
+)
+EMAILS = metrics.counter("emails_generated", "Generated emails by outcome", ["outcome"])
+
+class EmailStreamParser:
+    """Incrementally splits a streamed completion into SUBJECT and EMAIL sections"""
+
+    def __init__(self):
+        self.subject: Optional[str] = None
+        self.in_body = False
+        self._line = ""
+        self._body: List[str] = []
+
+    def feed(self, token: str) -> List[Tuple[str, str]]:
+        if self.in_body:
+            self._body.append(token)
+            return [("content", token)]
+        
+        events = []
+        self._line += token
+        while "\n" in self._line and not self.in_body:
+            line, self._line = self._line.split("\n", 1)
+            events.extend(self._handle_line(line))
+        return events
+
+    def finish(self) -> Tuple[str, str]:
+        if not self.in_body and self._line:
+            self._handle_line(self._line)
+            self._line = ""
+        return self.subject or "", "".join(self._body).strip()
+
+    def _handle_line(self, line: str) -> List[Tuple[str, str]]:
+        stripped = line.strip()
+        if stripped.startswith("SUBJECT:") and self.subject is None:
+            self.subject = stripped.replace("SUBJECT:", "", 1).strip()
+            return [("subject", self.subject)]
+        if stripped.startswith("EMAIL:"):
+            self.in_body = True
+            # Anything after the marker, plus buffered text, is body
+            rest = stripped.replace("EMAIL:", "", 1).strip()
+            remainder = (rest + "\n" if rest else "") + self._line
+            self._line = ""
+            if remainder:
+                self._body.append(remainder)
+                return [("content", remainder)]
+        return []
+
 
 class EmailGeneratorService:
     def __init__(self):
-        # Initialize LLM
-        self.llm = Ollama(model="llama2")
+        # LLM backend pool is loaded lazily from the shared registry
+        self.model_name = LLM_MODEL
+        
+        # Completions keyed on normalized prompt inputs
+        self.response_cache = LLMResponseCache()
         
         # Initialize portfolio service
         self.portfolio_service = PortfolioService()
@@ -49,51 +111,68 @@ class EmailGeneratorService:
             [email content]
             """
         )
-        
-        self.chain = LLMChain(llm=self.llm, prompt=self.email_prompt)
 
-    async def generate_email(self, job: JobListing, user_id: str) -> GeneratedEmailData:
-        """Generate a personalized cold email for a job listing"""
+    @property
+    def llm(self):
+        return registry.get("llm")
+
+    async def generate_email(self, job: JobListing, user_id: str, strict: bool = False,
+                             bypass_cache: bool = False,
+                             portfolio_links: Optional[List[str]] = None) -> GeneratedEmailData:
+        """Generate a personalized cold email for a job listing
+
+        With strict=True errors are raised instead of falling back to the template;
+        otherwise a templated email is returned with fallback=True.
+        With bypass_cache=True the response cache is neither read nor written.
+        Precomputed portfolio_links skip the portfolio lookup.
+        """
         try:
             # Get matching portfolio links
-            portfolio_links = await self.portfolio_service.get_matching_portfolio(
-                job.description, job.skills
-            )
+            if portfolio_links is None:
+                with stage("email_generator", "portfolio"):
+                    portfolio_links = await self.portfolio_service.get_matching_portfolio(
+                        job.description, job.skills
+                    )
             
-            # Format portfolio links for prompt
-            portfolio_text = "\n".join([f"- {link}" for link in portfolio_links])
-            if not portfolio_text:
-                portfolio_text = "- No specific portfolio links available"
+            inputs = self._prompt_inputs(job, portfolio_links)
+            cache_key = LLMResponseCache.make_key(self.model_name, inputs)
+            cached = False
+            fallback = False
             
             # Generate email using LLM
             try:
-                result = await self.chain.arun(
-                    job_title=job.title,
-                    company=job.company,
-                    skills=", ".join(job.skills),
-                    experience=job.experience,
-                    description=job.description,
-                    portfolio_links=portfolio_text
-                )
+                result = None
+                if not bypass_cache:
+                    with stage("email_generator", "cache_lookup"):
+                        result = await asyncio.to_thread(self.response_cache.get, cache_key)
+                cached = result is not None
+                if not cached:
+                    prompt = self.email_prompt.format(**inputs)
+                    LLM_PROMPT_CHARS.observe(len(prompt), kind="email")
+                    with stage("email_generator", "llm"):
+                        result = await self.llm.complete(prompt)
+                    LLM_COMPLETION_CHARS.observe(len(result), kind="email")
                 
                 # Parse the result
-                lines = result.strip().split('\n')
-                subject = ""
-                email_content = ""
-                
-                for i, line in enumerate(lines):
-                    if line.startswith("SUBJECT:"):
-                        subject = line.replace("SUBJECT:", "").strip()
-                    elif line.startswith("EMAIL:"):
-                        email_content = "\n".join(lines[i+1:]).strip()
-                        break
+                with stage("email_generator", "parse"):
+                    subject, email_content = self._parse_email(result)
                 
                 # Fallback if parsing fails
                 if not subject or not email_content:
+                    if strict:
+                        raise ValueError("Could not parse SUBJECT/EMAIL from LLM response")
+                    cached = False
+                    fallback = True
                     subject, email_content = self._generate_fallback_email(job)
+                elif not cached and not bypass_cache:
+                    await asyncio.to_thread(self.response_cache.put, cache_key, self.model_name, result)
                 
             except Exception as e:
+                if strict:
+                    raise
                 # Fallback to template-based generation
+                cached = False
+                fallback = True
                 subject, email_content = self._generate_fallback_email(job)
             
             # Create email data
@@ -103,13 +182,22 @@ class EmailGeneratorService:
                 content=email_content,
                 jobListing=job,
                 portfolioLinks=portfolio_links,
-                timestamp=datetime.now().isoformat()
+                timestamp=datetime.now().isoformat(),
+                cached=cached,
+                fallback=fallback
             )
             
+            if fallback:
+                self.llm.record_fallback("email")
+            EMAILS.inc(outcome="fallback" if fallback else "cached" if cached else "generated")
             return email_data
             
         except Exception as e:
+            if strict:
+                raise
             # Return fallback email
+            self.llm.record_fallback("email")
+            EMAILS.inc(outcome="fallback")
             subject, email_content = self._generate_fallback_email(job)
             
             return GeneratedEmailData(
@@ -118,9 +206,169 @@ class EmailGeneratorService:
                 content=email_content,
                 jobListing=job,
                 portfolioLinks=[],
-                timestamp=datetime.now().isoformat()
+                timestamp=datetime.now().isoformat(),
+                fallback=True
             )
 
+    async def generate_emails(self, jobs: List[JobListing], user_id: str,
+                              concurrency: int = EMAIL_BATCH_CONCURRENCY,
+                              bypass_cache: bool = False) -> AsyncIterator[BatchEmailResult]:
+        """Generate emails for many jobs, yielding each result as soon as it finishes"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        # Match portfolio links for the whole batch in one embedding pass
+        BATCH_SIZE.observe(len(jobs), operation="email_batch")
+        with stage("email_generator", "portfolio_batch"):
+            all_links = await self.portfolio_service.get_matching_portfolio_batch(
+                [(job.description, job.skills) for job in jobs]
+            )
+
+        async def generate_one(index: int, job: JobListing) -> BatchEmailResult:
+            async with semaphore:
+                try:
+                    email = await self.generate_email(
+                        job, user_id, strict=True, bypass_cache=bypass_cache,
+                        portfolio_links=all_links[index]
+                    )
+                    return BatchEmailResult(index=index, jobId=job.id, email=email)
+                except Exception as e:
+                    return BatchEmailResult(index=index, jobId=job.id, error=str(e))
+
+        tasks = [asyncio.create_task(generate_one(i, job)) for i, job in enumerate(jobs)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding LLM calls if the client went away
+            for task in tasks:
+                task.cancel()
+
+    async def stream_email(self, job: JobListing, user_id: str,
+                           bypass_cache: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+        """Generate an email token by token, yielding (event, data) pairs
+
+        Events are "subject" once the subject line is complete, "content" for each
+        body delta, "fallback" if the stream fails and "done" with the final email.
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        token_count = 0
+        parser = EmailStreamParser()
+        fallback = False
+        portfolio_links: List[str] = []
+        cached_result = None
+        
+        try:
+            # Inside the try, so a portfolio or cache error still ends in the fallback
+            with stage("email_generator", "portfolio"):
+                portfolio_links = await self.portfolio_service.get_matching_portfolio(
+                    job.description, job.skills
+                )
+            inputs = self._prompt_inputs(job, portfolio_links)
+            cache_key = LLMResponseCache.make_key(self.model_name, inputs)
+            if not bypass_cache:
+                cached_result = await asyncio.to_thread(self.response_cache.get, cache_key)
+            
+            if cached_result is not None:
+                # Replay the cached completion as a single delta
+                first_token_at = time.perf_counter()
+                for event, text in parser.feed(cached_result):
+                    yield event, {"text": text}
+            else:
+                completion = []
+                prompt = self.email_prompt.format(**inputs)
+                LLM_PROMPT_CHARS.observe(len(prompt), kind="email_stream")
+                async for token in self.llm.stream(prompt):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        EMAIL_TTFT_SECONDS.observe(first_token_at - started)
+                    token_count += 1
+                    completion.append(token)
+                    for event, text in parser.feed(token):
+                        yield event, {"text": text}
+            
+            subject, email_content = parser.finish()
+            if not subject or not email_content:
+                raise ValueError("Could not parse SUBJECT/EMAIL from LLM stream")
+            if cached_result is None:
+                LLM_COMPLETION_CHARS.observe(sum(len(token) for token in completion), kind="email_stream")
+                EMAIL_STREAM_TOKENS.observe(token_count)
+                if not bypass_cache:
+                    await asyncio.to_thread(
+                        self.response_cache.put, cache_key, self.model_name, "".join(completion)
+                    )
+        except Exception as e:
+            # Keep the template fallback when the stream errors mid-way
+            fallback = True
+            cached_result = None
+            self.llm.record_fallback("email_stream")
+            subject, email_content = self._generate_fallback_email(job)
+            yield "fallback", {"subject": subject, "content": email_content, "error": str(e)}
+        
+        email_data = GeneratedEmailData(
+            id=str(uuid.uuid4()),
+            subject=subject,
+            content=email_content,
+            jobListing=job,
+            portfolioLinks=portfolio_links,
+            timestamp=datetime.now().isoformat(),
+            cached=cached_result is not None,
+            fallback=fallback
+        )
+        
+        finished = time.perf_counter()
+        STAGE_SECONDS.observe(finished - started, service="email_generator", stage="stream")
+        EMAILS.inc(outcome="fallback" if fallback else "cached" if email_data.cached else "generated")
+        yield "done", {
+            "email": email_data.dict(),
+            "fallback": fallback,
+            "metrics": {
+                "ttftMs": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                "totalMs": round((finished - started) * 1000, 1),
+                "tokens": token_count
+            }
+        }
+
+    def purge_cache(self) -> int:
+        return self.response_cache.purge()
+
+    def cache_stats(self) -> Dict:
+        return self.response_cache.stats()
+
+    def close(self) -> None:
+        self.response_cache.close()
+
+    def _prompt_inputs(self, job: JobListing, portfolio_links: List[str]) -> Dict[str, str]:
+        """Build the email prompt variables for a job"""
+        # Format portfolio links for prompt
+        portfolio_text = "\n".join([f"- {link}" for link in portfolio_links])
+        if not portfolio_text:
+            portfolio_text = "- No specific portfolio links available"
+        
+        return {
+            "job_title": job.title,
+            "company": job.company,
+            "skills": ", ".join(job.skills),
+            "experience": job.experience,
+            "description": job.description,
+            "portfolio_links": portfolio_text
+        }
+
+    def _parse_email(self, result: str) -> tuple:
+        """Split an LLM completion into subject and body"""
+        lines = result.strip().split('\n')
+        subject = ""
+        email_content = ""
+        
+        for i, line in enumerate(lines):
+            if line.startswith("SUBJECT:"):
+                subject = line.replace("SUBJECT:", "").strip()
+            elif line.startswith("EMAIL:"):
+                email_content = "\n".join(lines[i+1:]).strip()
+                break
+        
+        return subject, email_content
+
     def _generate_fallback_email(self, job: JobListing) -> tuple:
         """Generate a fallback email using templates"""
         subject = f"Solve Your {job.title} Hiring Challenge - Atliq Can Help"
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import base64
+import os
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+# Also an entry point, so load the environment before services read it
+load_dotenv()
+
+from models.schemas import EmbedRequest
+from services.metrics import metrics, stage, BATCH_SIZE
+from services.model_registry import EMBEDDING_MODEL_NAME, load_sentence_transformer
+
+# Embedding sidecar: one model process shared by every API worker
+EMBEDDING_SERVICE_HOST = os.getenv("EMBEDDING_SERVICE_HOST", "127.0.0.1")
+EMBEDDING_SERVICE_PORT = int(os.getenv("EMBEDDING_SERVICE_PORT", "8001"))
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "30"))
+
+# Concurrent requests are merged into one encode call of up to this many texts
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "256"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+EMBED_REQUESTS_MERGED = metrics.histogram(
+    "embedding_requests_per_batch", "Sidecar requests merged into one encode call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+def encode_matrix(matrix: np.ndarray) -> Dict:
+    """float32 matrix as base64, several times smaller and faster than JSON floats"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return {"shape": list(matrix.shape), "data": base64.b64encode(matrix.tobytes()).decode("ascii")}
+
+
+def decode_matrix(payload: Dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+
+class EmbeddingClient:
+    """Stand-in for SentenceTransformer.encode that calls the embedding sidecar"""
+
+    def __init__(self, url: str, timeout: float = EMBEDDING_SERVICE_TIMEOUT):
+        self.url = url.rstrip("/")
+        self._client = httpx.Client(base_url=self.url, timeout=timeout)
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False) -> np.ndarray:
+        response = self._client.post(
+            "/embed", json={"texts": list(texts), "normalize": normalize_embeddings, "batchSize": batch_size}
+        )
+        response.raise_for_status()
+        return decode_matrix(response.json())
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class EmbeddingBatcher:
+    """Merges concurrent embed requests into single encode calls on one model"""
+
+    def __init__(self, model, max_batch: int = EMBEDDING_MAX_BATCH, wait_ms: float = EMBEDDING_BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def embed(self, request: EmbedRequest) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0].texts)
+            deadline = loop.time() + self.wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0].texts)
+            await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: List[Tuple[EmbedRequest, asyncio.Future]]) -> None:
+        texts = [text for request, _ in batch for text in request.texts]
+        EMBED_REQUESTS_MERGED.observe(len(batch))
+        BATCH_SIZE.observe(len(texts), operation="embedding_sidecar")
+        try:
+            with stage("embedding_service", "encode"):
+                # Normalization is per row, so it is applied per request afterwards
+                matrix = await asyncio.to_thread(
+                    self.model.encode, texts, batch_size=max(request.batchSize for request, _ in batch),
+                    normalize_embeddings=False, show_progress_bar=False
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        matrix = np.asarray(matrix, dtype=np.float32)
+        offset = 0
+        for request, future in batch:
+            rows = matrix[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            if request.normalize:
+                norms = np.linalg.norm(rows, axis=1, keepdims=True)
+                rows = rows / np.where(norms == 0, 1, norms)
+            if not future.done():
+                future.set_result(rows)
+
+
+def create_app(loader: Callable[[], object] = load_sentence_transformer):
+    """Sidecar app holding the only copy of the embedding model"""
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse
+
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Load before accepting traffic, so workers never see a cold model
+        model = await asyncio.to_thread(loader)
+        state["batcher"] = EmbeddingBatcher(model)
+        state["batcher"].start()
+        yield
+        await state["batcher"].stop()
+
+    app = FastAPI(title="Outreach Pro Embeddings", lifespan=lifespan)
+
+    @app.post("/embed")
+    async def embed(request: EmbedRequest):
+        """Embed texts with the shared model"""
+        if not request.texts:
+            return encode_matrix(np.zeros((0, 0), dtype=np.float32))
+        try:
+            return encode_matrix(await state["batcher"].embed(request))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to embed: {str(e)}")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "model": EMBEDDING_MODEL_NAME}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics_endpoint():
+        return metrics.render()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the embedding model to every API worker")
+    parser.add_argument("--host", default=EMBEDDING_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=EMBEDDING_SERVICE_PORT)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,517 @@
-from typing import List, Dict
-from models.schemas import GeneratedEmailData
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+from sqlalchemy import Float, and_, or_, text
+from config.database import SessionLocal, EmailHistory, FailedEmailHistory, HistoryVersion, HISTORY_FTS_ENABLED
+from models.schemas import GeneratedEmailData, HistoryPage
+from services.metrics import metrics, stage, BATCH_SIZE, CACHE_EVENTS
 import json
 
+logger = logging.getLogger(__name__)
+
+HISTORY_WRITE_FAILURES = metrics.counter(
+    "history_write_failures", "Queued history rows that failed to insert, by where they ended up", ["outcome"]
+)
+
+# Default and maximum page sizes for /api/history
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "500"))
+
+# Write-behind queue: flush when a batch fills or the interval passes
+HISTORY_FLUSH_BATCH_SIZE = int(os.getenv("HISTORY_FLUSH_BATCH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+
+# Serialized responses kept per user, validated against HistoryVersion.
+# Bodies are bounded in total size; one larger than the entry cap is not cached.
+HISTORY_RESPONSE_CACHE_USERS = int(os.getenv("HISTORY_RESPONSE_CACHE_USERS", "1000"))
+HISTORY_RESPONSE_CACHE_BYTES = int(os.getenv("HISTORY_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+HISTORY_RESPONSE_CACHE_ENTRY_BYTES = int(os.getenv("HISTORY_RESPONSE_CACHE_ENTRY_BYTES", str(4 * 1024 * 1024)))
+HISTORY_RESPONSE_CACHE_VARIANTS = 16
+
+# Columns needed to serialize an email without building ORM objects
+_RESPONSE_COLUMNS = (
+    EmailHistory.id, EmailHistory.subject, EmailHistory.content, EmailHistory.job_data,
+    EmailHistory.portfolio_links, EmailHistory.created_at, EmailHistory.cached,
+    EmailHistory.fallback
+)
+
+# Results per page for /api/history/search
+HISTORY_SEARCH_PAGE_SIZE = int(os.getenv("HISTORY_SEARCH_PAGE_SIZE", "20"))
+HISTORY_SEARCH_MAX_PAGE_SIZE = 100
+# Only this many of the newest matches are ranked. bm25 scores every match it
+# sees, so ranking a broad term across a large history would cost O(matches).
+HISTORY_SEARCH_RANK_WINDOW = int(os.getenv("HISTORY_SEARCH_RANK_WINDOW", "1000"))
+
+# Columns user queries are matched against (everything but owner)
+_SEARCH_COLUMNS = "subject body title company skills"
+# bm25 weights for owner, subject, body, title, company, skills
+_SEARCH_WEIGHTS = "0.0, 5.0, 1.0, 4.0, 4.0, 3.0"
+_SEARCH_SQL = text(f"""
+    SELECT h.id, h.subject, h.content, h.job_data, h.portfolio_links, h.created_at, h.cached, h.fallback, hits.score
+    FROM (
+        SELECT rowid, bm25(email_history_fts, {_SEARCH_WEIGHTS}) AS score
+        FROM email_history_fts
+        WHERE email_history_fts MATCH :match AND rowid >= :floor
+        ORDER BY score
+        LIMIT :limit OFFSET :offset
+    ) AS hits
+    JOIN email_history_search_keys AS k ON k.search_id = hits.rowid
+    JOIN email_history AS h ON h.id = k.email_id
+    ORDER BY hits.score
+""").columns(*_RESPONSE_COLUMNS, score=Float)
+# Lowest search key inside the rank window; matches are walked newest first and stop early
+_SEARCH_FLOOR_SQL = text("""
+    SELECT rowid FROM email_history_fts WHERE email_history_fts MATCH :match
+    ORDER BY rowid DESC LIMIT 1 OFFSET :window
+""")
+
+# Optional JobListing fields that older stored rows may lack
+_JOB_LISTING_DEFAULTS = {"duplicateOf": None}
+
 class HistoryService:
     def __init__(self):
-        # In-memory storage (replace with database in production)
-        self.user_histories = {}
+        # Email history is stored in the EmailHistory table
+        self.session_factory = SessionLocal
+        
+        # Write-behind state, created by start() on the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._written: Optional[asyncio.Condition] = None
+        self._pending: Dict[str, int] = defaultdict(int)
+        
+        # user_id -> (history version, {variant: serialized body}), LRU by user
+        self._responses: "OrderedDict[str, Tuple[int, Dict[str, bytes]]]" = OrderedDict()
+        self._response_bytes = 0
+
+    def start(self) -> None:
+        """Start the background writer that batches history inserts"""
+        self._queue = asyncio.Queue(maxsize=HISTORY_QUEUE_MAX)
+        self._flush_now = asyncio.Event()
+        self._written = asyncio.Condition()
+        self._writer = asyncio.create_task(self._run_writer())
+
+    async def stop(self) -> None:
+        """Flush every queued record and stop the writer"""
+        if self._writer is None:
+            return
+        self._flush_now.set()
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
 
     async def save_email(self, user_id: str, email_data: GeneratedEmailData) -> None:
         """Save email to user's history"""
-        if user_id not in self.user_histories:
-            self.user_histories[user_id] = []
+        await self.save_emails(user_id, [email_data])
+
+    async def save_emails(self, user_id: str, emails: List[GeneratedEmailData]) -> None:
+        """Queue emails for the next batched write
+
+        Waits (backpressure) while the queue is full. Without a running writer
+        the rows are written immediately.
+        """
+        if not emails:
+            return
         
-        # Convert to dict for storage
-        email_dict = email_data.dict() if hasattr(email_data, 'dict') else email_data
+        rows = [self._to_row(user_id, email) for email in emails]
+        self._drop_responses(user_id)
+        if self._writer is None:
+            with stage("history", "insert"):
+                await asyncio.to_thread(self._insert_rows, rows)
+            return
         
-        self.user_histories[user_id].append(email_dict)
+        for row in rows:
+            self._pending[user_id] += 1
+            await self._queue.put(row)
 
     async def get_user_history(self, user_id: str) -> List[GeneratedEmailData]:
-        """Get user's email history"""
-        if user_id not in self.user_histories:
-            return []
+        """Get user's full email history, newest first"""
+        await self._wait_for_pending(user_id)
+        with stage("history", "query"):
+            return await asyncio.to_thread(self._query_page, user_id, None, None)
+
+    async def get_history_page(self, user_id: str, limit: int = HISTORY_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> HistoryPage:
+        """Get one page of user's history using keyset pagination"""
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        after = self._decode_cursor(cursor) if cursor else None
+        
+        await self._wait_for_pending(user_id)
+        
+        # Fetch one extra row to know whether another page exists
+        with stage("history", "query"):
+            rows = await asyncio.to_thread(self._query_page, user_id, limit + 1, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self._encode_cursor(self._parse_timestamp(last.timestamp), last.id)
+        
+        return HistoryPage(emails=rows, nextCursor=next_cursor)
+
+    async def get_history_response(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                                   if_none_match: Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        """Serialized /api/history body and its strong ETag
+
+        The full history, or one keyset page when limit or cursor is given.
+        Bodies are cached until the user's history version changes; the body
+        is None when if_none_match already names the current ETag.
+        """
+        paged = limit is not None or cursor is not None
+        after = None
+        if paged:
+            limit = max(1, min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE))
+            after = self._decode_cursor(cursor) if cursor else None
+        variant = f"{limit}|{cursor}" if paged else "all"
+        
+        await self._wait_for_pending(user_id)
+        # One primary-key read validates the cache, even against other workers' writes
+        version = await asyncio.to_thread(self._get_version, user_id)
+        etag = self._etag(user_id, version, variant)
+        if self._etag_matches(if_none_match, etag):
+            CACHE_EVENTS.inc(cache="history_response", result="not_modified")
+            return etag, None
+        
+        entry = self._responses.get(user_id)
+        if entry is not None and entry[0] == version and variant in entry[1]:
+            self._responses.move_to_end(user_id)
+            CACHE_EVENTS.inc(cache="history_response", result="hit")
+            return etag, entry[1][variant]
         
-        # Convert back to GeneratedEmailData objects
-        history = []
-        for email_dict in self.user_histories[user_id]:
-            if isinstance(email_dict, dict):
-                history.append(GeneratedEmailData(**email_dict))
-            else:
-                history.append(email_dict)
+        CACHE_EVENTS.inc(cache="history_response", result="miss")
+        with stage("history", "serialize"):
+            body = await asyncio.to_thread(self._serialize, user_id, limit if paged else None, after)
+        
+        self._cache_response(user_id, version, variant, body)
+        return etag, body
+
+    def _cache_response(self, user_id: str, version: int, variant: str, body: bytes) -> None:
+        """Keep a serialized body, evicting least recently used users past the byte budget"""
+        if len(body) > HISTORY_RESPONSE_CACHE_ENTRY_BYTES:
+            return
+        entry = self._responses.get(user_id)
+        if entry is None or entry[0] != version or len(entry[1]) >= HISTORY_RESPONSE_CACHE_VARIANTS:
+            self._drop_responses(user_id)
+            entry = (version, {})
+        self._response_bytes += len(body) - len(entry[1].get(variant, b""))
+        entry[1][variant] = body
+        self._responses[user_id] = entry
+        self._responses.move_to_end(user_id)
+        while self._responses and (
+            len(self._responses) > HISTORY_RESPONSE_CACHE_USERS or self._response_bytes > HISTORY_RESPONSE_CACHE_BYTES
+        ):
+            _, (_, bodies) = self._responses.popitem(last=False)
+            self._response_bytes -= sum(len(cached) for cached in bodies.values())
+
+    def _drop_responses(self, user_id: str) -> None:
+        entry = self._responses.pop(user_id, None)
+        if entry is not None:
+            self._response_bytes -= sum(len(cached) for cached in entry[1].values())
+
+    async def search(self, user_id: str, query: str, limit: int = HISTORY_SEARCH_PAGE_SIZE,
+                     offset: int = 0) -> Dict:
+        """Ranked full-text search over subject, content and the job's title, company and skills
+
+        All terms must match: words exactly, except the last as a prefix, and
+        "quoted text" as a phrase. Uses the FTS5 index on SQLite, ranking the
+        newest HISTORY_SEARCH_RANK_WINDOW matches, and unranked LIKE elsewhere.
+        """
+        limit = max(1, min(limit, HISTORY_SEARCH_MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        terms = self._search_terms(query)
+        if not terms:
+            raise ValueError("Search query has no searchable words")
         
-        # Sort by timestamp (newest first)
-        history.sort(key=lambda x: x.timestamp, reverse=True)
+        await self._wait_for_pending(user_id)
+        with stage("history", "search"):
+            # One extra row tells whether another page exists
+            rows = await asyncio.to_thread(self._search_rows, user_id, terms, limit + 1, offset)
         
-        return history
+        emails = []
+        for row in rows[:limit]:
+            score = getattr(row, "score", None)
+            # bm25 is lower-is-better and negative; report higher-is-better
+            emails.append({**self._row_dict(row), "score": round(-score, 4) if score is not None else None})
+        return {"emails": emails, "nextOffset": offset + limit if len(rows) > limit else None}
 
     async def delete_email(self, user_id: str, email_id: str) -> bool:
         """Delete email from user's history"""
-        if user_id not in self.user_histories:
-            return False
+        await self._wait_for_pending(user_id)
+        self._drop_responses(user_id)
+        with stage("history", "delete"):
+            return await asyncio.to_thread(self._delete_row, user_id, email_id)
+
+    async def _wait_for_pending(self, user_id: str) -> None:
+        """Read-your-writes: flush and wait until this user's queued rows are stored"""
+        if self._writer is None or not self._pending.get(user_id):
+            return
+        self._flush_now.set()
+        with stage("history", "read_your_writes_wait"):
+            async with self._written:
+                await self._written.wait_for(lambda: not self._pending.get(user_id))
+
+    async def _run_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + HISTORY_FLUSH_INTERVAL
+            
+            while len(batch) < HISTORY_FLUSH_BATCH_SIZE:
+                if self._flush_now.is_set():
+                    # A reader is waiting: take what is queued and write now
+                    if self._queue.empty():
+                        break
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Rows expire once committed, so note their owners first
+            user_ids = [row.user_id for row in batch]
+            BATCH_SIZE.observe(len(batch), operation="history_flush")
+            try:
+                with stage("history", "flush"):
+                    await asyncio.to_thread(self._insert_rows, batch)
+            except Exception:
+                # One bad row must not lose the whole batch
+                await asyncio.to_thread(self._insert_rows_individually, batch)
+            finally:
+                for user_id in user_ids:
+                    self._pending[user_id] -= 1
+                    if self._pending[user_id] <= 0:
+                        del self._pending[user_id]
+                    self._queue.task_done()
+                if self._queue.empty():
+                    self._flush_now.clear()
+                async with self._written:
+                    self._written.notify_all()
+
+    def _insert_rows(self, rows: List[EmailHistory]) -> None:
+        with self.session_factory() as db:
+            self._bump_versions(db, {row.user_id for row in rows})
+            db.add_all(rows)
+            db.commit()
+
+    def _insert_rows_individually(self, rows: List[EmailHistory]) -> None:
+        # The caller was already told the email was saved, so a row that still
+        # fails is dead-lettered rather than dropped
+        for row in rows:
+            payload = self._row_payload(row)
+            try:
+                self._insert_rows([row])
+            except Exception as e:
+                logger.exception("History write failed for email %s of user %s", payload["id"], payload["user_id"])
+                self._dead_letter(payload, e)
+
+    def _row_payload(self, row: EmailHistory) -> Dict:
+        payload = {column.name: getattr(row, column.name) for column in EmailHistory.__table__.columns}
+        if isinstance(payload["created_at"], datetime):
+            payload["created_at"] = payload["created_at"].isoformat()
+        return payload
+
+    def _dead_letter(self, payload: Dict, error: Exception) -> None:
+        try:
+            with self.session_factory() as db:
+                db.add(FailedEmailHistory(
+                    email_id=payload["id"],
+                    user_id=payload["user_id"],
+                    payload=json.dumps(payload),
+                    error=f"{type(error).__name__}: {error}"
+                ))
+                db.commit()
+        except Exception:
+            # The database itself is failing; the log is the last copy of the row
+            HISTORY_WRITE_FAILURES.inc(outcome="lost")
+            logger.exception("Could not dead-letter history row: %s", json.dumps(payload))
+            return
+        HISTORY_WRITE_FAILURES.inc(outcome="dead_lettered")
+
+    def _query_page(self, user_id: str, limit: Optional[int],
+                    after: Optional[Tuple[datetime, str]]) -> List[GeneratedEmailData]:
+        with self.session_factory() as db:
+            query = self._history_query(db.query(EmailHistory), user_id, limit, after)
+            return [self._from_row(row) for row in query]
+
+    def _history_query(self, query, user_id: str, limit: Optional[int], after: Optional[Tuple[datetime, str]]):
+        query = query.filter(EmailHistory.user_id == user_id)
+        if after is not None:
+            created_at, email_id = after
+            query = query.filter(or_(
+                EmailHistory.created_at < created_at,
+                and_(EmailHistory.created_at == created_at, EmailHistory.id < email_id)
+            ))
+        query = query.order_by(EmailHistory.created_at.desc(), EmailHistory.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def _serialize(self, user_id: str, limit: Optional[int], after: Optional[Tuple[datetime, str]]) -> bytes:
+        """Encode the response straight from columns, skipping model validation"""
+        with self.session_factory() as db:
+            query = self._history_query(
+                db.query(*_RESPONSE_COLUMNS), user_id, limit + 1 if limit is not None else None, after
+            )
+            rows = query.all()
+        
+        if limit is None:
+            return orjson.dumps({"emails": [self._row_dict(row) for row in rows]})
         
-        original_length = len(self.user_histories[user_id])
-        self.user_histories[user_id] = [
-            email for email in self.user_histories[user_id] 
-            if email.get('id') != email_id
-        ]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1].created_at, rows[-1].id)
+        return orjson.dumps({"emails": [self._row_dict(row) for row in rows], "nextCursor": next_cursor})
+
+    def _row_dict(self, row) -> Dict:
+        # Same shape as GeneratedEmailData
+        return {
+            "id": row.id,
+            "subject": row.subject,
+            "content": row.content,
+            "jobListing": {**_JOB_LISTING_DEFAULTS, **orjson.loads(row.job_data)},
+            "portfolioLinks": orjson.loads(row.portfolio_links or "[]"),
+            "timestamp": row.created_at.isoformat(),
+            "cached": bool(row.cached),
+            "fallback": bool(row.fallback)
+        }
+
+    def _search_terms(self, query: str) -> List[Tuple[str, bool]]:
+        """(lowercased words, is_phrase) for each quoted phrase or bare word"""
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+            words = re.findall(r"\w+", (phrase or word).lower())
+            if words:
+                terms.append((" ".join(words), bool(phrase)))
+        return terms
+
+    def _search_rows(self, user_id: str, terms: List[Tuple[str, bool]], limit: int, offset: int) -> List:
+        with self.session_factory() as db:
+            if HISTORY_FTS_ENABLED:
+                # The owner phrase makes FTS5 intersect with this user's postings
+                owner = user_id.replace('"', '""')
+                phrases = [f'"{words}"' for words, _ in terms]
+                # Only the last bare word is still being typed; prefix-expanding
+                # every word costs a term-range scan each
+                if not terms[-1][1]:
+                    phrases[-1] += "*"
+                # Terms are scoped to the content columns; unscoped they would
+                # also match the owner column's user id tokens
+                match = f'owner:"{owner}" AND {{{_SEARCH_COLUMNS}}} : ({" AND ".join(phrases)})'
+                floor = db.execute(
+                    _SEARCH_FLOOR_SQL, {"match": match, "window": max(HISTORY_SEARCH_RANK_WINDOW, offset + limit) - 1}
+                ).scalar()
+                return db.execute(
+                    _SEARCH_SQL, {"match": match, "floor": floor or 0, "limit": limit, "offset": offset}
+                ).all()
+            
+            query = db.query(*_RESPONSE_COLUMNS).filter(EmailHistory.user_id == user_id)
+            for words, _ in terms:
+                pattern = "%" + words.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                query = query.filter(or_(
+                    EmailHistory.subject.ilike(pattern, escape="\\"),
+                    EmailHistory.content.ilike(pattern, escape="\\"),
+                    EmailHistory.job_data.ilike(pattern, escape="\\")
+                ))
+            query = query.order_by(EmailHistory.created_at.desc(), EmailHistory.id.desc())
+            return query.offset(offset).limit(limit).all()
+
+    def _get_version(self, user_id: str) -> int:
+        with self.session_factory() as db:
+            row = db.get(HistoryVersion, user_id)
+            return row.version if row is not None else 0
+
+    def _bump_versions(self, db, user_ids: Iterable[str]) -> None:
+        """Advance history versions inside the write's own transaction"""
+        for user_id in user_ids:
+            updated = db.query(HistoryVersion).filter(HistoryVersion.user_id == user_id).update(
+                {HistoryVersion.version: HistoryVersion.version + 1}, synchronize_session=False
+            )
+            if not updated:
+                db.add(HistoryVersion(user_id=user_id, version=1))
+
+    def _etag(self, user_id: str, version: int, variant: str) -> str:
+        digest = hashlib.sha256(f"{user_id}|{version}|{variant}".encode("utf-8")).hexdigest()[:32]
+        return f'"{digest}"'
+
+    def _etag_matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        # If-None-Match uses weak comparison, so a W/ prefix still matches
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+    def _delete_row(self, user_id: str, email_id: str) -> bool:
+        with self.session_factory() as db:
+            deleted = db.query(EmailHistory).filter(
+                EmailHistory.user_id == user_id,
+                EmailHistory.id == email_id
+            ).delete()
+            if deleted:
+                self._bump_versions(db, [user_id])
+            db.commit()
+        return deleted > 0
+
+    def _to_row(self, user_id: str, email_data) -> EmailHistory:
+        # Accept models or plain dicts
+        email_dict = email_data.dict() if hasattr(email_data, 'dict') else email_data
         
-        return len(self.user_histories[user_id]) < original_length
\ No newline at end of file
+        return EmailHistory(
+            id=email_dict["id"],
+            user_id=user_id,
+            subject=email_dict["subject"],
+            content=email_dict["content"],
+            job_data=json.dumps(email_dict["jobListing"]),
+            portfolio_links=json.dumps(email_dict["portfolioLinks"]),
+            cached=email_dict.get("cached", False),
+            fallback=email_dict.get("fallback", False),
+            created_at=self._parse_timestamp(email_dict.get("timestamp"))
+        )
+
+    def _from_row(self, row: EmailHistory) -> GeneratedEmailData:
+        return GeneratedEmailData(
+            id=row.id,
+            subject=row.subject,
+            content=row.content,
+            jobListing=json.loads(row.job_data),
+            portfolioLinks=json.loads(row.portfolio_links or "[]"),
+            timestamp=row.created_at.isoformat(),
+            cached=bool(row.cached),
+            fallback=bool(row.fallback)
+        )
+
+    def _parse_timestamp(self, timestamp: Optional[str]) -> datetime:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return datetime.now()
+
+    def _encode_cursor(self, created_at: datetime, email_id: str) -> str:
+        raw = f"{created_at.isoformat()}|{email_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def _decode_cursor(self, cursor: str) -> Tuple[datetime, str]:
+        try:
+            created_at, email_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+            return datetime.fromisoformat(created_at), email_id
+        except Exception:
+            raise ValueError("Invalid history cursor")
@@ -0,0 +1,123 @@
+import re
+from collections import Counter
+from typing import List, Tuple
+from bs4 import BeautifulSoup, Tag
+
+# lxml is several times faster than html.parser; fall back when it is missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+NOISE_TAGS = ["script", "style", "noscript", "svg", "nav", "footer", "header", "form", "iframe"]
+
+# Repeated siblings whose text falls in this range look like job cards/rows
+MIN_BLOCK_CHARS = 20
+MAX_BLOCK_CHARS = 4000
+MIN_REPEATS = 3
+
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def parse_html(content) -> BeautifulSoup:
+    soup = BeautifulSoup(content, HTML_PARSER)
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    return soup
+
+
+def element_text(element) -> str:
+    text = element.get_text("\n")
+    text = _WHITESPACE.sub(" ", text)
+    return _BLANK_LINES.sub("\n", text).strip()
+
+
+def _signature(element: Tag) -> Tuple[str, Tuple[str, ...]]:
+    return element.name, tuple(sorted(element.get("class") or []))
+
+
+def find_job_blocks(soup: BeautifulSoup) -> List[Tuple[Tag, str]]:
+    """Split a page into job-sized (element, text) blocks using repeated sibling structure
+
+    Career pages render postings as lists, table rows or cards: one container
+    with many children sharing a tag and class. Every such group is collected,
+    skipping groups nested inside an already chosen one.
+    """
+    groups = []
+    for container in soup.find_all(True):
+        children = [child for child in container.children if isinstance(child, Tag)]
+        if len(children) < MIN_REPEATS:
+            continue
+        signature, repeats = Counter(_signature(child) for child in children).most_common(1)[0]
+        if repeats < MIN_REPEATS:
+            continue
+        blocks = [(child, element_text(child)) for child in children if _signature(child) == signature]
+        blocks = [(child, text) for child, text in blocks if MIN_BLOCK_CHARS <= len(text) <= MAX_BLOCK_CHARS]
+        if len(blocks) >= MIN_REPEATS:
+            groups.append((container, blocks))
+
+    # Prefer the outermost groups so a card's inner bullet list is not split out
+    chosen = []
+    chosen_ids = set()
+    for container, blocks in groups:
+        if any(id(parent) in chosen_ids for parent in container.parents):
+            continue
+        chosen.extend(blocks)
+        chosen_ids.add(id(container))
+    return chosen
+
+
+def pack_chunks(blocks: List[str], max_chars: int) -> List[str]:
+    """Greedily pack blocks into chunks of at most max_chars"""
+    chunks = []
+    current = []
+    size = 0
+    for block in blocks:
+        # Oversized blocks are split on line boundaries
+        pieces = [block] if len(block) <= max_chars else _split_text(block, max_chars)
+        for piece in pieces:
+            if current and size + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    pieces = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def prepare_chunks(content, max_chars: int) -> List[str]:
+    """Parse a page and return LLM-sized chunks covering its job blocks and remaining text
+
+    Repeated structure is not always the postings (benefit cards, office
+    lists), so text outside the chosen blocks, including oversized blocks,
+    is kept as well. Pages without repeated structure are chunked whole.
+    This is a plain function so it can run in a thread or process pool.
+    """
+    soup = parse_html(content)
+    blocks = find_job_blocks(soup)
+    texts = [text for _, text in blocks]
+    for element, _ in blocks:
+        element.extract()
+    remainder = element_text(soup)
+    if len(remainder) >= MIN_BLOCK_CHARS or (remainder and not texts):
+        texts.append(remainder)
+    return pack_chunks(texts, max_chars)
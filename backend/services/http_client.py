@@ -0,0 +1,90 @@
+import asyncio
+import os
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+# Fetch configuration
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "100"))
+FETCH_MAX_KEEPALIVE = int(os.getenv("FETCH_MAX_KEEPALIVE", "20"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))
+
+
+class PageTooLargeError(Exception):
+    pass
+
+
+class FetchedPage:
+    def __init__(self, url: str, status_code: int, content: bytes, headers: Dict[str, str]):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+
+class PageFetcher:
+    """Shared async HTTP client with connection pooling and per-host limits"""
+
+    def __init__(self):
+        self.max_bytes = FETCH_MAX_BYTES
+        self.per_host_limit = FETCH_PER_HOST_LIMIT
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': DEFAULT_USER_AGENT},
+                timeout=httpx.Timeout(FETCH_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=FETCH_MAX_CONNECTIONS,
+                    max_keepalive_connections=FETCH_MAX_KEEPALIVE
+                ),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchedPage:
+        """Fetch a page, streaming the body and aborting past the size cap"""
+        async with self._host_semaphore(url):
+            async with self.client.stream("GET", url, headers=headers) as response:
+                # 304 means the caller's cached copy is still valid
+                if response.status_code == 304:
+                    return FetchedPage(str(response.url), 304, b"", dict(response.headers))
+                response.raise_for_status()
+
+                declared = response.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise PageTooLargeError(f"Page exceeds {self.max_bytes} bytes: {url}")
+
+                chunks = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise PageTooLargeError(f"Page exceeds {self.max_bytes} bytes: {url}")
+                    chunks.append(chunk)
+
+                return FetchedPage(
+                    url=str(response.url),
+                    status_code=response.status_code,
+                    content=b"".join(chunks),
+                    headers=dict(response.headers)
+                )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
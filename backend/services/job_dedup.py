@@ -0,0 +1,196 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Near-duplicate index configuration
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "./cache/job_index.db")
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+
+# Namespace for content-addressed job ids
+JOB_ID_NAMESPACE = uuid.UUID("6f1c9a52-3d0e-4c4f-9b7a-5a2d8e1f0c33")
+
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*")
+
+# Title abbreviations folded before fingerprinting
+_TITLE_ALIASES = {
+    "sr": "senior", "jr": "junior", "snr": "senior", "eng": "engineer", "engr": "engineer",
+    "dev": "developer", "mgr": "manager", "swe": "software engineer", "ii": "2", "iii": "3",
+}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_TOKEN.findall((text or "").lower()))
+
+
+def job_id(company: str, title: str, description: str) -> str:
+    """Stable id derived from normalized company, title and description"""
+    key = "\x1f".join([_normalize(company), _normalize(title), _normalize(description)])
+    return str(uuid.uuid5(JOB_ID_NAMESPACE, key))
+
+
+def simhash(title: str, description: str) -> int:
+    """64-bit SimHash over title tokens (weighted) and description shingles"""
+    weights: Dict[str, int] = defaultdict(int)
+    title_tokens = " ".join(_TITLE_ALIASES.get(token, token) for token in _TOKEN.findall((title or "").lower()))
+    for token in title_tokens.split():
+        weights[f"t:{token}"] += 2
+    description_tokens = _TOKEN.findall((description or "").lower())
+    for i in range(max(0, len(description_tokens) - 2)):
+        weights["d:" + " ".join(description_tokens[i:i + 3])] += 1
+    if len(description_tokens) < 3:
+        for token in description_tokens:
+            weights[f"d:{token}"] += 1
+
+    vector = [0] * 64
+    for feature, weight in weights.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            vector[bit] += weight if value >> bit & 1 else -weight
+
+    fingerprint = 0
+    for bit in range(64):
+        if vector[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """SimHash index that finds listings within a small Hamming distance
+
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints
+    within max_distance must agree exactly on at least one band, so a lookup
+    only checks the same company's entries sharing a band value instead of
+    scanning every stored listing.
+
+    Entries remember the order they were first seen in, and a listing only
+    matches listings seen before it. A repost therefore points at the
+    original, and re-extracting the original never points it at the repost.
+
+    Stored fingerprints are loaded by the first sync, not on construction,
+    so a large table does not delay startup; assign syncs first if needed.
+    """
+
+    def __init__(self, path: str = JOB_INDEX_PATH, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        self._shifts = [64 * band // bands for band in range(bands)]
+        self._masks = [(1 << (64 * (band + 1) // bands - shift)) - 1 for band, shift in enumerate(self._shifts)]
+        self._fingerprints: Dict[str, Tuple[int, str]] = {}
+        self._order: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, str, int], List[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._synced_rowid = 0
+        self._loaded = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_fingerprints (
+                job_id TEXT PRIMARY KEY,
+                company TEXT,
+                fingerprint INTEGER
+            )
+        """)
+        self._conn.commit()
+
+    def sync(self) -> None:
+        """Load fingerprints other processes have persisted since the last sync"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, job_id, company, fingerprint FROM job_fingerprints WHERE rowid > ? ORDER BY rowid",
+                (self._synced_rowid,)
+            ).fetchall()
+            for rowid, stored_id, company, fingerprint in rows:
+                if stored_id not in self._fingerprints:
+                    self._insert(stored_id, _to_unsigned(fingerprint), company)
+                self._synced_rowid = rowid
+            self._loaded = True
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _keys(self, fingerprint: int, company: str) -> List[Tuple[int, str, int]]:
+        return [
+            (band, company, fingerprint >> shift & mask)
+            for band, (shift, mask) in enumerate(zip(self._shifts, self._masks))
+        ]
+
+    def _insert(self, item_id: str, fingerprint: int, company: str) -> None:
+        self._fingerprints[item_id] = (fingerprint, company)
+        self._order[item_id] = len(self._order)
+        for key in self._keys(fingerprint, company):
+            self._buckets[key].append(item_id)
+
+    def find(self, item_id: str, fingerprint: int, company: str) -> Optional[str]:
+        """Closest listing from the same company within max_distance seen before item_id
+
+        Ties go to the earliest listing, so the answer never changes once given.
+        """
+        seen_at = self._order.get(item_id, len(self._order))
+        best = None
+        best_rank = (self.max_distance + 1, 0)
+        for key in self._keys(fingerprint, company):
+            for candidate in self._buckets.get(key, ()):
+                order = self._order[candidate]
+                if order >= seen_at:
+                    continue
+                candidate_fingerprint = self._fingerprints[candidate][0]
+                rank = (bin(candidate_fingerprint ^ fingerprint).count("1"), order)
+                if rank < best_rank:
+                    best, best_rank = candidate, rank
+        return best
+
+    def assign(self, entries: List[Tuple[str, int, str]]) -> Tuple[List[Optional[str]], List[Tuple[str, int, str]]]:
+        """Add (id, fingerprint, company) entries in order and find each one's original
+
+        Returns the duplicateOf for every entry, plus the entries that were new
+        (to persist). Within one call a later entry can match an earlier one,
+        the same as adding them one at a time.
+        """
+        if not self._loaded:
+            # Stored listings come first in the order, so load them before adding
+            self.sync()
+        added = self.add_many(entries)
+        with self._lock:
+            duplicates = [self.find(item_id, fingerprint, company) for item_id, fingerprint, company in entries]
+        return duplicates, added
+
+    def add_many(self, entries: Iterable[Tuple[str, int, str]]) -> List[Tuple[str, int, str]]:
+        """Add (id, fingerprint, company) entries, returning those that were new"""
+        added = []
+        with self._lock:
+            for item_id, fingerprint, company in entries:
+                if item_id not in self._fingerprints:
+                    self._insert(item_id, fingerprint, company)
+                    added.append((item_id, fingerprint, company))
+        return added
+
+    def persist(self, entries: List[Tuple[str, int, str]]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO job_fingerprints (job_id, company, fingerprint) VALUES (?, ?, ?)",
+                [(item_id, company, _to_signed(fingerprint)) for item_id, fingerprint, company in entries]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,78 @@
+import json
+from typing import Dict, List, Optional
+
+
+class JSONObjectStream:
+    """Incrementally pulls complete objects out of JSON arrays in streamed text
+
+    Feed completion text as it arrives; every object that is an element of an
+    array (such as each entry of {"jobs": [...]}) is returned as soon as its
+    closing brace is seen. Prose around the JSON, malformed elements and a
+    truncated tail are skipped instead of failing the whole response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+        self._start_depth = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        self._buffer += text
+        buffer = self._buffer
+        objects = []
+
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                # Quotes in prose outside any JSON container are not strings
+                if self._stack:
+                    self._in_string = True
+            elif char == "{" or char == "[":
+                if char == "{" and self._start is None and self._stack and self._stack[-1] == "[":
+                    self._start = i
+                    self._start_depth = len(self._stack)
+                self._stack.append(char)
+            elif char == "}" or char == "]":
+                if self._stack:
+                    self._stack.pop()
+                if self._start is not None and len(self._stack) == self._start_depth:
+                    if char == "}":
+                        item = self._load(buffer[self._start:i + 1])
+                        if item is not None:
+                            objects.append(item)
+                    self._start = None
+            i += 1
+
+        # Keep only the element still being collected
+        if self._start is None:
+            self._buffer = ""
+            self._pos = 0
+        else:
+            self._buffer = buffer[self._start:]
+            self._pos = i - self._start
+            self._start = 0
+        return objects
+
+    def _load(self, text: str) -> Optional[Dict]:
+        try:
+            item = json.loads(text)
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
+
+
+def salvage_objects(text: str) -> List[Dict]:
+    """Every complete array element in text, for responses that fail to parse whole"""
+    return JSONObjectStream().feed(text)
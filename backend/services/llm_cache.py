@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from services.metrics import CACHE_EVENTS
+
+# LLM response cache configuration
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_cache.db")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class LLMResponseCache:
+    """Disk-backed LRU + TTL cache of LLM completions"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                completion TEXT,
+                created_at REAL,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_completions_accessed ON completions (accessed_at);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, inputs: Dict[str, str]) -> str:
+        """Hash prompt inputs with whitespace and case normalized"""
+        normalized = {
+            name: _WHITESPACE.sub(" ", str(value)).strip().lower()
+            for name, value in sorted(inputs.items())
+        }
+        payload = json.dumps({"model": model, "inputs": normalized}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                CACHE_EVENTS.inc(cache="llm_response", result="miss")
+                return None
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        CACHE_EVENTS.inc(cache="llm_response", result="hit")
+        return row[0]
+
+    def put(self, key: str, model: str, completion: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, completion, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, completion, now, now)
+            )
+            # Evict least recently used entries past the bound
+            self._conn.execute("""
+                DELETE FROM completions WHERE key IN (
+                    SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def purge(self) -> int:
+        """Remove every cached completion, returning how many were dropped"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from services.metrics import metrics, FALLBACKS
+
+# Comma-separated Ollama base URLs sharing the load
+OLLAMA_ENDPOINTS = [
+    endpoint.strip().rstrip("/")
+    for endpoint in os.getenv("OLLAMA_ENDPOINTS", "http://localhost:11434").split(",")
+    if endpoint.strip()
+]
+
+# Per-call limits
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_STREAM_IDLE_TIMEOUT = float(os.getenv("LLM_STREAM_IDLE_TIMEOUT", "30"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+
+# Circuit breaker
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+LLM_CALL_SECONDS = metrics.histogram("llm_call_duration_seconds", "LLM call time per backend", ["backend", "mode"])
+LLM_CALL_ERRORS = metrics.counter("llm_call_errors", "Failed LLM calls per backend", ["backend"])
+LLM_COALESCED = metrics.counter("llm_coalesced", "Calls served by an identical in-flight prompt")
+
+
+class LLMUnavailableError(Exception):
+    pass
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Connection errors, timeouts and 5xx count against a backend; a rejected request does not
+
+    A 4xx such as an unknown model or a bad prompt fails the same way on
+    every backend, so it neither trips the breaker nor fails over.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    """Stops sending calls to a backend after repeated failures
+
+    After reset_seconds one probe call is let through (half-open); its
+    outcome closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def acquire(self) -> None:
+        if self.state == "half_open":
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        # A cancelled probe frees the slot without deciding the outcome
+        self._probing = False
+
+
+class LLMBackend:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker()
+        self.outstanding = 0
+        self.calls = 0
+        self.errors = 0
+
+
+class LLMPool:
+    """Ollama client spread over several endpoints
+
+    Calls go to the healthy backend with the fewest outstanding requests,
+    identical concurrent prompts share one call, and failing backends are
+    skipped by a per-backend circuit breaker.
+    """
+
+    def __init__(self, model: str, endpoints: Optional[List[str]] = None):
+        self.model = model
+        self.backends = [LLMBackend(url) for url in (endpoints or OLLAMA_ENDPOINTS)]
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self.timeouts = 0
+        self.fallbacks: Counter = Counter()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=5.0),
+                limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS)
+            )
+        return self._client
+
+    def _pick(self, tried: List[LLMBackend]) -> LLMBackend:
+        candidates = [backend for backend in self.backends if backend not in tried and backend.breaker.available()]
+        if not candidates:
+            raise LLMUnavailableError("No healthy LLM backend available")
+        backend = min(candidates, key=lambda candidate: candidate.outstanding)
+        backend.breaker.acquire()
+        return backend
+
+    async def complete(self, prompt: str) -> str:
+        """Return the full completion, sharing the call with identical in-flight prompts"""
+        key = hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._complete(prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+            LLM_COALESCED.inc()
+        # A cancelled caller must not cancel the call other callers share
+        return await asyncio.shield(task)
+
+    async def _complete(self, prompt: str) -> str:
+        tried: List[LLMBackend] = []
+        error: Optional[Exception] = None
+        for _ in range(max(1, LLM_MAX_ATTEMPTS)):
+            try:
+                backend = self._pick(tried)
+            except LLMUnavailableError:
+                break
+            tried.append(backend)
+            backend.outstanding += 1
+            backend.calls += 1
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.client.post(
+                        f"{backend.base_url}/api/generate",
+                        json={"model": self.model, "prompt": prompt, "stream": False}
+                    ),
+                    LLM_TIMEOUT_SECONDS
+                )
+                response.raise_for_status()
+                data = response.json()
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                backend.breaker.record_success()
+                LLM_CALL_SECONDS.observe(time.perf_counter() - started, backend=backend.base_url, mode="complete")
+                return data.get("response", "")
+            except Exception as e:
+                error = self._record_failure(backend, e)
+                if not is_backend_failure(e):
+                    raise error
+            finally:
+                backend.outstanding -= 1
+                backend.breaker.release()
+        raise error or LLMUnavailableError("No healthy LLM backend available")
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield completion tokens; fails over to another backend only before the first token"""
+        tried: List[LLMBackend] = []
+        error: Optional[Exception] = None
+        for _ in range(max(1, LLM_MAX_ATTEMPTS)):
+            try:
+                backend = self._pick(tried)
+            except LLMUnavailableError:
+                break
+            tried.append(backend)
+            backend.outstanding += 1
+            backend.calls += 1
+            started = False
+            call_started = time.perf_counter()
+            try:
+                async with self.client.stream(
+                    "POST", f"{backend.base_url}/api/generate",
+                    json={"model": self.model, "prompt": prompt, "stream": True}
+                ) as response:
+                    response.raise_for_status()
+                    lines = response.aiter_lines()
+                    while True:
+                        try:
+                            line = await asyncio.wait_for(lines.__anext__(), LLM_STREAM_IDLE_TIMEOUT)
+                        except StopAsyncIteration:
+                            break
+                        if not line.strip():
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(data["error"])
+                        if data.get("response"):
+                            started = True
+                            yield data["response"]
+                        if data.get("done"):
+                            break
+                backend.breaker.record_success()
+                LLM_CALL_SECONDS.observe(time.perf_counter() - call_started, backend=backend.base_url, mode="stream")
+                return
+            except Exception as e:
+                error = self._record_failure(backend, e)
+                if started or not is_backend_failure(e):
+                    raise error
+            finally:
+                backend.outstanding -= 1
+                backend.breaker.release()
+        raise error or LLMUnavailableError("No healthy LLM backend available")
+
+    def _record_failure(self, backend: LLMBackend, error: Exception) -> Exception:
+        backend.errors += 1
+        LLM_CALL_ERRORS.inc(backend=backend.base_url)
+        if is_backend_failure(error):
+            backend.breaker.record_failure()
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+            return TimeoutError(f"LLM call to {backend.base_url} timed out")
+        return error
+
+    def record_fallback(self, kind: str) -> None:
+        """Count a response served from canned output because the LLM failed"""
+        self.fallbacks[kind] += 1
+        FALLBACKS.inc(kind=kind)
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model,
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "fallbacks": dict(self.fallbacks),
+            "backends": [
+                {
+                    "url": backend.base_url,
+                    "state": backend.breaker.state,
+                    "outstanding": backend.outstanding,
+                    "calls": backend.calls,
+                    "errors": backend.errors,
+                    "consecutive_failures": backend.breaker.failures
+                }
+                for backend in self.backends
+            ]
+        }
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
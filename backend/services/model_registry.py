@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Model configuration
+LLM_MODEL = os.getenv("LLM_MODEL", "llama2")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+# When set, embeddings come from the shared sidecar instead of a model per process
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")
+
+
+class ModelRegistry:
+    """Loads heavy components on first use and shares them across services"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._components: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        self._loaders[name] = loader
+        self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """Return a component, loading it on the first call"""
+        component = self._components.get(name)
+        if component is not None:
+            return component
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown component: {name}")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._components:
+                return self._components[name]
+
+            started = time.perf_counter()
+            try:
+                component = self._loaders[name]()
+            except Exception as e:
+                self._errors[name] = str(e)
+                raise
+            self.timings[name] = round(time.perf_counter() - started, 4)
+            self._errors.pop(name, None)
+            self._components[name] = component
+            return component
+
+    def construct(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Build an eager component (such as a service) and record its startup time"""
+        started = time.perf_counter()
+        component = factory()
+        self.timings[name] = round(time.perf_counter() - started, 4)
+        return component
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._components
+
+    def warmup(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Load components eagerly, returning load time or error per component"""
+        report = {}
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+                report[name] = self.timings[name]
+            except Exception as e:
+                report[name] = f"error: {e}"
+        return report
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": all(self.is_loaded(name) for name in self._loaders),
+            "components": {
+                name: {
+                    "loaded": self.is_loaded(name),
+                    "load_seconds": self.timings.get(name),
+                    "error": self._errors.get(name)
+                }
+                for name in self._loaders
+            },
+            "timings": dict(self.timings)
+        }
+
+
+def _load_llm():
+    from services.llm_pool import LLMPool
+
+    return LLMPool(LLM_MODEL)
+
+
+def _load_embedding_model():
+    if EMBEDDING_SERVICE_URL:
+        from services.embedding_service import EmbeddingClient
+
+        return EmbeddingClient(EMBEDDING_SERVICE_URL)
+    return load_sentence_transformer()
+
+
+def load_sentence_transformer():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+# Process-wide registry shared by all services
+registry = ModelRegistry()
+registry.register("llm", _load_llm)
+registry.register("embedding_model", _load_embedding_model)
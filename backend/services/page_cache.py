@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Page cache configuration
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "./cache/page_cache.db")
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class CachedPage:
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                 content: bytes, text_hash: Optional[str]):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = content
+        self.text_hash = text_hash
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers used to revalidate this page with the origin"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """On-disk cache of fetched career pages and their extracted jobs"""
+
+    def __init__(self, path: str = PAGE_CACHE_PATH, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats_counters = {
+            "page_hits": 0,
+            "page_misses": 0,
+            "extraction_hits": 0,
+            "extraction_misses": 0,
+            "evictions": 0
+        }
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content BLOB,
+                text_hash TEXT,
+                size INTEGER,
+                accessed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS extractions (
+                content_hash TEXT PRIMARY KEY,
+                jobs TEXT,
+                size INTEGER,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_pages_accessed ON pages (accessed_at);
+            CREATE INDEX IF NOT EXISTS ix_extractions_accessed ON extractions (accessed_at);
+        """)
+        self._conn.commit()
+
+    def get_page(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content, text_hash FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return CachedPage(url, row[0], row[1], row[2], row[3])
+
+    def put_page(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                 content: bytes, text_hash: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content, text_hash, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content, text_hash, len(content), time.time())
+            )
+            self._conn.commit()
+            self._evict()
+
+    def record_page(self, hit: bool) -> None:
+        self.stats_counters["page_hits" if hit else "page_misses"] += 1
+
+    def get_extraction(self, content_hash: str) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT jobs FROM extractions WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                self.stats_counters["extraction_misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE extractions SET accessed_at = ? WHERE content_hash = ?",
+                (time.time(), content_hash)
+            )
+            self._conn.commit()
+            self.stats_counters["extraction_hits"] += 1
+        return json.loads(row[0])
+
+    def put_extraction(self, content_hash: str, jobs: List[Dict]) -> None:
+        payload = json.dumps(jobs)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (content_hash, jobs, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (content_hash, payload, len(payload), time.time())
+            )
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its size budget"""
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            row = self._conn.execute("""
+                SELECT 'pages', url, size, accessed_at FROM pages
+                UNION ALL
+                SELECT 'extractions', content_hash, size, accessed_at FROM extractions
+                ORDER BY accessed_at LIMIT 1
+            """).fetchone()
+            if row is None:
+                break
+            table, key, size, _ = row
+            column = "url" if table == "pages" else "content_hash"
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+            self.stats_counters["evictions"] += 1
+            total -= size or 0
+        self._conn.commit()
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute("""
+            SELECT (SELECT COALESCE(SUM(size), 0) FROM pages)
+                 + (SELECT COALESCE(SUM(size), 0) FROM extractions)
+        """).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            extractions = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+            total = self._total_bytes()
+        return {
+            **self.stats_counters,
+            "pages": pages,
+            "extractions": extractions,
+            "bytes": total,
+            "max_bytes": self.max_bytes
+        }
+
+    def close(self) -> None:
+        self._conn.close()
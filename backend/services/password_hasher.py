@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from passlib.context import CryptContext
+from services.metrics import STAGE_SECONDS
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", "8"))
+
+
+class PasswordHasher:
+    """Runs password hashing and verification in a bounded worker pool"""
+
+    def __init__(self, context: CryptContext, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_concurrency: int = PASSWORD_HASH_MAX_CONCURRENCY):
+        self.context = context
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.calls = 0
+        self.waiting = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    async def _run(self, func: Callable, *args):
+        enqueued = time.perf_counter()
+        self.waiting += 1
+
+        def timed_call():
+            # Queue time covers the semaphore and the executor backlog
+            started = time.perf_counter()
+            self._record_queue_time(started - enqueued)
+            try:
+                return func(*args)
+            finally:
+                run_seconds = time.perf_counter() - started
+                self.run_seconds_total += run_seconds
+                STAGE_SECONDS.observe(run_seconds, service="auth", stage="password_hash_run")
+
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, timed_call)
+        finally:
+            self.waiting -= 1
+
+    def _record_queue_time(self, seconds: float) -> None:
+        self.calls += 1
+        self.queue_seconds_total += seconds
+        self.queue_seconds_max = max(self.queue_seconds_max, seconds)
+        STAGE_SECONDS.observe(seconds, service="auth", stage="password_hash_queue")
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "queue_ms_avg": round(self.queue_seconds_total / self.calls * 1000, 2) if self.calls else 0.0,
+            "queue_ms_max": round(self.queue_seconds_max * 1000, 2),
+            "run_ms_avg": round(self.run_seconds_total / self.calls * 1000, 2) if self.calls else 0.0
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,196 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Also an entry point, so load the environment before services read it
+load_dotenv()
+
+from pydantic import ValidationError
+
+from models.schemas import PortfolioProject
+from services.metrics import metrics, stage, BATCH_SIZE
+from services.model_registry import EMBEDDING_MODEL_NAME
+
+# Projects embedded per encode call and written to the index per rewrite
+PORTFOLIO_INGEST_BATCH_SIZE = int(os.getenv("PORTFOLIO_INGEST_BATCH_SIZE", "512"))
+# Sample projects ingested into an empty index on first start; empty disables.
+# Resolved from this file, so the server can start from any directory
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORTFOLIO_SEED_PATH = os.getenv("PORTFOLIO_SEED_PATH", os.path.join(_BACKEND_DIR, "data", "portfolio.jsonl"))
+
+# Invalid rows listed in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+PORTFOLIO_INGESTED = metrics.counter(
+    "portfolio_ingested", "Portfolio projects seen by ingestion, by result", ["result"]
+)
+
+
+def detect_format(filename: str) -> str:
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+def read_projects(stream: IO[str], fmt: str = "jsonl") -> Iterator[Tuple[int, object]]:
+    """(line number, raw record) for each project in a JSONL or CSV stream
+
+    Records are validated by ingest_projects, so a bad row is reported there
+    instead of aborting the read. CSV technologies may be separated by
+    commas, semicolons or pipes.
+    """
+    if fmt == "csv":
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            technologies = row.get("technologies") or ""
+            row["technologies"] = [tech.strip() for tech in re.split(r"[;,|]", technologies) if tech.strip()]
+            yield line_number, row
+        return
+    if fmt != "jsonl":
+        raise ValueError(f"Unknown portfolio format: {fmt}")
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def project_entry(project: PortfolioProject) -> Tuple[str, str, Dict]:
+    """(id, document, metadata) as stored in the portfolio index"""
+    document = f"{project.title} {project.description} {' '.join(project.technologies)}"
+    metadata = {
+        "title": project.title,
+        "description": project.description,
+        "technologies": ",".join(project.technologies),
+        "url": project.url
+    }
+    # The model name is hashed too, so switching models re-embeds everything
+    content = json.dumps([EMBEDDING_MODEL_NAME, document, metadata], sort_keys=True)
+    metadata["contentHash"] = hashlib.sha1(content.encode("utf-8")).hexdigest()
+    return project.id or project.url, document, metadata
+
+
+def ingest_projects(index, encode: Callable[[List[str]], List[List[float]]], records: Iterable[Tuple[int, object]],
+                    batch_size: int = PORTFOLIO_INGEST_BATCH_SIZE,
+                    on_batch: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Upsert projects into the index, embedding only new or changed ones
+
+    Records are read in batches; each batch looks up the stored content
+    hashes, encodes the changed documents in one call and writes them with
+    one index upsert.
+    """
+    report = {
+        "read": 0, "embedded": 0, "unchanged": 0, "invalid": 0, "errors": [],
+        "seconds": 0.0, "encodeSeconds": 0.0, "docsPerSecond": 0.0, "embeddedPerSecond": 0.0
+    }
+    started = time.perf_counter()
+
+    def flush(batch: Dict[str, Tuple[str, Dict]]) -> None:
+        stored = index.get(list(batch))
+        changed = {
+            item_id: entry for item_id, entry in batch.items()
+            if stored.get(item_id, {}).get("contentHash") != entry[1]["contentHash"]
+        }
+        report["unchanged"] += len(batch) - len(changed)
+        if changed:
+            documents = [document for document, _ in changed.values()]
+            BATCH_SIZE.observe(len(documents), operation="portfolio_ingest")
+            encode_started = time.perf_counter()
+            with stage("portfolio_ingest", "encode"):
+                embeddings = encode(documents)
+            report["encodeSeconds"] += time.perf_counter() - encode_started
+            with stage("portfolio_ingest", "write"):
+                index.add(
+                    ids=list(changed),
+                    embeddings=embeddings,
+                    metadatas=[metadata for _, metadata in changed.values()],
+                    documents=documents
+                )
+            report["embedded"] += len(changed)
+        if on_batch is not None:
+            on_batch(report)
+
+    # Keyed by id, so a project repeated in the input is embedded once (last wins)
+    batch: Dict[str, Tuple[str, Dict]] = {}
+    for line_number, record in records:
+        report["read"] += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            item_id, document, metadata = project_entry(PortfolioProject.model_validate(record))
+        except ValidationError as e:
+            _invalid(report, line_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        except ValueError as e:
+            _invalid(report, line_number, str(e))
+            continue
+        batch[item_id] = (document, metadata)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = {}
+    if batch:
+        flush(batch)
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["docsPerSecond"] = round(report["read"] / elapsed, 1) if elapsed else 0.0
+    if report["encodeSeconds"]:
+        report["embeddedPerSecond"] = round(report["embedded"] / report["encodeSeconds"], 1)
+    report["encodeSeconds"] = round(report["encodeSeconds"], 3)
+    for result in ("embedded", "unchanged", "invalid"):
+        PORTFOLIO_INGESTED.inc(report[result], result=result)
+    return report
+
+
+def _invalid(report: Dict, line_number: int, error: str) -> None:
+    report["invalid"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"line": line_number, "error": error})
+
+
+def read_upload(data: bytes, filename: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, object]]:
+    """read_projects over an uploaded file's bytes"""
+    return read_projects(io.StringIO(data.decode("utf-8-sig")), fmt or detect_format(filename))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest portfolio projects from JSONL or CSV into the portfolio index")
+    parser.add_argument("path", help="JSONL (one project per line) or CSV with id,title,description,technologies,url")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=PORTFOLIO_INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from services.portfolio_service import PortfolioService
+
+    # The input replaces the sample projects, so an empty index is not seeded
+    service = PortfolioService(seed_path=None)
+
+    def progress(report: Dict) -> None:
+        print(f"read={report['read']} embedded={report['embedded']} unchanged={report['unchanged']} "
+              f"invalid={report['invalid']}", flush=True)
+
+    with open(args.path, encoding="utf-8-sig", newline="") as f:
+        report = service.ingest(read_projects(f, args.format or detect_format(args.path)), args.batch_size, progress)
+
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}")
+    print(
+        f"{report['read']} projects in {report['seconds']}s ({report['docsPerSecond']} docs/s); "
+        f"embedded {report['embedded']} ({report['embeddedPerSecond']} docs/s while encoding), "
+        f"unchanged {report['unchanged']}, invalid {report['invalid']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,121 +1,139 @@
-import chromadb
-from typing import List
-from sentence_transformers import SentenceTransformer
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import numpy as np
+from services.vector_index import create_vector_index
+from services.portfolio_ingest import (
+    ingest_projects, read_projects, PORTFOLIO_INGEST_BATCH_SIZE, PORTFOLIO_SEED_PATH
+)
+from services.model_registry import registry
+from services.metrics import stage, BATCH_SIZE, CACHE_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# Number of query embeddings kept in memory
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+FALLBACK_PORTFOLIO_LINKS = [
+    "https://atliq.com/portfolio/web-development",
+    "https://atliq.com/portfolio/cloud-solutions",
+    "https://atliq.com/portfolio/mobile-apps"
+]
 
 class PortfolioService:
-    def __init__(self):
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, seed_path: Optional[str] = PORTFOLIO_SEED_PATH):
+        self.seed_path = seed_path
         
-        # Initialize ChromaDB client (in-memory for demo)
-        self.client = chromadb.Client()
+        # LRU cache of query embeddings keyed by text hash
+        self._embedding_cache = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
         
-        # Create or get collection
-        try:
-            self.collection = self.client.get_collection("portfolio")
-        except:
-            self.collection = self.client.create_collection("portfolio")
-            self._initialize_portfolio_data()
+        # Index is built on first use; it needs the embedding model to seed
+        registry.register("portfolio_index", self._load_index)
 
-    def _initialize_portfolio_data(self):
-        """Initialize portfolio data in the vector database"""
-        portfolio_projects = [
-            {
-                "id": "1",
-                "title": "E-commerce Platform Modernization",
-                "description": "Modernized legacy e-commerce platform using React, Node.js, and AWS. Improved performance by 60% and reduced server costs by 40%.",
-                "technologies": ["React", "Node.js", "AWS", "MongoDB", "Redis"],
-                "url": "https://atliq.com/portfolio/ecommerce-modernization"
-            },
-            {
-                "id": "2",
-                "title": "DevOps Infrastructure Automation",
-                "description": "Implemented CI/CD pipeline using Jenkins, Docker, and Kubernetes. Reduced deployment time from 2 hours to 15 minutes.",
-                "technologies": ["Jenkins", "Docker", "Kubernetes", "AWS", "Terraform"],
-                "url": "https://atliq.com/portfolio/devops-automation"
-            },
-            {
-                "id": "3",
-                "title": "Machine Learning Analytics Dashboard",
-                "description": "Built ML-powered analytics dashboard using Python, TensorFlow, and React. Increased business insights by 80%.",
-                "technologies": ["Python", "TensorFlow", "React", "PostgreSQL", "Docker"],
-                "url": "https://atliq.com/portfolio/ml-dashboard"
-            },
-            {
-                "id": "4",
-                "title": "Mobile App Development",
-                "description": "Developed cross-platform mobile app using React Native and Firebase. Deployed to 100k+ users with 4.8 star rating.",
-                "technologies": ["React Native", "Firebase", "TypeScript", "Redux"],
-                "url": "https://atliq.com/portfolio/mobile-app"
-            },
-            {
-                "id": "5",
-                "title": "Cloud Migration & Optimization",
-                "description": "Migrated on-premise infrastructure to AWS cloud. Achieved 99.9% uptime and 30% cost reduction.",
-                "technologies": ["AWS", "Lambda", "RDS", "CloudFormation", "S3"],
-                "url": "https://atliq.com/portfolio/cloud-migration"
-            },
-            {
-                "id": "6",
-                "title": "Full-Stack Web Application",
-                "description": "Built scalable web application using MERN stack. Handles 10k+ concurrent users with real-time features.",
-                "technologies": ["MongoDB", "Express.js", "React", "Node.js", "Socket.io"],
-                "url": "https://atliq.com/portfolio/fullstack-app"
-            }
-        ]
-        
-        # Prepare data for ChromaDB
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for project in portfolio_projects:
-            # Create searchable document
-            document = f"{project['title']} {project['description']} {' '.join(project['technologies'])}"
-            documents.append(document)
-            
-            # Metadata
-            metadatas.append({
-                "title": project["title"],
-                "description": project["description"],
-                "technologies": ",".join(project["technologies"]),
-                "url": project["url"]
-            })
-            
-            ids.append(project["id"])
+    @property
+    def embedding_model(self):
+        return registry.get("embedding_model")
+
+    @property
+    def index(self):
+        return registry.get("portfolio_index")
+
+    def _load_index(self):
+        # Vector index backend selected by PORTFOLIO_INDEX_BACKEND
+        index = create_vector_index()
         
-        # Add to collection
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        # Persistent backends are only seeded on first start
+        if index.count() == 0 and self.seed_path:
+            if os.path.exists(self.seed_path):
+                with open(self.seed_path, encoding="utf-8") as f:
+                    ingest_projects(index, self._encode, read_projects(f))
+            else:
+                logger.warning(
+                    "Portfolio index is empty and seed file %s is missing; emails will get no portfolio links",
+                    self.seed_path
+                )
+        return index
+
+    def ingest(self, records: Iterable[Tuple[int, object]], batch_size: int = PORTFOLIO_INGEST_BATCH_SIZE,
+               on_batch: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Upsert projects read by read_projects, re-embedding only changed ones"""
+        return ingest_projects(self.index, self._encode, records, batch_size, on_batch)
 
     async def get_matching_portfolio(self, job_description: str, skills: List[str]) -> List[str]:
         """Get portfolio links that match job requirements"""
+        results = await self.get_matching_portfolio_batch([(job_description, skills)])
+        return results[0]
+
+    async def get_matching_portfolio_batch(self, jobs: List[Tuple[str, List[str]]]) -> List[List[str]]:
+        """Get portfolio links for many (description, skills) pairs with one embedding pass"""
+        if not jobs:
+            return []
+        
         try:
-            # Create search query
-            query = f"{job_description} {' '.join(skills)}"
+            # Create search queries
+            queries = [f"{description} {' '.join(skills)}" for description, skills in jobs]
+            with stage("portfolio", "embed"):
+                embeddings = await asyncio.to_thread(self._embed_queries, queries)
             
-            # Search for relevant projects
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=3
-            )
+            # Search for relevant projects in a single multi-query lookup
+            with stage("portfolio", "query"):
+                results = await asyncio.to_thread(self.index.query, embeddings, 3)
             
             # Extract URLs from metadata
-            portfolio_links = []
-            if results['metadatas']:
-                for metadata in results['metadatas'][0]:
-                    portfolio_links.append(metadata['url'])
+            matches = []
+            for metadatas in results:
+                matches.append([metadata['url'] for metadata in metadatas][:3])  # Top 3 matches
             
-            return portfolio_links[:3]  # Return top 3 matches
+            return matches
             
         except Exception as e:
             # Return fallback portfolio links
-            return [
-                "https://atliq.com/portfolio/web-development",
-                "https://atliq.com/portfolio/cloud-solutions",
-                "https://atliq.com/portfolio/mobile-apps"
-            ]
\ No newline at end of file
+            return [list(FALLBACK_PORTFOLIO_LINKS) for _ in jobs]
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries, encoding only texts missing from the cache in one forward pass"""
+        keys = [hashlib.sha1(query.encode("utf-8")).hexdigest() for query in queries]
+        
+        with self._embedding_cache_lock:
+            found = {}
+            for key in keys:
+                if key in self._embedding_cache:
+                    self._embedding_cache.move_to_end(key)
+                    found[key] = self._embedding_cache[key]
+        
+        # Deduplicate misses so identical descriptions are embedded once
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in found and key not in missing:
+                missing[key] = query
+        
+        CACHE_EVENTS.inc(len(keys) - len(missing), cache="embedding", result="hit")
+        if missing:
+            CACHE_EVENTS.inc(len(missing), cache="embedding", result="miss")
+            BATCH_SIZE.observe(len(missing), operation="embedding")
+            with stage("portfolio", "encode"):
+                encoded = self._encode(list(missing.values()))
+            with self._embedding_cache_lock:
+                for key, embedding in zip(missing.keys(), encoded):
+                    found[key] = embedding
+                    self._embedding_cache[key] = embedding
+                    self._embedding_cache.move_to_end(key)
+                while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        
+        return [found[key] for key in keys]
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self.embedding_model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32).tolist()
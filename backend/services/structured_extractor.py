@@ -0,0 +1,196 @@
+import json
+import re
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from services.html_chunker import HTML_PARSER
+
+# ATS boards and the signals that identify them: the board's host, or markup
+# only that vendor emits. Generic class names like "posting" are not enough.
+ATS_SIGNALS = {
+    "greenhouse": (("boards.greenhouse.io", "job-boards.greenhouse.io"), (b"boards.greenhouse.io", b"grnhse_")),
+    "lever": (("jobs.lever.co",), (b"jobs.lever.co", b'data-qa="posting-name"')),
+    "workable": (("apply.workable.com",), (b"apply.workable.com", b'data-ui="job-title"')),
+}
+
+# Cheap byte marker checked before paying for a parse
+JSON_LD_MARKER = b"application/ld+json"
+
+# Skills recognised in titles and descriptions when a posting lists none
+SKILL_KEYWORDS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Golang", "Rust", "C++", "C#", "Ruby", "PHP",
+    "Kotlin", "Swift", "Scala", "SQL", "React", "Angular", "Vue", "Node.js", "Django", "Flask",
+    "FastAPI", "Spring", "Rails", ".NET", "AWS", "Azure", "GCP", "Docker", "Kubernetes",
+    "Terraform", "Jenkins", "Linux", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Kafka",
+    "Spark", "Hadoop", "Airflow", "TensorFlow", "PyTorch", "Machine Learning", "Pandas",
+    "GraphQL", "CSS", "HTML", "Redux", "React Native", "Flutter", "Android", "iOS",
+    "Figma", "Snowflake", "dbt", "Tableau", "Power BI",
+]
+_SKILL_PATTERNS = [
+    (skill, re.compile(r"(?<![\w.+#])" + re.escape(skill) + r"(?![\w+#])", re.IGNORECASE))
+    for skill in SKILL_KEYWORDS
+]
+
+DESCRIPTION_CHARS = 500
+
+
+def detect_ats(lowered: bytes, url: str = "") -> List[str]:
+    """ATS vendors whose host or vendor-specific markup the (lowercased) page carries"""
+    host = (urlparse(url).hostname or "").lower()
+    return [
+        vendor for vendor, (hosts, markers) in ATS_SIGNALS.items()
+        if any(host == ats_host or host.endswith("." + ats_host) for ats_host in hosts)
+        or any(marker in lowered for marker in markers)
+    ]
+
+
+def extract_structured_jobs(content: bytes, company_name: str, url: str = "") -> List[Dict]:
+    """Map JSON-LD JobPosting data or known ATS markup to job dicts
+
+    Returns an empty list when the page carries no recognised structure, in
+    which case the caller falls back to the LLM.
+    """
+    lowered = content[:2_000_000].lower()
+    vendors = detect_ats(lowered, url)
+    if not vendors and JSON_LD_MARKER not in lowered:
+        return []
+
+    soup = BeautifulSoup(content, HTML_PARSER)
+    jobs = _from_json_ld(soup, company_name)
+    if not jobs and vendors:
+        jobs = _from_ats_markup(soup, company_name, vendors)
+    return jobs
+
+
+def _from_json_ld(soup: BeautifulSoup, company_name: str) -> List[Dict]:
+    jobs = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        raw = script.string or script.get_text()
+        try:
+            data = json.loads(raw.strip().removeprefix("<![CDATA[").removesuffix("]]>"))
+        except (ValueError, AttributeError):
+            continue
+        for posting in _iter_job_postings(data):
+            job = _map_job_posting(posting, company_name)
+            if job:
+                jobs.append(job)
+    return jobs
+
+
+def _iter_job_postings(data) -> Iterator[Dict]:
+    """Walk JSON-LD, including @graph and ItemList wrappers"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_job_postings(item)
+    elif isinstance(data, dict):
+        types = data.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "JobPosting" in types:
+            yield data
+        for key in ("@graph", "itemListElement", "item"):
+            if key in data:
+                yield from _iter_job_postings(data[key])
+
+
+def _map_job_posting(posting: Dict, company_name: str) -> Optional[Dict]:
+    title = _text(posting.get("title") or posting.get("name"))
+    if not title:
+        return None
+
+    description = _html_to_text(posting.get("description", ""))
+    organization = posting.get("hiringOrganization")
+    company = _text(organization.get("name")) if isinstance(organization, dict) else _text(organization)
+
+    skills = posting.get("skills")
+    if isinstance(skills, str):
+        skills = [skill.strip() for skill in re.split(r"[,;\n]", skills) if skill.strip()]
+    if not skills:
+        skills = detect_skills(f"{title} {description}")
+
+    return {
+        "title": title,
+        "skills": [_text(skill) for skill in skills][:10],
+        "experience": _experience(posting.get("experienceRequirements")),
+        "description": description[:DESCRIPTION_CHARS],
+        "company": company or company_name
+    }
+
+
+def _experience(requirement) -> str:
+    if isinstance(requirement, dict):
+        months = requirement.get("monthsOfExperience")
+        if months:
+            try:
+                return f"{round(float(months) / 12, 1):g}+ years"
+            except (TypeError, ValueError):
+                pass
+        return _text(requirement.get("description"))
+    return _html_to_text(requirement or "")[:100]
+
+
+def _from_ats_markup(soup: BeautifulSoup, company_name: str, vendors: List[str]) -> List[Dict]:
+    """Job boards hosted by Greenhouse, Lever and Workable, for the vendors detected"""
+    postings = []
+
+    # Greenhouse (classic and current board layouts)
+    if "greenhouse" in vendors:
+        for opening in soup.select("div.opening, tr.job-post"):
+            title = _first(opening, "p.body--medium", "a")
+            location = _first(opening, "span.location", "p.body--metadata")
+            postings.append((title, location))
+
+    # Lever
+    if "lever" in vendors:
+        for posting in soup.select("div.posting"):
+            title = _first(posting, "[data-qa=posting-name]", "h5")
+            categories = _first(posting, ".posting-categories")
+            postings.append((title, categories))
+
+    # Workable
+    if "workable" in vendors:
+        for job in soup.select("li[data-ui=job]"):
+            title = _first(job, "[data-ui=job-title]", "h3")
+            details = _first(job, "[data-ui=job-location]", "[data-ui=job-department]")
+            postings.append((title, details))
+
+    jobs = []
+    for title_element, detail_element in postings:
+        title = _text(title_element.get_text(" ") if title_element else "")
+        if not title:
+            continue
+        details = _text(detail_element.get_text(" ") if detail_element else "")
+        jobs.append({
+            "title": title,
+            "skills": detect_skills(title),
+            "experience": "",
+            "description": details[:DESCRIPTION_CHARS],
+            "company": company_name
+        })
+    return jobs
+
+
+def _first(element, *selectors):
+    """First match trying selectors in priority order"""
+    for selector in selectors:
+        match = element.select_one(selector)
+        if match is not None:
+            return match
+    return None
+
+
+def detect_skills(text: str) -> List[str]:
+    return [skill for skill, pattern in _SKILL_PATTERNS if pattern.search(text)][:10]
+
+
+def _html_to_text(value) -> str:
+    if not isinstance(value, str):
+        return _text(value)
+    if "<" in value:
+        value = BeautifulSoup(value, HTML_PARSER).get_text(" ")
+    return _text(value)
+
+
+def _text(value) -> str:
+    if value is None or isinstance(value, (dict, list)):
+        return ""
+    return " ".join(str(value).split())
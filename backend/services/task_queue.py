@@ -0,0 +1,367 @@
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from services.metrics import metrics, stage
+
+# Background extraction queue configuration
+TASK_QUEUE_PATH = os.getenv("TASK_QUEUE_PATH", "./cache/task_queue.db")
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "4"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_RETENTION_SECONDS = int(os.getenv("TASK_RETENTION_SECONDS", str(24 * 3600)))
+
+# Workers also poll, so tasks enqueued by another process are picked up
+TASK_POLL_INTERVAL = 1.0
+
+# Running tasks are touched every heartbeat; ones silent for three are requeued
+TASK_HEARTBEAT_SECONDS = 15.0
+TASK_STALE_SECONDS = 3 * TASK_HEARTBEAT_SECONDS
+
+ACTIVE_STATUSES = ("queued", "running")
+
+TASKS_ENQUEUED = metrics.counter("extraction_tasks_enqueued", "Extraction tasks by enqueue outcome", ["result"])
+TASKS_FINISHED = metrics.counter("extraction_tasks_finished", "Extraction tasks by final status", ["status"])
+TASK_WAIT_SECONDS = metrics.histogram("extraction_task_wait_seconds", "Time tasks spend queued")
+
+
+class TaskStore:
+    """SQLite-backed extraction tasks, so queued work survives restarts"""
+
+    def __init__(self, path: str = TASK_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The partial unique index deduplicates each user's in-flight URLs, even
+        # across processes. Tasks are private to their user, so one user's
+        # request never returns another's task.
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS extraction_tasks (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                user_id TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                jobs_found INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                source TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL
+            );
+            DROP INDEX IF EXISTS ux_extraction_tasks_active_url;
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_extraction_tasks_active_user_url
+                ON extraction_tasks (user_id, url) WHERE status IN ('queued', 'running');
+            CREATE INDEX IF NOT EXISTS ix_extraction_tasks_status ON extraction_tasks (status, created_at);
+        """)
+        self._conn.commit()
+
+    def create(self, url: str, user_id: Optional[str]) -> Tuple[Dict, bool]:
+        """Queue a task for url, or return the user's one already in flight; the flag is True when new"""
+        now = time.time()
+        with self._lock:
+            try:
+                task_id = str(uuid.uuid4())
+                self._conn.execute(
+                    "INSERT INTO extraction_tasks (id, url, user_id, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (task_id, url, user_id, now, now)
+                )
+                self._conn.commit()
+                created = True
+            except sqlite3.IntegrityError:
+                self._conn.rollback()
+                task_id = self._conn.execute(
+                    "SELECT id FROM extraction_tasks WHERE url = ? AND user_id IS ? AND status IN ('queued', 'running')",
+                    (url, user_id)
+                ).fetchone()[0]
+                created = False
+            return self._get(task_id), created
+
+    def get(self, task_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        """The task, or None if it does not exist or belongs to someone other than user_id"""
+        with self._lock:
+            return self._get(task_id, user_id)
+
+    def claim_next(self) -> Optional[Dict]:
+        """Mark the oldest queued task running and return it"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM extraction_tasks WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            # The status check keeps two processes from claiming the same task
+            claimed = self._conn.execute(
+                "UPDATE extraction_tasks SET status = 'running', attempts = attempts + 1, "
+                "started_at = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, now, row[0])
+            ).rowcount
+            self._conn.commit()
+            return self._get(row[0]) if claimed else None
+
+    def heartbeat(self, task_id: str, jobs_found: int) -> None:
+        """Record progress and show the task is still being worked on"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE extraction_tasks SET jobs_found = ?, updated_at = ? WHERE id = ?",
+                (jobs_found, time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def finish(self, task_id: str, jobs: List[Dict], source: Optional[str], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE extraction_tasks SET status = 'done', jobs_found = ?, result = ?, source = ?, "
+                "error = ?, updated_at = ? WHERE id = ?",
+                (len(jobs), json.dumps(jobs), source, error, time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def fail(self, task_id: str, error: str, retry: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE extraction_tasks SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                ("queued" if retry else "failed", error, time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def requeue_stale(self, older_than: float) -> int:
+        """Return running tasks not heartbeated since older_than to the queue
+
+        These were interrupted by a crash or restart; tasks out of attempts fail.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE extraction_tasks SET status = 'failed', error = 'Interrupted too many times', "
+                "updated_at = ? WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (time.time(), older_than, TASK_MAX_ATTEMPTS)
+            )
+            requeued = self._conn.execute(
+                "UPDATE extraction_tasks SET status = 'queued' WHERE status = 'running' AND updated_at < ?",
+                (older_than,)
+            ).rowcount
+            self._conn.commit()
+            return requeued
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished tasks last updated before older_than"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM extraction_tasks WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (older_than,)
+            ).rowcount
+            self._conn.commit()
+            return deleted
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM extraction_tasks GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def _get(self, task_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT id, url, status, attempts, jobs_found, result, source, error, created_at, updated_at, user_id "
+            "FROM extraction_tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None or (user_id is not None and row[10] != user_id):
+            return None
+        return {
+            "id": row[0],
+            "url": row[1],
+            "status": row[2],
+            "attempts": row[3],
+            "jobsFound": row[4],
+            "jobs": json.loads(row[5]) if row[5] else [],
+            "source": row[6],
+            "error": row[7],
+            "createdAt": row[8],
+            "updatedAt": row[9]
+        }
+
+    def close(self) -> None:
+        # Waits for a call already running in another thread
+        with self._lock:
+            self._conn.close()
+
+
+class ExtractionQueue:
+    """Runs career page extractions on a pool of background workers
+
+    Tasks are persisted in a TaskStore and deduplicated by URL while queued or
+    running. Jobs found by a running task are kept in memory so subscribers
+    see them as they arrive; the full result is stored when the task ends.
+    """
+
+    def __init__(self, extractor, store: Optional[TaskStore] = None, workers: int = EXTRACT_WORKERS):
+        self.extractor = extractor
+        self.store = store or TaskStore()
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._version = 0
+        self._running = False
+        # Jobs found so far by tasks running in this process
+        self._live: Dict[str, List[Dict]] = {}
+        # Store calls running in threads, which cancelling their caller does not stop
+        self._store_calls: Set[asyncio.Future] = set()
+
+    def start(self) -> None:
+        """Start the workers and the reaper that requeues interrupted tasks"""
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._running = True
+        self._tasks = [asyncio.create_task(self._run_worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._run_reaper()))
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted tasks are requeued on the next start"""
+        # The flag also stops workers whose cancellation races a wakeup
+        self._running = False
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # A cancelled worker's thread may still be using the store
+        await asyncio.gather(*self._store_calls, return_exceptions=True)
+        self.store.close()
+
+    async def enqueue(self, url: str, user_id: Optional[str] = None) -> Tuple[Dict, bool]:
+        task, created = await self._store_call(self.store.create, url, user_id)
+        TASKS_ENQUEUED.inc(result="created" if created else "deduplicated")
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return self._with_live(task), created
+
+    async def get(self, task_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        """The task with its live jobs; None if missing or, given user_id, owned by someone else"""
+        task = await self._store_call(self.store.get, task_id, user_id)
+        return self._with_live(task) if task else None
+
+    async def events(self, task_id: str, user_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield ("status", task) on every change, ("job", job) per job found, then ("done", task)"""
+        sent_jobs = 0
+        last_status = None
+        while True:
+            version = self._version
+            task = await self.get(task_id, user_id)
+            if task is None:
+                return
+            for job in task["jobs"][sent_jobs:]:
+                yield "job", job
+            sent_jobs = max(sent_jobs, len(task["jobs"]))
+            if task["status"] != last_status:
+                last_status = task["status"]
+                yield "status", self._summary(task)
+            if task["status"] not in ACTIVE_STATUSES:
+                yield "done", self._summary(task)
+                return
+            async with self._changed:
+                try:
+                    # Poll as well, to notice tasks run by another process
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: self._version != version), TASK_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "running_here": len(self._live), "tasks": self.store.counts()}
+
+    async def _run_worker(self) -> None:
+        while self._running:
+            task = await self._store_call(self.store.claim_next)
+            if task is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), TASK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # More work may be queued behind this task
+            self._wakeup.set()
+            await self._run_task(task)
+
+    async def _run_reaper(self) -> None:
+        while self._running:
+            # Running tasks nobody heartbeats were cut off by a crash or restart
+            requeued = await self._store_call(self.store.requeue_stale, time.time() - TASK_STALE_SECONDS)
+            await self._store_call(self.store.prune, time.time() - TASK_RETENTION_SECONDS)
+            if requeued:
+                self._wakeup.set()
+            await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+
+    async def _heartbeat(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+            await self._store_call(self.store.heartbeat, task_id, len(self._live.get(task_id, [])))
+
+    async def _run_task(self, task: Dict) -> None:
+        task_id = task["id"]
+        TASK_WAIT_SECONDS.observe(max(0.0, time.time() - task["createdAt"]))
+        self._live[task_id] = []
+        await self._notify()
+        heartbeat = asyncio.create_task(self._heartbeat(task_id))
+        try:
+            with stage("task_queue", "extraction"):
+                summary = {}
+                async for event, data in self.extractor.stream_page(task["url"], fallback=False):
+                    if event == "job":
+                        self._live[task_id].append(data)
+                        await self._notify()
+                    else:
+                        summary = data
+            await self._store_call(
+                self.store.finish, task_id, self._live[task_id], summary.get("source"), summary.get("error")
+            )
+            TASKS_FINISHED.inc(status="done")
+        except asyncio.CancelledError:
+            # Shutting down: leave the task running so the next start requeues it
+            raise
+        except Exception as e:
+            retry = task["attempts"] < TASK_MAX_ATTEMPTS
+            await self._store_call(self.store.fail, task_id, str(e), retry)
+            TASKS_FINISHED.inc(status="retried" if retry else "failed")
+            if retry:
+                self._wakeup.set()
+        finally:
+            heartbeat.cancel()
+            self._live.pop(task_id, None)
+            await self._notify()
+
+    async def _store_call(self, func, *args):
+        """Run a store method in a thread that stop() waits for, even if the caller is cancelled"""
+        future = asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+        self._store_calls.add(future)
+        future.add_done_callback(self._store_calls.discard)
+        return await asyncio.shield(future)
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def _with_live(self, task: Dict) -> Dict:
+        live = self._live.get(task["id"])
+        if live is not None and task["status"] == "running":
+            task = {**task, "jobs": list(live), "jobsFound": len(live)}
+        return task
+
+    def _summary(self, task: Dict) -> Dict:
+        return {key: value for key, value in task.items() if key != "jobs"}
@@ -0,0 +1,205 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Portfolio index configuration. Chroma is not safe to share between server
+# processes, so several workers (WEB_CONCURRENCY, also read by uvicorn
+# --workers) default to the numpy index.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+PORTFOLIO_INDEX_BACKEND = os.getenv("PORTFOLIO_INDEX_BACKEND") or ("numpy" if WEB_CONCURRENCY > 1 else "chroma")
+PORTFOLIO_INDEX_DIR = os.getenv("PORTFOLIO_INDEX_DIR", "./cache/portfolio_index")
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock held across processes for the duration of the block"""
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ChromaIndex:
+    """Vector index backed by a ChromaDB collection persisted on disk
+
+    Meant for a single server process. A Chroma PersistentClient keeps its
+    vector segment in memory, so writes made by one process are not seen by
+    others until they restart. Writes take a file lock so concurrent ingests
+    at least do not corrupt the files; use the numpy index with several
+    workers.
+    """
+
+    def __init__(self, name: str = "portfolio", directory: str = PORTFOLIO_INDEX_DIR):
+        import chromadb
+
+        os.makedirs(directory, exist_ok=True)
+        self.lock_path = os.path.join(directory, ".chroma.lock")
+        self.client = chromadb.PersistentClient(path=os.path.join(directory, "chroma"))
+
+        # Create or get collection
+        with _file_lock(self.lock_path):
+            self.collection = self.client.get_or_create_collection(name)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def get(self, ids: List[str]) -> Dict[str, Dict]:
+        """Stored metadata for whichever of ids exist"""
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["metadatas"])
+        return dict(zip(results["ids"], results["metadatas"] or []))
+
+    def add(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict],
+            documents: Optional[List[str]] = None) -> None:
+        with _file_lock(self.lock_path):
+            self.collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=documents
+            )
+
+    def query(self, embeddings: List[List[float]], k: int) -> List[List[Dict]]:
+        results = self.collection.query(query_embeddings=embeddings, n_results=k)
+        return results['metadatas'] or [[] for _ in embeddings]
+
+
+class NumpyIndex:
+    """Vector index kept as a memory-mapped float32 matrix of normalized embeddings
+
+    Embeddings live in ``embeddings.npy`` and ids/metadata in a ``metadata.json``
+    sidecar, so process starts only map the file instead of rebuilding the index.
+    Server processes share the page cache for the mapped file; writes take a
+    file lock and other processes remap when the files change.
+    """
+
+    def __init__(self, directory: str = PORTFOLIO_INDEX_DIR):
+        self.directory = directory
+        self.matrix_path = os.path.join(directory, "embeddings.npy")
+        self.metadata_path = os.path.join(directory, "metadata.json")
+        self.lock_path = os.path.join(directory, ".lock")
+        os.makedirs(directory, exist_ok=True)
+        self._version = None
+        self._load()
+
+    def _file_version(self):
+        # The metadata file is replaced last, so its identity marks a complete write
+        try:
+            stat = os.stat(self.metadata_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self) -> None:
+        while True:
+            version = self._file_version()
+            if os.path.exists(self.matrix_path) and os.path.exists(self.metadata_path):
+                matrix = np.load(self.matrix_path, mmap_mode='r')
+                with open(self.metadata_path) as f:
+                    sidecar = json.load(f)
+            else:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+                sidecar = {"ids": [], "metadatas": []}
+            # A writer replaced the files mid-read; read them again
+            if self._file_version() == version:
+                break
+        self._version = version
+        self.ids = sidecar["ids"]
+        self.metadatas = sidecar["metadatas"]
+        # A matrix newer than its metadata only has extra rows at the end
+        self.matrix = matrix[:len(self.ids)] if len(self.ids) else matrix
+        self._positions = {item_id: i for i, item_id in enumerate(self.ids)}
+
+    def _refresh(self) -> None:
+        """Remap the index if another process rewrote it"""
+        if self._file_version() != self._version:
+            self._load()
+
+    def count(self) -> int:
+        self._refresh()
+        return len(self.ids)
+
+    def get(self, ids: List[str]) -> Dict[str, Dict]:
+        """Stored metadata for whichever of ids exist"""
+        self._refresh()
+        return {item_id: self.metadatas[self._positions[item_id]] for item_id in ids if item_id in self._positions}
+
+    def add(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict],
+            documents: Optional[List[str]] = None) -> None:
+        """Insert or replace entries by id and rewrite the index files atomically"""
+        with _file_lock(self.lock_path):
+            # Merge into the latest files, not a stale mapping
+            self._refresh()
+            self._write(ids, embeddings, metadatas)
+
+    def _write(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict]) -> None:
+        new_rows = _normalize(np.asarray(embeddings, dtype=np.float32))
+        matrix = np.array(self.matrix, dtype=np.float32) if self.count() else np.zeros((0, new_rows.shape[1]), dtype=np.float32)
+        all_ids = list(self.ids)
+        all_metadatas = list(self.metadatas)
+
+        appended = []
+        for row, item_id, metadata in zip(new_rows, ids, metadatas):
+            position = self._positions.get(item_id)
+            if position is None:
+                appended.append(row)
+                self._positions[item_id] = len(all_ids)
+                all_ids.append(item_id)
+                all_metadatas.append(metadata)
+            else:
+                matrix[position] = row
+                all_metadatas[position] = metadata
+        if appended:
+            matrix = np.vstack([matrix, np.stack(appended)])
+
+        matrix_tmp = f"{self.matrix_path}.{os.getpid()}.tmp.npy"
+        metadata_tmp = f"{self.metadata_path}.{os.getpid()}.tmp"
+        np.save(matrix_tmp, np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(metadata_tmp, "w") as f:
+            json.dump({"ids": all_ids, "metadatas": all_metadatas}, f)
+        os.replace(matrix_tmp, self.matrix_path)
+        os.replace(metadata_tmp, self.metadata_path)
+        self._load()
+
+    def query(self, embeddings: List[List[float]], k: int) -> List[List[Dict]]:
+        """Top-k cosine matches for each query via one matrix product"""
+        self._refresh()
+        total = len(self.ids)
+        if total == 0:
+            return [[] for _ in embeddings]
+
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ self.matrix.T
+        k = min(k, total)
+
+        # argpartition finds the top k in O(N); only those k are then sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        ranked = np.take_along_axis(top, order, axis=1)
+
+        return [[self.metadatas[i] for i in row] for row in ranked]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def create_vector_index(backend: str = PORTFOLIO_INDEX_BACKEND):
+    """Build the portfolio index backend selected by configuration"""
+    if backend == "numpy":
+        return NumpyIndex()
+    if backend == "chroma":
+        return ChromaIndex()
+    raise ValueError(f"Unknown portfolio index backend: {backend}")
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+# Services read their configuration at import time, so point every store at
+# a throwaway directory before any of them is imported
+WORKDIR = tempfile.mkdtemp(prefix="outreach-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{WORKDIR}/outreach_pro.db",
+    "JOB_INDEX_PATH": f"{WORKDIR}/job_index.db",
+    "LLM_CACHE_PATH": f"{WORKDIR}/llm_cache.db",
+    "PAGE_CACHE_PATH": f"{WORKDIR}/page_cache.db",
+    "TASK_QUEUE_PATH": f"{WORKDIR}/task_queue.db",
+    "PORTFOLIO_INDEX_BACKEND": "numpy",
+    "PORTFOLIO_INDEX_DIR": f"{WORKDIR}/portfolio_index",
+    "EMBEDDING_SERVICE_URL": "",
+    "EXTRACT_PROCESS_WORKERS": "0",
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
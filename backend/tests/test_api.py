@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+# main builds its prompts with langchain and accepts portfolio uploads as multipart
+pytest.importorskip("langchain")
+pytest.importorskip("multipart")
+
+from fastapi.testclient import TestClient
+
+import main
+from models.schemas import BatchEmailResult, GeneratedEmailData, JobListing
+
+JOBS = [
+    JobListing(id=f"job-{i}", title=f"Engineer {i}", skills=["Python"], experience="3 years",
+               description="Build APIs", company="Acme")
+    for i in range(3)
+]
+
+
+class StubGenerator:
+    """Yields results out of order, with the middle job failing"""
+
+    async def generate_emails(self, jobs, user_id, concurrency, bypass_cache=False):
+        for index in (2, 1, 0):
+            if index == 1:
+                yield BatchEmailResult(index=index, jobId=jobs[index].id, error="backend unavailable")
+                continue
+            yield BatchEmailResult(index=index, jobId=jobs[index].id, email=GeneratedEmailData(
+                id=f"email-{index}", subject=f"Subject {index}", content="Hello", jobListing=jobs[index],
+                portfolioLinks=[], timestamp="2025-01-01T00:00:00"
+            ))
+
+
+class StubHistory:
+    def __init__(self):
+        self.saved = []
+
+    async def save_emails(self, user_id, emails):
+        self.saved.append((user_id, [email.id for email in emails]))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    history = StubHistory()
+    monkeypatch.setattr(main, "email_generator", StubGenerator())
+    monkeypatch.setattr(main, "history_service", history)
+    main.app.dependency_overrides[main.get_current_user] = lambda: "user-1"
+    # Without entering the client as a context manager the lifespan does not run
+    yield TestClient(main.app), history
+    main.app.dependency_overrides.clear()
+
+
+def batch_request(**fields):
+    return {"jobs": [job.dict() for job in JOBS], **fields}
+
+
+def test_batch_streams_one_ndjson_line_per_job(client):
+    client, history = client
+
+    response = client.post("/api/emails/generate/batch", json=batch_request())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [2, 1, 0]
+    assert lines[1]["error"] == "backend unavailable" and lines[1]["email"] is None
+    assert lines[0]["email"]["subject"] == "Subject 2"
+    assert history.saved == [("user-1", ["email-2", "email-0"])]
+
+
+def test_batch_streams_sse_events_and_a_done_event(client):
+    client, history = client
+
+    response = client.post("/api/emails/generate/batch", json=batch_request(format="sse"))
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.split("\n\n")
+    assert events[-1] == ""
+    assert events[-2] == "event: done\ndata: {}"
+    payloads = [json.loads(event[len("data: "):]) for event in events[:-2]]
+    assert [payload["index"] for payload in payloads] == [2, 1, 0]
+    assert payloads[1]["error"] == "backend unavailable"
+
+
+def test_batch_rejects_too_many_jobs(client, monkeypatch):
+    client, history = client
+    monkeypatch.setattr(main, "MAX_BATCH_JOBS", 2)
+
+    response = client.post("/api/emails/generate/batch", json=batch_request())
+
+    assert response.status_code == 400
+    assert history.saved == []
+
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    client, history = client
+    client.post("/api/emails/generate/batch", json=batch_request())
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE outreach_http_request_duration_seconds histogram" in response.text
+    assert 'route="/api/emails/generate/batch",status="200"' in response.text
@@ -0,0 +1,132 @@
+import asyncio
+import uuid
+
+import pytest
+from jose import JWTError, jwt
+
+from services.auth_service import AuthService, TTLCache
+
+
+def test_signup_holds_no_session_while_hashing():
+    service = AuthService()
+    open_sessions = []
+    session_factory = service.session_factory
+
+    class TrackedSession:
+        async def __aenter__(self):
+            open_sessions.append(1)
+            self.session = session_factory()
+            return await self.session.__aenter__()
+
+        async def __aexit__(self, *exc_info):
+            open_sessions.pop()
+            return await self.session.__aexit__(*exc_info)
+
+    hash_password = service._hash_password
+    sessions_while_hashing = []
+
+    async def tracked_hash(password):
+        sessions_while_hashing.append(len(open_sessions))
+        return await hash_password(password)
+
+    service.session_factory = TrackedSession
+    service._hash_password = tracked_hash
+    email = f"{uuid.uuid4()}@example.com"
+
+    async def run():
+        try:
+            await service.signup(email, "s3cret-password", "Ada")
+            with pytest.raises(Exception, match="already exists"):
+                await service.signup(email, "s3cret-password", "Ada")
+        finally:
+            await service.close()
+
+    asyncio.run(run())
+
+    assert sessions_while_hashing == [0, 0]
+
+
+class Clock:
+    """Manually advanced stand-in for time.time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_entries_and_evicts_least_recently_used(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("services.auth_service.time", clock)
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    # An explicit expiry earlier than the TTL wins
+    cache.put("d", 4, expires_at=clock.now + 10)
+    clock.now += 11
+    assert cache.get("d") is None
+    assert cache.get("a") == 1
+
+    clock.now += 50
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 3, "misses": 3, "entries": 0}
+
+
+def test_verified_tokens_are_served_from_the_cache(monkeypatch):
+    service = AuthService()
+    token = service._create_access_token("user-1")
+    decoded = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decoded.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr("services.auth_service.jwt.decode", counting_decode)
+
+    assert service.verify_token(token) == "user-1"
+    assert service.verify_token(token) == "user-1"
+    assert decoded == [token]
+    assert service.token_cache.stats()["hits"] == 1
+
+    service.password_hasher.shutdown()
+
+
+def test_invalid_tokens_are_rejected_and_not_cached():
+    service = AuthService()
+    forged = jwt.encode({"sub": "user-1"}, "another-secret", algorithm=service.algorithm)
+    anonymous = jwt.encode({"scope": "none"}, service.secret_key, algorithm=service.algorithm)
+
+    for token in (forged, anonymous, "not-a-token"):
+        with pytest.raises(JWTError):
+            service.verify_token(token)
+    assert service.token_cache.stats()["entries"] == 0
+
+    service.password_hasher.shutdown()
+
+
+def test_login_accepts_only_the_right_password():
+    service = AuthService()
+    email = f"{uuid.uuid4()}@example.com"
+
+    async def run():
+        try:
+            signed_up = await service.signup(email, "s3cret-password", "Ada")
+            logged_in = await service.login(email, "s3cret-password")
+            with pytest.raises(Exception, match="Invalid credentials"):
+                await service.login(email, "wrong-password")
+            return signed_up, logged_in
+        finally:
+            await service.close()
+
+    signed_up, logged_in = asyncio.run(run())
+
+    assert service.verify_token(logged_in.token) == signed_up.user.id
+    assert service.password_hasher.stats()["calls"] == 3
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks import compare
+from benchmarks.common import fixture_names, read_fixture
+from benchmarks.fake_ollama import completion_for, create_app, tokenize
+from services.structured_extractor import extract_structured_jobs
+
+EXTRACTION_PROMPT = "You are an expert at extracting job information from career pages.\nPage 1"
+
+
+def test_stub_completions_are_deterministic_per_prompt():
+    assert completion_for(EXTRACTION_PROMPT) == completion_for(EXTRACTION_PROMPT)
+    assert completion_for("Write an email for Acme") == completion_for("Write an email for Acme")
+    assert completion_for("Write an email for Acme") != completion_for("Write an email for Globex")
+
+
+def test_stub_completions_match_the_prompt_kind():
+    jobs = json.loads(completion_for(EXTRACTION_PROMPT))["jobs"]
+    assert 2 <= len(jobs) <= 5
+    assert all(set(job) == {"title", "skills", "experience", "description"} for job in jobs)
+
+    email = completion_for("Write an email for Acme")
+    assert email.startswith("SUBJECT: ")
+    assert "\n\nEMAIL:\n" in email
+
+
+def test_tokens_reassemble_the_completion():
+    text = completion_for("Write an email for Acme")
+
+    assert "".join(tokenize(text)) == text
+
+
+def test_stub_server_streams_ndjson_tokens_then_done():
+    client = TestClient(create_app(latency=0, tokens_per_second=0, error_rate=0))
+
+    response = client.post("/api/generate", json={"model": "stub", "prompt": "Write an email for Acme"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "".join(line["response"] for line in lines) == completion_for("Write an email for Acme")
+    assert [line["done"] for line in lines].count(True) == 1
+    assert lines[-1]["done"] and lines[-1]["eval_count"] == len(lines) - 1
+
+
+def test_stub_server_answers_non_streaming_requests_and_injects_errors():
+    client = TestClient(create_app(latency=0, tokens_per_second=0, error_rate=0))
+    failing = TestClient(create_app(latency=0, tokens_per_second=0, error_rate=1.0))
+    body = {"model": "stub", "prompt": EXTRACTION_PROMPT, "stream": False}
+
+    assert client.post("/api/generate", json=body).json()["response"] == completion_for(EXTRACTION_PROMPT)
+    assert failing.post("/api/generate", json=body).status_code == 500
+
+
+@pytest.mark.parametrize("name, jobs", [
+    ("greenhouse_board.html", 40),
+    ("jsonld_careers.html", 12),
+    ("lever_board.html", 25),
+    # Plain markup that has to go through the LLM path
+    ("card_list.html", 0),
+    ("long_text_page.html", 0),
+])
+def test_fixture_pages_yield_a_fixed_number_of_structured_jobs(name, jobs):
+    assert name in fixture_names()
+    assert len(extract_structured_jobs(read_fixture(name), "Acme")) == jobs
+
+
+def write_results(path, rows):
+    with open(path, "w") as f:
+        json.dump({"meta": {}, "results": rows}, f)
+
+
+@pytest.mark.parametrize("candidate, exit_code", [
+    ({"p95_ms": 105.0, "throughput_rps": 48.0}, 0),
+    ({"p95_ms": 130.0, "throughput_rps": 50.0}, 1),
+    ({"p95_ms": 100.0, "throughput_rps": 40.0}, 1),
+])
+def test_compare_exits_nonzero_on_regressions(tmp_path, monkeypatch, capsys, candidate, exit_code):
+    row = {"suite": "load", "name": "generate_email", "concurrency": 8}
+    write_results(tmp_path / "baseline.json", [{**row, "p95_ms": 100.0, "throughput_rps": 50.0}])
+    write_results(tmp_path / "candidate.json", [{**row, **candidate}])
+    monkeypatch.setattr("sys.argv", [
+        "compare", str(tmp_path / "baseline.json"), str(tmp_path / "candidate.json"), "--threshold", "10"
+    ])
+
+    with pytest.raises(SystemExit) as exit_info:
+        compare.main()
+
+    assert exit_info.value.code == exit_code
+    assert f"{exit_code} regression(s)" in capsys.readouterr().out
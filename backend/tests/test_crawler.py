@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.crawler import CRAWLER_USER_AGENT, CareerSiteCrawler, normalize_url
+from services.http_client import FetchedPage
+
+
+def test_normalize_url_drops_only_tracking_keys():
+    url = "https://Example.com/jobs/?ref=x&referrer=y&reference=42&refine=eng&utm_source=z&page=2"
+
+    assert normalize_url(url) == "https://example.com/jobs?page=2&reference=42&refine=eng"
+
+
+class RecordingFetcher:
+    def __init__(self):
+        self.requests = []
+
+    async def fetch(self, url, headers=None):
+        self.requests.append((url, headers))
+        body = b"User-agent: *\nDisallow:\n" if url.endswith("/robots.txt") else b"<html></html>"
+        return FetchedPage(url, 200, body, {})
+
+
+class EmptyExtractor:
+    async def extract_content(self, url, content):
+        class Result:
+            source = "llm"
+            jobs = []
+        return Result()
+
+
+def test_crawler_fetches_robots_and_pages_as_its_user_agent():
+    fetcher = RecordingFetcher()
+    crawler = CareerSiteCrawler(EmptyExtractor(), fetcher)
+
+    async def run():
+        return [page async for page in crawler.crawl("https://example.com/careers", max_depth=0)]
+
+    pages = asyncio.run(run())
+
+    assert [page.error for page in pages] == [None]
+    assert [url for url, _ in fetcher.requests] == ["https://example.com/robots.txt", "https://example.com/careers"]
+    assert all(headers["User-Agent"] == CRAWLER_USER_AGENT for _, headers in fetcher.requests)
+
+
+class RobotsStatusFetcher(RecordingFetcher):
+    def __init__(self, status_code):
+        super().__init__()
+        self.status_code = status_code
+
+    async def fetch(self, url, headers=None):
+        if url.endswith("/robots.txt"):
+            self.requests.append((url, headers))
+            request = httpx.Request("GET", url)
+            response = httpx.Response(self.status_code, request=request)
+            raise httpx.HTTPStatusError("robots.txt", request=request, response=response)
+        return await super().fetch(url, headers)
+
+
+@pytest.mark.parametrize("status_code, error", [
+    (401, "Disallowed by robots.txt"),
+    (403, "Disallowed by robots.txt"),
+    (404, None),
+])
+def test_auth_denied_robots_txt_disallows_the_host(status_code, error):
+    crawler = CareerSiteCrawler(EmptyExtractor(), RobotsStatusFetcher(status_code))
+
+    async def run():
+        return [page async for page in crawler.crawl("https://example.com/careers", max_depth=0)]
+
+    assert [page.error for page in asyncio.run(run())] == [error]
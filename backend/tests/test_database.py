@@ -0,0 +1,106 @@
+import sqlite3
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import postgresql
+
+from config import database
+
+# email_history as created by releases before the cached and fallback flags and the keyset index
+BASELINE_SCHEMA = """
+CREATE TABLE email_history (
+    id VARCHAR NOT NULL PRIMARY KEY,
+    user_id VARCHAR,
+    subject VARCHAR,
+    content TEXT,
+    job_data TEXT,
+    portfolio_links TEXT,
+    created_at DATETIME
+);
+CREATE INDEX ix_email_history_id ON email_history (id);
+CREATE INDEX ix_email_history_user_id ON email_history (user_id);
+INSERT INTO email_history VALUES ('e1', 'u1', 'Hello', 'Body', '{}', '[]', '2024-01-01 00:00:00');
+"""
+
+
+def test_upgrade_adds_columns_and_indexes_to_baseline_database(tmp_path):
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+
+    engine = create_engine(f"sqlite:///{path}")
+    database._create_tables(engine)
+    # A second start, or another worker, finds nothing left to do
+    database._upgrade_schema(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("email_history")}
+    for name in database._ADDED_COLUMNS["email_history"]:
+        assert name in columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("email_history")}
+    assert "ix_email_history_user_created" in indexes
+
+    with engine.connect() as connection:
+        row = connection.exec_driver_sql("SELECT id, cached, fallback FROM email_history").one()
+    assert row == ("e1", 0, 0)
+
+
+def test_added_column_ddl_compiles_for_postgres():
+    dialect = postgresql.dialect()
+
+    for name in database._ADDED_COLUMNS["email_history"]:
+        assert database._add_column_ddl("email_history", name, dialect) == (
+            f"ALTER TABLE email_history ADD COLUMN {name} BOOLEAN DEFAULT false"
+        )
+
+
+# email_history_fts as created by releases that keyed it on email_history's rowid
+LEGACY_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE email_history_fts USING fts5(owner, subject, body, title, company, skills, content='');
+CREATE TRIGGER email_history_fts_insert AFTER INSERT ON email_history BEGIN
+    INSERT INTO email_history_fts (rowid, owner, subject, body) VALUES (new.rowid, new.user_id, new.subject, new.content);
+END;
+CREATE TRIGGER email_history_fts_delete AFTER DELETE ON email_history BEGIN
+    INSERT INTO email_history_fts (email_history_fts, rowid, owner, subject, body)
+    VALUES ('delete', old.rowid, old.user_id, old.subject, old.content);
+END;
+"""
+
+SEARCH_IDS_SQL = """
+SELECT h.id FROM email_history_fts AS f
+JOIN email_history_search_keys AS k ON k.search_id = f.rowid
+JOIN email_history AS h ON h.id = k.email_id
+WHERE email_history_fts MATCH ? ORDER BY h.id
+"""
+
+
+def insert_email(connection, email_id: str, subject: str) -> None:
+    connection.execute(
+        "INSERT INTO email_history (id, user_id, subject, content, job_data, portfolio_links, created_at) "
+        "VALUES (?, 'u1', ?, 'Body', '{\"company\": \"Acme\"}', '[]', '2024-01-01 00:00:00')",
+        (email_id, subject)
+    )
+
+
+def test_search_index_migrates_legacy_layout_and_survives_vacuum(tmp_path):
+    path = tmp_path / "legacy.db"
+    engine = create_engine(f"sqlite:///{path}")
+    database._create_tables(engine)
+    with sqlite3.connect(path) as connection:
+        connection.executescript(LEGACY_FTS_SCHEMA)
+        for email_id, subject in [("e1", "Kubernetes engineers"), ("e2", "Data team"), ("e3", "Kubernetes help")]:
+            insert_email(connection, email_id, subject)
+
+    assert database._create_history_search_index(engine)
+    # A second worker finds the migrated layout and leaves it alone
+    assert database._create_history_search_index(engine)
+
+    connection = sqlite3.connect(path)
+    assert [row[0] for row in connection.execute(SEARCH_IDS_SQL, ("kubernetes",))] == ["e1", "e3"]
+
+    connection.execute("DELETE FROM email_history WHERE id = 'e1'")
+    insert_email(connection, "e4", "Kubernetes platform")
+    connection.commit()
+    connection.execute("VACUUM")
+
+    assert [row[0] for row in connection.execute(SEARCH_IDS_SQL, ("kubernetes",))] == ["e3", "e4"]
+    assert [row[0] for row in connection.execute(SEARCH_IDS_SQL, ("data",))] == ["e2"]
+    connection.close()
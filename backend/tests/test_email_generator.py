@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+# The email prompt is a langchain PromptTemplate
+pytest.importorskip("langchain")
+
+from models.schemas import JobListing
+from services.email_generator import EmailGeneratorService, EmailStreamParser
+
+COMPLETION = "SUBJECT: Engineers for your {title} role\n\nEMAIL:\nHi team,\nwe can help with {title}."
+
+
+class StubLLM:
+    """Answers by job title: "broken" raises, "rambling" returns unparseable prose"""
+
+    def __init__(self):
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+        self.fallbacks = []
+
+    async def complete(self, prompt):
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if "Broken" in prompt:
+                raise ConnectionError("backend unavailable")
+            if "Rambling" in prompt:
+                return "Sure, here are some thoughts about hiring."
+            title = prompt.split("regarding their ", 1)[1].split(" position", 1)[0]
+            return COMPLETION.format(title=title)
+        finally:
+            self.in_flight -= 1
+
+    def record_fallback(self, kind):
+        self.fallbacks.append(kind)
+
+
+def stub_generator():
+    llm = StubLLM()
+
+    class Generator(EmailGeneratorService):
+        @property
+        def llm(self):
+            return llm
+
+    generator = Generator()
+
+    async def links_batch(jobs):
+        return [["https://atliq.example/portfolio"] for _ in jobs]
+
+    generator.portfolio_service.get_matching_portfolio_batch = links_batch
+    return generator, llm
+
+
+def job(index: int, title: str) -> JobListing:
+    return JobListing(
+        id=f"job-{index}", title=title, skills=["Python"], experience="3 years",
+        description=f"{title} at Acme", company="Acme"
+    )
+
+
+def test_batch_reports_errors_per_job_without_failing_the_rest():
+    generator, llm = stub_generator()
+    jobs = [job(0, "Data Engineer"), job(1, "Broken Engineer"), job(2, "Rambling Engineer"), job(3, "SRE")]
+
+    async def run():
+        return [result async for result in generator.generate_emails(jobs, "user-1", concurrency=2, bypass_cache=True)]
+
+    results = sorted(asyncio.run(run()), key=lambda result: result.index)
+    generator.close()
+
+    assert [result.jobId for result in results] == ["job-0", "job-1", "job-2", "job-3"]
+    assert results[0].email.subject == "Engineers for your Data Engineer role"
+    assert results[3].email.subject == "Engineers for your SRE role"
+    assert results[1].email is None and results[1].error == "backend unavailable"
+    assert results[2].email is None and "Could not parse" in results[2].error
+    assert results[0].error is None and not results[0].email.fallback
+    assert llm.peak <= 2
+
+
+def test_generated_email_is_served_from_the_response_cache_next_time():
+    generator, llm = stub_generator()
+    listing = job(0, "Cache Test Engineer")
+
+    async def run():
+        first = await generator.generate_email(listing, "user-1", portfolio_links=["https://atliq.example/a"])
+        second = await generator.generate_email(listing, "user-1", portfolio_links=["https://atliq.example/a"])
+        return first, second
+
+    first, second = asyncio.run(run())
+    generator.close()
+
+    assert len(llm.prompts) == 1
+    assert (first.cached, second.cached) == (False, True)
+    assert second.subject == first.subject
+
+
+def test_unparseable_completions_are_not_cached():
+    generator, llm = stub_generator()
+    listing = job(0, "Rambling Engineer")
+
+    async def run():
+        return [await generator.generate_email(listing, "user-1", portfolio_links=[]) for _ in range(2)]
+
+    emails = asyncio.run(run())
+    generator.close()
+
+    assert len(llm.prompts) == 2
+    assert [(email.fallback, email.cached) for email in emails] == [(True, False), (True, False)]
+
+
+def test_stream_parser_splits_subject_and_body_across_token_boundaries():
+    parser = EmailStreamParser()
+    completion = COMPLETION.format(title="SRE")
+
+    events = []
+    for i in range(0, len(completion), 3):
+        events.extend(parser.feed(completion[i:i + 3]))
+
+    assert events[0] == ("subject", "Engineers for your SRE role")
+    assert "".join(text for event, text in events if event == "content").strip() == "Hi team,\nwe can help with SRE."
+    assert parser.finish() == ("Engineers for your SRE role", "Hi team,\nwe can help with SRE.")
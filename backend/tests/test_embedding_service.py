@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.common import HashEmbedder
+from models.schemas import EmbedRequest
+from services.embedding_service import (
+    EmbeddingBatcher, EmbeddingClient, create_app, decode_matrix, encode_matrix
+)
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        if self.error:
+            raise self.error
+        return super().encode(texts, **kwargs)
+
+
+def sidecar_client(sidecar: TestClient) -> EmbeddingClient:
+    """Client whose requests go to the in-process sidecar app"""
+    client = EmbeddingClient("http://testserver")
+    client.close()
+    client._client = sidecar
+    return client
+
+
+def test_matrices_round_trip_through_base64():
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4) / 7
+
+    payload = encode_matrix(matrix)
+
+    assert payload["shape"] == [3, 4]
+    assert np.array_equal(decode_matrix(payload), matrix)
+
+
+def test_concurrent_requests_are_merged_into_one_encode_call():
+    model = CountingEmbedder()
+
+    async def run():
+        batcher = EmbeddingBatcher(model, max_batch=64, wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.embed(EmbedRequest(texts=["python api", "go services"], normalize=True)),
+                batcher.embed(EmbedRequest(texts=["react frontend"], normalize=False)),
+                batcher.embed(EmbedRequest(texts=["kafka streams"], normalize=True)),
+            )
+        finally:
+            await batcher.stop()
+
+    first, second, third = asyncio.run(run())
+
+    assert model.calls == [["python api", "go services", "react frontend", "kafka streams"]]
+    assert np.allclose(first, HashEmbedder().encode(["python api", "go services"], normalize_embeddings=True))
+    assert np.allclose(second, HashEmbedder().encode(["react frontend"]))
+    assert np.allclose(np.linalg.norm(third, axis=1), 1.0)
+
+
+def test_batches_are_capped_at_max_batch_texts():
+    model = CountingEmbedder()
+
+    async def run():
+        batcher = EmbeddingBatcher(model, max_batch=2, wait_ms=20)
+        batcher.start()
+        try:
+            await asyncio.gather(*(batcher.embed(EmbedRequest(texts=[f"text {i}"])) for i in range(5)))
+        finally:
+            await batcher.stop()
+
+    asyncio.run(run())
+
+    assert [len(call) for call in model.calls] == [2, 2, 1]
+
+
+def test_encode_failures_reach_every_merged_request():
+    model = CountingEmbedder(error=RuntimeError("out of memory"))
+
+    async def run():
+        batcher = EmbeddingBatcher(model, wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.embed(EmbedRequest(texts=["a"])),
+                batcher.embed(EmbedRequest(texts=["b"])),
+                return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+
+    assert [str(result) for result in results] == ["out of memory", "out of memory"]
+
+
+def test_client_gets_the_sidecar_embeddings():
+    with TestClient(create_app(loader=CountingEmbedder)) as sidecar:
+        client = sidecar_client(sidecar)
+
+        embeddings = client.encode(["python api", "go services"], normalize_embeddings=True)
+
+        assert embeddings.shape == (2, 384)
+        assert np.allclose(embeddings, HashEmbedder().encode(["python api", "go services"], normalize_embeddings=True))
+        assert sidecar.post("/embed", json={"texts": []}).json()["shape"] == [0, 0]
+        assert sidecar.get("/health").json()["status"] == "healthy"
+
+
+def test_sidecar_reports_encode_failures_as_server_errors():
+    with TestClient(create_app(loader=lambda: CountingEmbedder(error=RuntimeError("out of memory")))) as sidecar:
+        client = sidecar_client(sidecar)
+
+        response = sidecar.post("/embed", json={"texts": ["a"]})
+        assert response.status_code == 500
+        assert "out of memory" in response.json()["detail"]
+        with pytest.raises(httpx.HTTPStatusError):
+            client.encode(["a"])
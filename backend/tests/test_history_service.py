@@ -0,0 +1,115 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+from config.database import FailedEmailHistory
+from services import history_service
+from services.history_service import HistoryService, HISTORY_WRITE_FAILURES
+
+
+def make_email(subject: str = "Engineers for your open role", **job) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "subject": subject,
+        "content": "Hello, we provide dedicated engineers.",
+        "jobListing": {
+            "id": "job-1", "title": "Backend Engineer", "skills": ["Python"], "experience": "3+ years",
+            "description": "Build APIs", "company": "Acme", **job
+        },
+        "portfolioLinks": ["https://atliq.com/portfolio/ml-dashboard"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def failures(outcome: str) -> float:
+    return sum(value for _, labels, value in HISTORY_WRITE_FAILURES.samples() if labels["outcome"] == outcome)
+
+
+def test_failed_write_behind_row_is_dead_lettered():
+    user_id = f"user-{uuid.uuid4()}"
+    email = make_email()
+    before = failures("dead_lettered")
+
+    async def run():
+        service = HistoryService()
+        service.start()
+        await service.save_email(user_id, email)
+        await service._wait_for_pending(user_id)
+        # Same primary key: the insert fails after the save was acknowledged
+        await service.save_email(user_id, {**email, "subject": "Duplicate"})
+        await service.stop()
+        return service
+
+    service = asyncio.run(run())
+
+    assert failures("dead_lettered") == before + 1
+    with service.session_factory() as db:
+        failed = db.query(FailedEmailHistory).filter(FailedEmailHistory.user_id == user_id).all()
+    assert len(failed) == 1
+    assert failed[0].email_id == email["id"]
+    assert json.loads(failed[0].payload)["subject"] == "Duplicate"
+    assert "IntegrityError" in failed[0].error
+
+
+def test_search_does_not_match_the_owner_id():
+    user_id = "7fdc3a10-73aa-4e5b-9d1c-2f3b4c5d6e7f"
+    email = make_email("Kubernetes platform engineers", company="Initech")
+
+    async def run():
+        service = HistoryService()
+        await service.save_email(user_id, email)
+        return {query: await service.search(user_id, query) for query in ["7", "73", "fdc3", "7fdc3a10", "kube", "initech"]}
+
+    results = asyncio.run(run())
+
+    for query in ["7", "73", "fdc3", "7fdc3a10"]:
+        assert results[query]["emails"] == [], query
+    assert [match["id"] for match in results["kube"]["emails"]] == [email["id"]]
+    assert [match["id"] for match in results["initech"]["emails"]] == [email["id"]]
+
+
+def test_fallback_flag_round_trips_through_every_read_path():
+    user_id = f"user-{uuid.uuid4()}"
+    email = {**make_email("Templated outreach"), "fallback": True}
+
+    async def run():
+        service = HistoryService()
+        await service.save_email(user_id, email)
+        _, body = await service.get_history_response(user_id)
+        return (
+            await service.get_user_history(user_id),
+            json.loads(body)["emails"],
+            (await service.search(user_id, "templated"))["emails"]
+        )
+
+    history, response, matches = asyncio.run(run())
+
+    assert [saved.fallback for saved in history] == [True]
+    assert [saved["fallback"] for saved in response] == [True]
+    assert [match["fallback"] for match in matches] == [True]
+
+
+def test_response_cache_is_bounded_by_total_bytes(monkeypatch):
+    monkeypatch.setattr(history_service, "HISTORY_RESPONSE_CACHE_BYTES", 250)
+    monkeypatch.setattr(history_service, "HISTORY_RESPONSE_CACHE_ENTRY_BYTES", 200)
+    service = HistoryService()
+
+    service._cache_response("u1", 1, "all", b"x" * 100)
+    service._cache_response("u2", 1, "all", b"x" * 100)
+    # Replacing a variant counts only the new body
+    service._cache_response("u2", 1, "all", b"x" * 120)
+    assert list(service._responses) == ["u1", "u2"]
+    assert service._response_bytes == 220
+
+    # Past the budget the least recently used user goes first
+    service._cache_response("u3", 1, "all", b"x" * 100)
+    assert list(service._responses) == ["u2", "u3"]
+    assert service._response_bytes == 220
+
+    # Bodies over the entry cap are served but never cached
+    service._cache_response("u4", 1, "all", b"x" * 201)
+    assert "u4" not in service._responses
+
+    service._drop_responses("u2")
+    assert service._response_bytes == 100
@@ -0,0 +1,35 @@
+from services.html_chunker import prepare_chunks
+
+BENEFITS_AND_PLAIN_POSTINGS = """
+<html><body>
+  <ul class="benefits">
+    <li class="benefit">Remote-first team across twelve countries</li>
+    <li class="benefit">Learning budget of two thousand dollars a year</li>
+    <li class="benefit">Sixteen weeks of fully paid parental leave</li>
+  </ul>
+  <h2>Senior Backend Engineer</h2>
+  <p>Build and operate payment services in Python and Go on AWS.</p>
+  <h2>Data Scientist</h2>
+  <p>Own pricing models and experiment analysis for the checkout team.</p>
+</body></html>
+"""
+
+
+def test_text_outside_repeated_blocks_is_kept():
+    text = "\n".join(prepare_chunks(BENEFITS_AND_PLAIN_POSTINGS, 6000))
+
+    assert "Remote-first team" in text
+    assert "Senior Backend Engineer" in text
+    assert "Own pricing models" in text
+
+
+def test_oversized_repeated_blocks_are_kept():
+    long_posting = "Responsibilities include " + "shipping reliable services, " * 200
+    cards = "".join(f'<div class="card"><h3>Role {i}</h3><p>Short summary of role {i}.</p></div>' for i in range(3))
+    html = f'<div class="cards">{cards}</div><div class="cards">' \
+           f'<div class="posting"><h3>Staff Engineer</h3><p>{long_posting}</p></div></div>'
+
+    text = "\n".join(prepare_chunks(html, 6000))
+
+    assert "Role 2" in text
+    assert "Staff Engineer" in text
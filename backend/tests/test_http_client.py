@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.http_client import PageFetcher, PageTooLargeError
+
+
+def stub_fetcher(handler, max_bytes: int = 1024, per_host_limit: int = 4) -> PageFetcher:
+    """Fetcher whose requests are answered by handler(request) in process"""
+    fetcher = PageFetcher()
+    fetcher.max_bytes = max_bytes
+    fetcher.per_host_limit = per_host_limit
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher
+
+
+def fetch(fetcher: PageFetcher, url: str, headers=None):
+    async def run():
+        try:
+            return await fetcher.fetch(url, headers=headers)
+        finally:
+            await fetcher.close()
+
+    return asyncio.run(run())
+
+
+def test_fetch_returns_body_and_headers():
+    fetcher = stub_fetcher(lambda request: httpx.Response(200, content=b"<html>jobs</html>", headers={"ETag": '"v1"'}))
+
+    page = fetch(fetcher, "https://acme.example/careers")
+
+    assert page.status_code == 200
+    assert page.content == b"<html>jobs</html>"
+    assert page.headers["etag"] == '"v1"'
+
+
+def test_not_modified_is_returned_with_the_request_validators_sent():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        return httpx.Response(304)
+
+    page = fetch(stub_fetcher(handler), "https://acme.example/careers", headers={"If-None-Match": '"v1"'})
+
+    assert seen == ['"v1"']
+    assert page.status_code == 304
+    assert page.content == b""
+
+
+def test_declared_oversized_page_is_rejected():
+    fetcher = stub_fetcher(
+        lambda request: httpx.Response(200, content=b"x" * 10, headers={"Content-Length": "4096"})
+    )
+
+    with pytest.raises(PageTooLargeError):
+        fetch(fetcher, "https://acme.example/careers")
+
+
+def test_streamed_body_is_cut_off_past_the_size_cap():
+    async def body():
+        for _ in range(8):
+            yield b"x" * 256
+
+    # No content-length, so only the streamed byte count can trip the cap
+    fetcher = stub_fetcher(lambda request: httpx.Response(200, content=body()))
+
+    with pytest.raises(PageTooLargeError):
+        fetch(fetcher, "https://acme.example/careers")
+
+
+def test_error_status_raises():
+    fetcher = stub_fetcher(lambda request: httpx.Response(404))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(fetcher, "https://acme.example/careers")
+
+
+def test_requests_are_limited_per_host():
+    in_flight = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, content=b"ok")
+
+    async def run():
+        fetcher = stub_fetcher(handler, per_host_limit=2)
+        try:
+            urls = [f"https://{host}/jobs/{i}" for host in ("a.example", "b.example") for i in range(6)]
+            return await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+        finally:
+            await fetcher.close()
+
+    pages = asyncio.run(run())
+
+    assert len(pages) == 12
+    assert peak == {"a.example": 2, "b.example": 2}
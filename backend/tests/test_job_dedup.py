@@ -0,0 +1,63 @@
+from services.job_dedup import NearDuplicateIndex, job_id, simhash
+
+DESCRIPTION = (
+    "Design and operate the payments platform, build Python services on AWS, "
+    "own on-call for the checkout APIs and mentor two engineers."
+)
+
+
+def entry(title: str, description: str = DESCRIPTION, company: str = "acme"):
+    return job_id(company, title, description), simhash(title, description), company
+
+
+def test_duplicate_of_points_from_repost_to_original_and_is_stable(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "jobs.db"))
+    original = entry("Senior Backend Engineer")
+    repost = entry("Sr. Backend Engineer")
+
+    assert index.assign([original])[0] == [None]
+    assert index.assign([repost])[0] == [original[0]]
+    # Re-extracting either listing gives the same answers
+    assert index.assign([original])[0] == [None]
+    assert index.assign([repost])[0] == [original[0]]
+
+
+def test_batch_and_streaming_agree_on_same_page_duplicates(tmp_path):
+    original = entry("Senior Backend Engineer")
+    repost = entry("Sr. Backend Engineer")
+
+    batch = NearDuplicateIndex(str(tmp_path / "batch.db"))
+    streaming = NearDuplicateIndex(str(tmp_path / "streaming.db"))
+
+    batch_result = batch.assign([original, repost])[0]
+    streaming_result = [streaming.assign([item])[0][0] for item in (original, repost)]
+
+    assert batch_result == streaming_result == [None, original[0]]
+
+
+def test_order_survives_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    original = entry("Senior Backend Engineer")
+    repost = entry("Sr. Backend Engineer")
+
+    first = NearDuplicateIndex(path)
+    _, added = first.assign([original, repost])
+    first.persist(added)
+    first.close()
+
+    reopened = NearDuplicateIndex(path)
+    assert reopened.assign([repost, original])[0] == [original[0], None]
+
+
+def test_stored_fingerprints_load_on_first_assign_not_on_open(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    original = entry("Senior Backend Engineer")
+
+    first = NearDuplicateIndex(path)
+    first.persist(first.assign([original])[1])
+    first.close()
+
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 0
+    assert reopened.assign([entry("Sr. Backend Engineer")])[0] == [original[0]]
+    assert len(reopened) == 2
@@ -0,0 +1,166 @@
+import asyncio
+
+import httpx
+import pytest
+
+# The extraction prompt is a langchain PromptTemplate
+pytest.importorskip("langchain")
+
+from services.job_extractor import JobExtractorService
+
+PAGE = b"<html><body><h1>Careers at Acme</h1><p>" + b"We are hiring engineers. " * 20 + b"</p></body></html>"
+
+
+class StubLLM:
+    def __init__(self, completion: str):
+        self.completion = completion
+        self.fallbacks = []
+
+    async def stream(self, prompt):
+        for i in range(0, len(self.completion), 7):
+            yield self.completion[i:i + 7]
+
+    def record_fallback(self, kind):
+        self.fallbacks.append(kind)
+
+
+def stream_page(completion: str):
+    llm = StubLLM(completion)
+
+    class Extractor(JobExtractorService):
+        @property
+        def llm(self):
+            return llm
+
+    extractor = Extractor()
+    cached = []
+
+    async def load_page(url):
+        return PAGE, None, {}
+
+    extractor._load_page = load_page
+    extractor.page_cache.put_extraction = lambda text_hash, jobs: cached.append(jobs)
+
+    async def run():
+        try:
+            return [event async for event in extractor.stream_page("https://acme.example/careers")]
+        finally:
+            await extractor.close()
+
+    return asyncio.run(run()), llm, cached
+
+
+def test_stream_page_falls_back_when_the_model_returns_prose():
+    events, llm, cached = stream_page("I could not find any job listings on this page, sorry!")
+
+    done = events[-1][1]
+    assert done["source"] == "fallback"
+    assert done["jobs"] == len([event for event in events if event[0] == "job"]) > 0
+    assert llm.fallbacks == ["extraction"]
+    assert cached == []
+
+
+def test_stream_page_keeps_an_explicit_empty_jobs_array_uncached():
+    events, llm, cached = stream_page('Here you go: {"jobs": []}')
+
+    assert events[-1][1]["source"] == "llm"
+    assert events[-1][1]["jobs"] == 0
+    assert llm.fallbacks == []
+    assert cached == []
+
+
+def test_stream_page_caches_streamed_jobs():
+    events, llm, cached = stream_page(
+        '{"jobs": [{"title": "Backend Engineer", "skills": ["Go"], "experience": "3 years", '
+        '"description": "Build APIs", "company": "Acme"}]}'
+    )
+
+    assert [event[1]["title"] for event in events if event[0] == "job"] == ["Backend Engineer"]
+    assert events[-1][1]["source"] == "llm"
+    assert [[job["title"] for job in jobs] for jobs in cached] == [["Backend Engineer"]]
+
+
+JOB_POSTING_PAGE = b"""
+<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "JobPosting", "title": "Platform Engineer",
+ "description": "Run our Kubernetes platform", "hiringOrganization": {"name": "Acme"}}
+</script></head><body>Careers</body></html>
+"""
+
+
+def test_structured_pages_are_stored_for_revalidation():
+    extractor = JobExtractorService()
+
+    async def run():
+        try:
+            first = await extractor.extract_content(
+                "https://acme.example/careers", JOB_POSTING_PAGE, etag='"v1"'
+            )
+            page = extractor.page_cache.get_page("https://acme.example/careers")
+            return first, page, extractor.page_cache.get_extraction(page.text_hash)
+        finally:
+            await extractor.close()
+
+    first, page, cached_jobs = asyncio.run(run())
+
+    assert first.source == "structured"
+    assert page.etag == '"v1"'
+    assert [job["title"] for job in cached_jobs] == ["Platform Engineer"]
+
+
+def test_batch_reports_failures_per_url_in_request_order():
+    extractor = JobExtractorService()
+
+    async def load_page(url):
+        if "broken" in url:
+            raise ConnectionError("connection refused")
+        return JOB_POSTING_PAGE, None, {}
+
+    extractor._load_page = load_page
+
+    async def run():
+        try:
+            return await extractor.extract_jobs_batch([
+                "https://acme.example/careers",
+                "https://broken.example/careers",
+                "https://globex.example/careers",
+            ])
+        finally:
+            await extractor.close()
+
+    results = asyncio.run(run())
+
+    assert [result.url for result in results] == [
+        "https://acme.example/careers", "https://broken.example/careers", "https://globex.example/careers"
+    ]
+    assert [result.source for result in results] == ["structured", "fallback", "structured"]
+    assert results[1].error == "connection refused"
+    assert results[0].error is None and results[2].error is None
+
+
+def test_unchanged_page_is_revalidated_and_answered_from_the_extraction_cache():
+    extractor = JobExtractorService()
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=JOB_POSTING_PAGE, headers={"ETag": '"v1"'})
+
+    extractor.fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        try:
+            first = await extractor.extract_page("https://revalidate.example/careers")
+            second = await extractor.extract_page("https://revalidate.example/careers")
+            return first, second
+        finally:
+            await extractor.close()
+
+    first, second = asyncio.run(run())
+
+    assert requests == [None, '"v1"']
+    assert first.source == "structured"
+    assert second.source == "cache"
+    assert [job.title for job in second.jobs] == [job.title for job in first.jobs] == ["Platform Engineer"]
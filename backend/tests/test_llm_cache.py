@@ -0,0 +1,93 @@
+import pytest
+
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMResponseCache
+
+INPUTS = {"job_title": "Backend Engineer", "company": "Acme", "skills": "Go, Python"}
+
+
+class Clock:
+    """Manually advanced stand-in for time.time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.db"), max_entries=2, ttl_seconds=60)
+    yield cache
+    cache.close()
+
+
+def test_key_ignores_whitespace_case_and_input_order():
+    key = LLMResponseCache.make_key("llama", INPUTS)
+
+    assert LLMResponseCache.make_key("llama", {
+        "skills": "go,  python ",
+        "company": "ACME",
+        "job_title": "  backend\n\tengineer",
+    }) == key
+
+
+def test_key_depends_on_model_and_content():
+    key = LLMResponseCache.make_key("llama", INPUTS)
+
+    assert LLMResponseCache.make_key("mistral", INPUTS) != key
+    assert LLMResponseCache.make_key("llama", {**INPUTS, "skills": "Go, Rust"}) != key
+    assert LLMResponseCache.make_key("llama", {**INPUTS, "company": "AcmeCorp"}) != key
+
+
+def test_round_trip_counts_hits_and_misses(cache):
+    cache.put("k1", "llama", "SUBJECT: Hi")
+
+    assert cache.get("k1") == "SUBJECT: Hi"
+    assert cache.get("k2") is None
+    assert cache.stats() == {
+        "hits": 1, "misses": 1, "entries": 1, "max_entries": 2, "ttl_seconds": 60
+    }
+
+
+def test_entries_expire_after_the_ttl(cache, clock):
+    cache.put("k1", "llama", "first")
+
+    clock.now += 59
+    assert cache.get("k1") == "first"
+
+    # Reads refresh recency but not age, so the entry still expires on time
+    clock.now += 2
+    assert cache.get("k1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_past_max_entries(cache, clock):
+    cache.put("k1", "llama", "first")
+    clock.now += 1
+    cache.put("k2", "llama", "second")
+    clock.now += 1
+    assert cache.get("k1") == "first"
+    clock.now += 1
+    cache.put("k3", "llama", "third")
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") == "first"
+    assert cache.get("k3") == "third"
+
+
+def test_purge_drops_everything(cache):
+    cache.put("k1", "llama", "first")
+    cache.put("k2", "llama", "second")
+
+    assert cache.purge() == 2
+    assert cache.get("k1") is None
+    assert cache.stats()["entries"] == 0
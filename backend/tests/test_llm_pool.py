@@ -0,0 +1,136 @@
+import asyncio
+import json
+from collections import Counter
+
+import httpx
+import pytest
+
+from services.llm_pool import LLMPool, LLM_BREAKER_FAILURES
+
+BACKENDS = ["http://llm-a", "http://llm-b"]
+
+
+def stub_pool(handler, endpoints=BACKENDS) -> LLMPool:
+    """Pool whose HTTP calls are answered by handler(request) in process"""
+    pool = LLMPool("stub-model", endpoints)
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+def backend_of(request: httpx.Request) -> str:
+    return f"{request.url.scheme}://{request.url.host}"
+
+
+def test_calls_are_spread_over_backends_by_outstanding_requests():
+    calls = Counter()
+
+    async def handler(request):
+        calls[backend_of(request)] += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"response": json.loads(request.content)["prompt"]})
+
+    async def run():
+        pool = stub_pool(handler)
+        try:
+            return await asyncio.gather(*(pool.complete(f"prompt {i}") for i in range(8)))
+        finally:
+            await pool.close()
+
+    results = asyncio.run(run())
+
+    assert results == [f"prompt {i}" for i in range(8)]
+    assert calls == {"http://llm-a": 4, "http://llm-b": 4}
+
+
+def test_identical_concurrent_prompts_share_one_call():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"response": "shared"})
+
+    async def run():
+        pool = stub_pool(handler)
+        try:
+            results = await asyncio.gather(*(pool.complete("same prompt") for _ in range(5)))
+            return results, pool.coalesced
+        finally:
+            await pool.close()
+
+    results, coalesced = asyncio.run(run())
+
+    assert results == ["shared"] * 5
+    assert len(calls) == 1
+    assert coalesced == 4
+
+
+def test_server_errors_open_the_breaker_and_fail_over():
+    calls = Counter()
+
+    def handler(request):
+        backend = backend_of(request)
+        calls[backend] += 1
+        if backend == "http://llm-a":
+            return httpx.Response(503, json={"error": "overloaded"})
+        return httpx.Response(200, json={"response": "ok"})
+
+    async def run():
+        pool = stub_pool(handler)
+        try:
+            results = [await pool.complete(f"prompt {i}") for i in range(LLM_BREAKER_FAILURES + 2)]
+            return results, pool.backends[0].breaker.state
+        finally:
+            await pool.close()
+
+    results, state = asyncio.run(run())
+
+    assert results == ["ok"] * (LLM_BREAKER_FAILURES + 2)
+    assert state == "open"
+    # Once open, the failing backend is skipped instead of tried first
+    assert calls["http://llm-a"] == LLM_BREAKER_FAILURES
+
+
+def test_rejected_requests_do_not_trip_the_breaker():
+    calls = Counter()
+
+    def handler(request):
+        calls[backend_of(request)] += 1
+        return httpx.Response(404, json={"error": "model 'stub-model' not found"})
+
+    async def run():
+        pool = stub_pool(handler)
+        try:
+            for i in range(LLM_BREAKER_FAILURES + 2):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await pool.complete(f"prompt {i}")
+            return [backend.breaker.state for backend in pool.backends]
+        finally:
+            await pool.close()
+
+    states = asyncio.run(run())
+
+    assert states == ["closed", "closed"]
+    # The same request would be rejected everywhere, so it is not retried
+    assert sum(calls.values()) == LLM_BREAKER_FAILURES + 2
+
+
+def test_stream_fails_over_before_the_first_token():
+    def handler(request):
+        if backend_of(request) == "http://llm-a":
+            raise httpx.ConnectError("connection refused", request=request)
+        lines = [{"response": "Hel"}, {"response": "lo"}, {"done": True}]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines))
+
+    async def run():
+        pool = stub_pool(handler)
+        try:
+            tokens = [token async for token in pool.stream("greet")]
+            return tokens, pool.backends[0].breaker.failures
+        finally:
+            await pool.close()
+
+    tokens, failures = asyncio.run(run())
+
+    assert tokens == ["Hel", "lo"]
+    assert failures == 1
@@ -0,0 +1,116 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.metrics import (
+    HTTP_REQUEST_SECONDS, STAGE_ERRORS, STAGE_SECONDS, MetricsMiddleware, MetricsRegistry, stage
+)
+
+
+def sample_value(metric, name, **labels):
+    for sample_name, sample_labels, value in metric.samples():
+        if sample_name == name and sample_labels == labels:
+            return value
+    return 0
+
+
+def test_counters_and_gauges_render_in_prometheus_text_format():
+    registry = MetricsRegistry("test")
+    requests = registry.counter("requests", "Requests served", ["route"])
+    depth = registry.gauge("queue_depth", "Items queued")
+
+    requests.inc(route="/jobs")
+    requests.inc(2, route="/jobs")
+    requests.inc(route='/say "hi"')
+    depth.set(4)
+    depth.dec()
+
+    assert registry.render().splitlines() == [
+        "# HELP test_requests Requests served",
+        "# TYPE test_requests counter",
+        'test_requests_total{route="/jobs"} 3',
+        'test_requests_total{route="/say \\"hi\\""} 1',
+        "# HELP test_queue_depth Items queued",
+        "# TYPE test_queue_depth gauge",
+        "test_queue_depth 3",
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = MetricsRegistry("test")
+    latency = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1))
+
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, stage="llm")
+
+    assert [line for line in registry.render().splitlines() if not line.startswith("#")] == [
+        'test_latency_seconds_bucket{stage="llm",le="0.1"} 2',
+        'test_latency_seconds_bucket{stage="llm",le="1"} 3',
+        'test_latency_seconds_bucket{stage="llm",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="llm"} 3.65',
+        'test_latency_seconds_count{stage="llm"} 4',
+    ]
+
+
+def test_registering_a_name_twice_returns_the_same_metric():
+    registry = MetricsRegistry("test")
+
+    assert registry.counter("events", "Events") is registry.counter("events", "Events")
+
+
+def test_failing_collectors_do_not_break_the_scrape():
+    registry = MetricsRegistry("test")
+    depth = registry.gauge("depth", "Depth")
+
+    def broken():
+        raise RuntimeError("service not started")
+
+    registry.add_collector(broken)
+    registry.add_collector(lambda: depth.set(7))
+
+    assert "test_depth 7" in registry.render()
+
+
+def test_stage_times_successes_and_counts_failures():
+    labels = {"service": "test_metrics", "stage": "work"}
+    timed = sample_value(STAGE_SECONDS, "outreach_stage_duration_seconds_count", **labels)
+    failed = sample_value(STAGE_ERRORS, "outreach_stage_errors_total", **labels)
+
+    with stage("test_metrics", "work"):
+        pass
+    with pytest.raises(ValueError):
+        with stage("test_metrics", "work"):
+            raise ValueError("boom")
+
+    assert sample_value(STAGE_SECONDS, "outreach_stage_duration_seconds_count", **labels) == timed + 2
+    assert sample_value(STAGE_ERRORS, "outreach_stage_errors_total", **labels) == failed + 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/test-metrics/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/test-metrics/broken")
+    async def broken():
+        raise RuntimeError("boom")
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app, raise_server_exceptions=False)
+
+    for item_id in ("a", "b"):
+        assert client.get(f"/test-metrics/items/{item_id}").status_code == 200
+    assert client.get("/test-metrics/broken").status_code == 500
+    assert client.get("/test-metrics/missing").status_code == 404
+
+    def count(route, status):
+        return sample_value(
+            HTTP_REQUEST_SECONDS, "outreach_http_request_duration_seconds_count",
+            method="GET", route=route, status=status
+        )
+
+    assert count("/test-metrics/items/{item_id}", "200") == 2
+    assert count("/test-metrics/broken", "500") == 1
+    assert count("unmatched", "404") >= 1
@@ -0,0 +1,83 @@
+import itertools
+
+import pytest
+
+from services import page_cache as page_cache_module
+from services.page_cache import PageCache
+
+
+class Clock:
+    """Strictly increasing stand-in for time.time so LRU order is deterministic"""
+
+    def __init__(self):
+        self._ticks = itertools.count(1)
+
+    def time(self) -> float:
+        return float(next(self._ticks))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_cache_module, "time", Clock())
+    cache = PageCache(str(tmp_path / "pages.db"), max_bytes=100)
+    yield cache
+    cache.close()
+
+
+def test_page_round_trip_and_conditional_headers(cache):
+    cache.put_page("https://acme.example/careers", '"v1"', "Wed, 01 Jan 2025 00:00:00 GMT", b"<html>", "hash-1")
+
+    page = cache.get_page("https://acme.example/careers")
+
+    assert page.content == b"<html>"
+    assert page.text_hash == "hash-1"
+    assert page.conditional_headers() == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+    assert cache.get_page("https://globex.example/careers") is None
+
+
+def test_page_without_validators_sends_no_conditional_headers(cache):
+    cache.put_page("https://acme.example/careers", None, None, b"<html>", None)
+
+    assert cache.get_page("https://acme.example/careers").conditional_headers() == {}
+
+
+def test_extraction_round_trip_counts_hits_and_misses(cache):
+    jobs = [{"title": "Backend Engineer", "skills": ["Go"]}]
+    cache.put_extraction("hash-1", jobs)
+
+    assert cache.get_extraction("hash-1") == jobs
+    assert cache.get_extraction("hash-2") is None
+
+    stats = cache.stats()
+    assert stats["extraction_hits"] == 1
+    assert stats["extraction_misses"] == 1
+    assert stats["extractions"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_past_the_byte_budget(cache):
+    cache.put_page("https://a.example/", None, None, b"a" * 40, None)
+    cache.put_page("https://b.example/", None, None, b"b" * 40, None)
+
+    # Reading a marks it as recently used, so b is the eviction candidate
+    cache.get_page("https://a.example/")
+    cache.put_page("https://c.example/", None, None, b"c" * 40, None)
+
+    assert cache.get_page("https://a.example/") is not None
+    assert cache.get_page("https://b.example/") is None
+    assert cache.get_page("https://c.example/") is not None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 80 <= stats["max_bytes"]
+
+
+def test_pages_and_extractions_share_one_budget(cache):
+    cache.put_page("https://a.example/", None, None, b"a" * 60, None)
+    cache.put_extraction("hash-1", [{"title": "x" * 40}])
+
+    assert cache.get_page("https://a.example/") is None
+    assert cache.get_extraction("hash-1") is not None
+    assert cache.stats()["pages"] == 0
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+from services.password_hasher import PasswordHasher
+
+
+class SlowContext:
+    """Stand-in for CryptContext that blocks like bcrypt and records its threads"""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.threads = set()
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _work(self):
+        with self._lock:
+            self.threads.add(threading.current_thread().name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+
+    def hash(self, password):
+        self._work()
+        return f"hashed:{password}"
+
+    def verify(self, plain_password, hashed_password):
+        self._work()
+        return hashed_password == f"hashed:{plain_password}"
+
+
+def test_hashing_runs_in_the_pool_while_the_loop_keeps_serving():
+    context = SlowContext()
+
+    async def run():
+        hasher = PasswordHasher(context, max_workers=2, max_concurrency=8)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            hashed = await hasher.hash("s3cret")
+            verified = await asyncio.gather(hasher.verify("s3cret", hashed), hasher.verify("wrong", hashed))
+        finally:
+            ticking.cancel()
+            hasher.shutdown()
+        return hashed, verified, ticks, hasher.stats()
+
+    hashed, verified, ticks, stats = asyncio.run(run())
+
+    assert hashed == "hashed:s3cret"
+    assert verified == [True, False]
+    assert all(name.startswith("password-hash") for name in context.threads)
+    # Two sequential rounds of 50ms leave the loop plenty of time to tick
+    assert ticks >= 5
+    assert stats["calls"] == 3
+    assert stats["waiting"] == 0
+
+
+def test_concurrent_calls_are_bounded_and_counted_while_waiting():
+    context = SlowContext(seconds=0.02)
+
+    async def run():
+        hasher = PasswordHasher(context, max_workers=4, max_concurrency=2)
+        calls = [asyncio.create_task(hasher.hash(f"password-{i}")) for i in range(6)]
+        await asyncio.sleep(0.005)
+        waiting = hasher.stats()["waiting"]
+        results = await asyncio.gather(*calls)
+        hasher.shutdown()
+        return waiting, results, hasher.stats()
+
+    waiting, results, stats = asyncio.run(run())
+
+    assert waiting == 6
+    assert context.peak == 2
+    assert results == [f"hashed:password-{i}" for i in range(6)]
+    assert stats["waiting"] == 0
+    assert stats["queue_ms_max"] > 0
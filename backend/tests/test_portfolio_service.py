@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+
+from benchmarks.common import HashEmbedder
+from services.model_registry import registry
+from services.portfolio_ingest import PORTFOLIO_SEED_PATH
+from services.portfolio_service import PortfolioService, FALLBACK_PORTFOLIO_LINKS
+from services.vector_index import NumpyIndex
+
+
+def test_seed_path_does_not_depend_on_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert os.path.isabs(PORTFOLIO_SEED_PATH)
+    assert os.path.exists(PORTFOLIO_SEED_PATH)
+
+
+def test_seeds_empty_index_and_warns_when_seed_is_missing(tmp_path, monkeypatch, caplog):
+    registry.register("embedding_model", HashEmbedder)
+    monkeypatch.setattr("services.portfolio_service.create_vector_index", lambda: NumpyIndex(str(tmp_path / "index")))
+
+    seeded = PortfolioService()._load_index()
+    assert seeded.count() == 6
+
+    monkeypatch.setattr("services.portfolio_service.create_vector_index", lambda: NumpyIndex(str(tmp_path / "empty")))
+    with caplog.at_level(logging.WARNING, logger="services.portfolio_service"):
+        empty = PortfolioService(seed_path=str(tmp_path / "missing.jsonl"))._load_index()
+    assert empty.count() == 0
+    assert "missing.jsonl" in caplog.text
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return super().encode(texts, **kwargs)
+
+
+class RecordingIndex:
+    def __init__(self, error=None):
+        self.queries = []
+        self.error = error
+
+    def query(self, embeddings, k):
+        if self.error:
+            raise self.error
+        self.queries.append((len(embeddings), k))
+        return [[{"url": f"https://atliq.example/{row}/{rank}"} for rank in range(k)] for row in range(len(embeddings))]
+
+
+def stub_service(index=None):
+    embedder = CountingEmbedder()
+    index = index or RecordingIndex()
+
+    class Service(PortfolioService):
+        @property
+        def embedding_model(self):
+            return embedder
+
+        @property
+        def index(self):
+            return index
+
+    return Service(seed_path=None), embedder, index
+
+
+def test_repeated_queries_are_embedded_once():
+    service, embedder, _ = stub_service()
+
+    first = service._embed_queries(["python api", "go services", "python api"])
+    second = service._embed_queries(["go services", "react frontend"])
+
+    assert embedder.calls == [["python api", "go services"], ["react frontend"]]
+    assert first[0] == first[2]
+    assert second[0] == first[1]
+
+
+def test_embedding_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr("services.portfolio_service.EMBEDDING_CACHE_SIZE", 2)
+    service, embedder, _ = stub_service()
+
+    service._embed_queries(["a"])
+    service._embed_queries(["b"])
+    service._embed_queries(["a"])
+    service._embed_queries(["c"])
+    embedder.calls.clear()
+
+    service._embed_queries(["a", "b", "c"])
+
+    assert embedder.calls == [["b"]]
+
+
+def test_batch_matching_uses_one_embedding_pass_and_one_query():
+    service, embedder, index = stub_service()
+    jobs = [("Build APIs", ["Python"]), ("Run clusters", ["Kubernetes"]), ("Build APIs", ["Python"])]
+
+    links = asyncio.run(service.get_matching_portfolio_batch(jobs))
+
+    assert embedder.calls == [["Build APIs Python", "Run clusters Kubernetes"]]
+    assert index.queries == [(3, 3)]
+    assert links[1] == [f"https://atliq.example/1/{rank}" for rank in range(3)]
+
+
+def test_batch_matching_falls_back_per_job_when_the_index_fails():
+    service, _, _ = stub_service(RecordingIndex(error=RuntimeError("index unavailable")))
+
+    links = asyncio.run(service.get_matching_portfolio_batch([("Build APIs", ["Python"]), ("Run clusters", [])]))
+
+    assert links == [FALLBACK_PORTFOLIO_LINKS, FALLBACK_PORTFOLIO_LINKS]
+    assert asyncio.run(service.get_matching_portfolio_batch([])) == []
@@ -0,0 +1,39 @@
+from services.structured_extractor import extract_structured_jobs
+
+ANNUAL_REPORT = b"""
+<html><body>
+  <p>We cut our greenhouse gas emissions by 30% and moved our workable office space to solar.</p>
+  <div class="posting"><h5>Annual report 2023</h5></div>
+  <div class="opening"><a href="/report.pdf">Download the report</a></div>
+</body></html>
+"""
+
+LEVER_BOARD = b"""
+<html><body>
+  <div class="posting">
+    <a class="posting-title" href="https://jobs.lever.co/acme/123">
+      <h5 data-qa="posting-name">Senior Python Engineer</h5>
+    </a>
+    <div class="posting-categories">Remote - Engineering</div>
+  </div>
+</body></html>
+"""
+
+
+def test_generic_markup_without_ats_signal_falls_back_to_llm():
+    assert extract_structured_jobs(ANNUAL_REPORT, "Acme", "https://acme.example/sustainability") == []
+
+
+def test_ats_host_enables_the_vendor_parser():
+    html = b'<div class="opening"><a href="/jobs/1">Data Engineer</a><span class="location">Berlin</span></div>'
+
+    jobs = extract_structured_jobs(html, "Acme", "https://boards.greenhouse.io/acme")
+
+    assert [job["title"] for job in jobs] == ["Data Engineer"]
+
+
+def test_vendor_markup_enables_the_vendor_parser():
+    jobs = extract_structured_jobs(LEVER_BOARD, "Acme", "https://acme.example/careers")
+
+    assert [job["title"] for job in jobs] == ["Senior Python Engineer"]
+    assert jobs[0]["skills"] == ["Python"]
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+
+from services.task_queue import ExtractionQueue, TaskStore
+
+
+def test_tasks_are_private_to_their_user(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    url = "https://acme.example/careers"
+
+    task, created = store.create(url, "alice")
+    assert created
+    assert store.get(task["id"], "alice")["url"] == url
+    assert store.get(task["id"], "bob") is None
+
+    # The same URL in flight for another user is a separate task
+    other, created = store.create(url, "bob")
+    assert created and other["id"] != task["id"]
+    assert store.create(url, "alice") == (store.get(task["id"]), False)
+    store.close()
+
+
+class SlowStore(TaskStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.events = []
+        self.claiming = threading.Event()
+
+    def claim_next(self):
+        self.claiming.set()
+        time.sleep(0.2)
+        task = super().claim_next()
+        self.events.append("claimed")
+        return task
+
+    def close(self):
+        self.events.append("closed")
+        super().close()
+
+
+def test_stop_waits_for_store_calls_still_running_in_threads(tmp_path):
+    store = SlowStore(str(tmp_path / "tasks.db"))
+    queue = ExtractionQueue(extractor=None, store=store, workers=1)
+
+    async def run():
+        queue.start()
+        await asyncio.to_thread(store.claiming.wait)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert store.events[-2:] == ["claimed", "closed"]
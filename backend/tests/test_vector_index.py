@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from services.vector_index import NumpyIndex, create_vector_index
+
+
+def urls(results):
+    return [[metadata["url"] for metadata in row] for row in results]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NumpyIndex(str(tmp_path / "index"))
+    index.add(
+        ids=["api", "infra", "mobile"],
+        embeddings=[[1, 0, 0], [0, 1, 0], [0, 0, 2]],
+        metadatas=[{"url": "/api"}, {"url": "/infra"}, {"url": "/mobile"}],
+    )
+    return index
+
+
+def test_empty_index_returns_no_matches(tmp_path):
+    index = NumpyIndex(str(tmp_path / "empty"))
+
+    assert index.count() == 0
+    assert index.query([[1, 0, 0], [0, 1, 0]], 3) == [[], []]
+
+
+def test_queries_are_ranked_by_cosine_similarity(index):
+    results = index.query([[0.9, 0.3, 0.1], [0, 0.2, 5]], 2)
+
+    assert urls(results) == [["/api", "/infra"], ["/mobile", "/infra"]]
+
+
+def test_k_is_capped_at_the_index_size(index):
+    [matches] = urls(index.query([[0, 0, 1]], 10))
+
+    assert len(matches) == 3
+    assert matches[0] == "/mobile"
+
+
+def test_stored_rows_are_normalized(index):
+    norms = np.linalg.norm(np.asarray(index.matrix), axis=1)
+
+    assert np.allclose(norms, 1.0)
+
+
+def test_adding_an_existing_id_replaces_it(index):
+    index.add(ids=["api", "data"], embeddings=[[0, 0.5, 1], [1, 0, 0]],
+              metadatas=[{"url": "/api-v2"}, {"url": "/data"}])
+
+    assert index.count() == 4
+    assert index.get(["api", "data", "missing"]) == {"api": {"url": "/api-v2"}, "data": {"url": "/data"}}
+    assert urls(index.query([[0, 1, 0]], 2)) == [["/infra", "/api-v2"]]
+
+
+def test_other_instances_pick_up_writes_without_reopening(tmp_path, index):
+    reader = NumpyIndex(index.directory)
+    assert reader.count() == 3
+
+    index.add(ids=["data"], embeddings=[[1, 1, 0]], metadatas=[{"url": "/data"}])
+
+    assert reader.count() == 4
+    assert urls(reader.query([[1, 1, 0]], 1)) == [["/data"]]
+
+
+def test_writes_from_two_instances_are_merged(index):
+    other = NumpyIndex(index.directory)
+
+    index.add(ids=["data"], embeddings=[[1, 1, 0]], metadatas=[{"url": "/data"}])
+    other.add(ids=["web"], embeddings=[[0, 1, 1]], metadatas=[{"url": "/web"}])
+
+    assert NumpyIndex(index.directory).get(["data", "web"]) == {"data": {"url": "/data"}, "web": {"url": "/web"}}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_vector_index("faiss")
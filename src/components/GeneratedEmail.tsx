@@ -66,6 +66,12 @@ export const GeneratedEmail: React.FC<GeneratedEmailProps> = ({ email, onReset,
         </div>
 
         <div className="p-6">
+          {email.fallback && (
+            <p className="mb-4 text-sm text-amber-700 bg-amber-50 border border-amber-200 rounded-lg p-3">
+              The AI model was unavailable, so this email was generated from a template.
+            </p>
+          )}
+
           {/* Email Subject */}
           <div className="mb-6">
             <label className="block text-sm font-medium text-gray-700 mb-2">Subject</label>
@@ -12,6 +12,7 @@ export interface JobListing {
   experience: string;
   description: string;
   company: string;
+  duplicateOf?: string;
 }
 
 export interface GeneratedEmailData {
@@ -21,6 +22,8 @@ export interface GeneratedEmailData {
   jobListing: JobListing;
   portfolioLinks: string[];
   timestamp: string;
+  cached?: boolean;
+  fallback?: boolean;
 }
 
 export const Dashboard: React.FC = () => {
@@ -33,12 +36,17 @@ export const Dashboard: React.FC = () => {
 
   const handleUrlSubmit = async (url: string) => {
     setIsLoading(true);
+    setJobListings([]);
+    setCareerUrl(url);
     try {
-      const jobs = await emailService.extractJobs(url);
-      setJobListings(jobs);
-      setCareerUrl(url);
+      // Show the listings as soon as the first job arrives
+      const count = await emailService.extractJobsStream(url, (job) => {
+        setJobListings((jobs) => [...jobs, job]);
+        setCurrentStep('jobs');
+        setIsLoading(false);
+      });
       setCurrentStep('jobs');
-      toast.success(`Found ${jobs.length} job listings`);
+      toast.success(`Found ${count} job listings`);
     } catch (error) {
       toast.error('Failed to extract job listings');
     } finally {
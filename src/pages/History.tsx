@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { toast } from 'react-hot-toast';
 import { Clock, Search, Filter, Download, Eye } from 'lucide-react';
 import { GeneratedEmailData } from './Dashboard';
@@ -9,19 +9,65 @@ export const History: React.FC = () => {
   const [emails, setEmails] = useState<GeneratedEmailData[]>([]);
   const [filteredEmails, setFilteredEmails] = useState<GeneratedEmailData[]>([]);
   const [searchTerm, setSearchTerm] = useState('');
+  // Ranked server-side matches for searchTerm; null falls back to filtering locally
+  const [searchResults, setSearchResults] = useState<GeneratedEmailData[] | null>(null);
+  // Offset of the next page of matches, fetched on demand; null when there are no more
+  const [searchNextOffset, setSearchNextOffset] = useState<number | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  // Query being searched, so a page that arrives after the query changed is dropped
+  const searchQuery = useRef('');
   const [filterCompany, setFilterCompany] = useState('');
   const [selectedEmail, setSelectedEmail] = useState<GeneratedEmailData | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [currentPage, setCurrentPage] = useState(1);
   const itemsPerPage = 10;
+  const searchPageSize = 50;
 
   useEffect(() => {
     loadHistory();
   }, []);
 
+  useEffect(() => {
+    const query = searchTerm.trim();
+    searchQuery.current = query;
+    // The offset belongs to the previous query until this one's first page arrives
+    setSearchNextOffset(null);
+    if (!query) {
+      setSearchResults(null);
+      return;
+    }
+
+    let cancelled = false;
+    // Debounce typing; a response for an older term is ignored
+    const timer = setTimeout(async () => {
+      try {
+        // Only the first page; later pages are fetched by loadMoreResults
+        const page = await historyService.searchHistory(query, searchPageSize, 0);
+        if (!cancelled) {
+          setSearchResults(page.emails);
+          setSearchNextOffset(page.nextOffset);
+        }
+      } catch (error) {
+        if (!cancelled) {
+          setSearchResults(null);
+          setSearchNextOffset(null);
+        }
+      }
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
   useEffect(() => {
     filterEmails();
-  }, [emails, searchTerm, filterCompany]);
+  }, [emails, searchTerm, searchResults, filterCompany]);
+
+  // Appending more matches keeps the current page; a new query or filter starts over
+  useEffect(() => {
+    setCurrentPage(1);
+  }, [searchTerm, filterCompany]);
 
   const loadHistory = async () => {
     try {
@@ -37,7 +83,9 @@ export const History: React.FC = () => {
   const filterEmails = () => {
     let filtered = emails;
 
-    if (searchTerm) {
+    if (searchTerm && searchResults) {
+      filtered = searchResults;
+    } else if (searchTerm) {
       filtered = filtered.filter(
         (email) =>
           email.subject.toLowerCase().includes(searchTerm.toLowerCase()) ||
@@ -53,7 +101,23 @@ export const History: React.FC = () => {
     }
 
     setFilteredEmails(filtered);
-    setCurrentPage(1);
+  };
+
+  const loadMoreResults = async () => {
+    const query = searchQuery.current;
+    if (searchNextOffset === null || isLoadingMore) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await historyService.searchHistory(query, searchPageSize, searchNextOffset);
+      if (query === searchQuery.current) {
+        setSearchResults((results) => [...(results || []), ...page.emails]);
+        setSearchNextOffset(page.nextOffset);
+      }
+    } catch (error) {
+      toast.error('Failed to load more results');
+    } finally {
+      setIsLoadingMore(false);
+    }
   };
 
   const handleExport = async (email: GeneratedEmailData, format: 'pdf' | 'txt') => {
@@ -162,6 +226,11 @@ export const History: React.FC = () => {
                           <div className="font-medium text-gray-900 truncate max-w-xs">
                             {email.subject}
                           </div>
+                          {email.cached && (
+                            <span className="text-xs text-gray-500" title="Served from the response cache">
+                              cached
+                            </span>
+                          )}
                         </td>
                         <td className="py-4 px-4 text-gray-600">
                           {email.jobListing.company}
@@ -242,6 +311,19 @@ export const History: React.FC = () => {
                   </div>
                 </div>
               )}
+
+              {/* More ranked matches, fetched on demand */}
+              {searchTerm && searchResults && searchNextOffset !== null && (
+                <div className="flex justify-center mt-4">
+                  <button
+                    onClick={loadMoreResults}
+                    disabled={isLoadingMore}
+                    className="px-4 py-2 border border-gray-300 rounded text-sm hover:bg-gray-50 disabled:opacity-50"
+                  >
+                    {isLoadingMore ? 'Loading...' : 'Load more matches'}
+                  </button>
+                </div>
+              )}
             </>
           )}
         </div>
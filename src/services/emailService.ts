@@ -19,6 +19,44 @@ export const emailService = {
     return response.data.jobs;
   },
 
+  // Streams jobs over SSE as the backend parses them; resolves with the total count
+  async extractJobsStream(url: string, onJob: (job: JobListing) => void): Promise<number> {
+    const response = await fetch(`${API_BASE_URL}/jobs/extract/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...getAuthHeaders() },
+      body: JSON.stringify({ url }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to extract jobs: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let count = 0;
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = message.match(/^data: (.*)$/m)?.[1];
+        if (!data) continue;
+        if (event === 'job') {
+          count += 1;
+          onJob(JSON.parse(data));
+        } else if (event === 'done') {
+          return JSON.parse(data).jobs ?? count;
+        }
+      }
+    }
+    return count;
+  },
+
   async generateEmail(job: JobListing): Promise<GeneratedEmailData> {
     const response = await axios.post(
       `${API_BASE_URL}/emails/generate`,
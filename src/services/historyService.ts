@@ -17,6 +17,18 @@ export const historyService = {
     return response.data.emails;
   },
 
+  async searchHistory(
+    query: string,
+    limit = 100,
+    offset = 0
+  ): Promise<{ emails: GeneratedEmailData[]; nextOffset: number | null }> {
+    const response = await axios.get(`${API_BASE_URL}/history/search`, {
+      headers: getAuthHeaders(),
+      params: { q: query, limit, offset },
+    });
+    return response.data;
+  },
+
   async saveEmail(email: GeneratedEmailData): Promise<void> {
     await axios.post(`${API_BASE_URL}/history`, email, {
       headers: getAuthHeaders(),